@@ -0,0 +1,91 @@
+"""Latency of cache operations measured without the application.
+
+Key construction compares keys bound from signature introspected once at
+decoration with the former introspection of signature on every call. Latency
+of hits is compared between small and large caches, expirations are indexed,
+so hits should not slow down with the number of records.
+
+Usage:
+    python bench_cache.py --number 1000 --repeat 5
+
+"""
+import sys
+
+sys.path.append("..")
+
+import argparse
+from json import dumps
+from timeit import repeat
+from inspect import signature
+from heureka.Cache import Cache
+
+
+def get_args_kwargs_dict(func, *args, **kwargs):
+    """Build dictionary of argument values by introspecting function on every call,
+    former key construction of cache kept as baseline of benchmark.
+
+    Args:
+        func (function): decorated function
+        *args: arguments of decorated function
+        **kwargs: keyword arguments of decorated function
+
+    Returns:
+        dict: mapping of args/kwargs values to their names
+
+    """
+    bound_args = signature(func).bind_partial(*args, **kwargs)
+    bound_args.apply_defaults()
+
+    return dict(bound_args.arguments)
+
+
+def measure(func, number, repetitions):
+    """Measure the best mean latency of function.
+
+    Args:
+        func (function): measured function without arguments
+        number (int): calls per repetition
+        repetitions (int): number of repetitions
+
+    Returns:
+        float: latency of single call in microseconds
+
+    """
+    return min(repeat(func, number=number, repeat=repetitions)) / number * 1e6
+
+
+def bench_key_construction(number, repetitions):
+    def func(category_id, offset=0, limit=10):
+        pass
+
+    make_key = Cache(group_key="category_id")._compile_key(func)
+
+    old = measure(lambda: dumps(get_args_kwargs_dict(func, 1, 5)), number, repetitions)
+    new = measure(lambda: make_key((1, 5), {}), number, repetitions)
+    print("key construction: introspected per call {:.2f} us, compiled {:.2f} us ({:.1f}x)".format(
+        old, new, old / new))
+
+
+def bench_hit_latency(sizes, number, repetitions):
+    for size in sizes:
+        cache = Cache(max_lifetime=60)
+
+        @cache
+        def func(a):
+            return a
+
+        for a in range(size):
+            func(a)
+
+        print("hit of cache with {} records: {:.2f} us".format(size, measure(lambda: func(0), number, repetitions)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of cache operations.")
+    parser.add_argument("--number", type=int, default=1000, help="calls per repetition")
+    parser.add_argument("--repeat", type=int, default=5, help="number of repetitions")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10000], help="numbers of cached records")
+    args = parser.parse_args()
+
+    bench_key_construction(args.number, args.repeat)
+    bench_hit_latency(args.sizes, args.number, args.repeat)
@@ -0,0 +1,77 @@
+"""Benchmark of pooled HTTP clients against per-request connections.
+
+Usage:
+    python bench_client.py --requests 500
+
+"""
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import asyncio
+import argparse
+import aiohttp
+from time import perf_counter
+from statistics import mean, median
+from urllib.request import urlopen
+from stub_api import StubApi, Dataset, serve_in_background
+from HttpClient import HttpClient
+from AsyncHttpClient import AsyncHttpClient
+
+
+def measure(get, queries):
+    latencies = []
+
+    for query in queries:
+        start = perf_counter()
+        get(query)
+        latencies.append(perf_counter() - start)
+
+    return latencies
+
+
+def measure_async(get, queries):
+    async def run():
+        latencies = []
+
+        for query in queries:
+            start = perf_counter()
+            await get(query)
+            latencies.append(perf_counter() - start)
+
+        return latencies
+
+    return asyncio.get_event_loop().run_until_complete(run())
+
+
+def report(name, latencies):
+    print("{:<32} mean {:8.3f} ms   median {:8.3f} ms".format(name, 1000 * mean(latencies),
+                                                              1000 * median(latencies)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of HTTP clients.")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server, base_url = serve_in_background(StubApi(Dataset()))
+    queries = ["/offers/{}/0/10".format(100000 + i % 50) for i in range(args.requests)]
+
+    report("urlopen per request", measure(lambda query: urlopen(base_url + query).read(), queries))
+
+    client = HttpClient(base_url)
+    report("HttpClient keep-alive", measure(client.get, queries))
+
+    async def get_with_new_session(query):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(base_url + query) as response:
+                return await response.read()
+
+    report("aiohttp session per request", measure_async(get_with_new_session, queries))
+
+    async_client = AsyncHttpClient(base_url)
+    report("AsyncHttpClient keep-alive", measure_async(async_client.get, queries))
+
+    asyncio.get_event_loop().run_until_complete(async_client.close())
+    server.shutdown()
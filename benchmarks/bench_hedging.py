@@ -0,0 +1,76 @@
+"""Tail latency of products pages with and without hedged API requests.
+
+Products pages wait for summaries of offers of all shown products, so one
+slow API response delays the whole page. Application is run in separate
+process with hedging disabled and enabled, against one local stub of the API
+with exponentially distributed jitter. Every page is requested once,
+so offers are always fetched from the API.
+
+Usage:
+    python bench_hedging.py --requests 1000 --concurrency 4 --latency 0.01 --jitter 0.01
+
+"""
+import os
+import argparse
+import multiprocessing
+from stub_api import add_stub_arguments, stub_from_arguments, serve_in_background
+
+
+def run_worker(api_url, hedging, paths, concurrency, results):
+    """Serve application in this process, request its pages and report latencies.
+
+    Args:
+        api_url (str): base url of the API
+        hedging (bool): enable hedged API requests
+        paths (list): paths of pages
+        concurrency (int): number of concurrent clients
+        results (multiprocessing.Queue): queue of (latency, status) tuples, elapsed time and hedging statistics
+
+    """
+    os.environ["HEUREKA_HEDGING"] = "1" if hedging else "0"
+
+    # harness adds application to path
+    from harness import serve_app, run_load
+
+    app_server, app_url = serve_app(api_url)
+    measurements, elapsed = run_load([app_url + path for path in paths], concurrency)
+
+    from utils import hedger
+
+    results.put((measurements, elapsed, dict(hedger.stats) if hedger is not None else {}))
+    app_server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of hedged API requests.")
+    parser.add_argument("--requests", type=int, default=1000, help="number of requested products pages")
+    parser.add_argument("--concurrency", type=int, default=4)
+    add_stub_arguments(parser)
+    parser.set_defaults(latency=0.01, jitter=0.005, tail_rate=0.005, tail_latency=0.3, categories=2000, products=100)
+    args = parser.parse_args()
+
+    api = stub_from_arguments(args)
+    api_server, api_url = serve_in_background(api)
+
+    # distinct pages, so summaries of offers are not cached
+    pages_count = args.products // 5
+    paths = ["/kategorie?id={}&page={}".format(1 + index // pages_count, index % pages_count)
+             for index in range(args.requests)]
+
+    from harness import report
+
+    context = multiprocessing.get_context("spawn")
+
+    for hedging in (False, True):
+        results = context.Queue()
+        api_requests_count = api.requests_count
+        process = context.Process(target=run_worker, args=(api_url, hedging, paths, args.concurrency, results))
+        process.start()
+        measurements, elapsed, stats = results.get()
+        process.join()
+
+        report("hedging" if hedging else "no hedging", measurements, elapsed)
+        print("    API requests {}, hedged {}, won by duplicate {}".format(
+            api.requests_count - api_requests_count, stats.get("hedges", 0), stats.get("hedge_wins", 0)))
+
+    api_server.shutdown()
@@ -0,0 +1,61 @@
+"""Overhead of instrumentation compared to cache hit and API request.
+
+Cache statistics are plain counters which are only read on collection,
+so the hit path is not changed by metrics. Latency observation is added
+to every API request, so its cost is compared to request to local stub.
+
+Usage:
+    python bench_metrics.py --number 100000
+
+"""
+import argparse
+from timeit import repeat
+from stub_api import StubApi, Dataset, serve_in_background
+# harness adds application to path
+import harness
+from Cache import Cache
+from Metrics import Metrics
+from HttpClient import HttpClient
+
+
+def measure(statement, number):
+    """Measure best time of statement in microseconds per call.
+
+    Args:
+        statement (function): measured function
+        number (int): number of calls per repetition
+
+    Returns:
+        float: microseconds per call
+
+    """
+    return min(repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of instrumentation overhead.")
+    parser.add_argument("--number", type=int, default=100000, help="calls per repetition")
+    args = parser.parse_args()
+
+    cache = Cache(max_lifetime=600)
+
+    @cache
+    def func(a):
+        return a
+
+    func(1)
+
+    metrics = Metrics()
+    metrics.register_cache("func", cache)
+
+    api_server, api_url = serve_in_background(StubApi(Dataset()))
+    client = HttpClient(api_url)
+
+    print("cache hit                    {:8.2f} us".format(measure(lambda: func(1), args.number)))
+    print("latency observation          {:8.2f} us".format(
+        measure(lambda: metrics.observe_latency("sync", "/product/{}", 0.01), args.number)))
+    print("API request to local stub    {:8.2f} us".format(
+        measure(lambda: client.get("/product/100001"), args.number // 100)))
+    print("metrics rendering            {:8.2f} us".format(measure(metrics.render, args.number // 100)))
+
+    api_server.shutdown()
@@ -0,0 +1,59 @@
+"""Page latency while the API degrades and recovers.
+
+Local stub of the API is healthy first, so caches are filled and timeouts
+adapt to its latency. Then every response is delayed or fails, open circuits
+make pages fail fast or fall back to stale records. At last the stub recovers
+and circuits close again after their recovery time.
+
+Usage:
+    python bench_outage.py --requests 200 --concurrency 8 --outage-latency 3 --outage-error-rate 0
+
+"""
+import argparse
+from time import sleep
+from stub_api import add_stub_arguments, stub_from_arguments, serve_in_background
+from harness import serve_app, run_load, report
+from bench_scenarios import SCENARIOS, UrlGenerator
+
+
+def print_circuits():
+    """Print states and timeouts of circuits of API endpoint patterns."""
+    from utils import circuit_breaker
+
+    for pattern, (state, timeout) in sorted(circuit_breaker.states().items()):
+        print("    circuit {:<20} {:<10} timeout {:6.3f} s".format(pattern, state, timeout))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Page latency during outage of the API.")
+    parser.add_argument("--requests", type=int, default=200, help="number of requests in every phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--outage-latency", type=float, default=3, help="API latency during outage in seconds")
+    parser.add_argument("--outage-error-rate", type=float, default=0, help="API error rate during outage")
+    parser.add_argument("--recovery-wait", type=float, default=10, help="seconds between outage and recovery")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    api = stub_from_arguments(args)
+    api_server, api_url = serve_in_background(api)
+    app_server, app_url = serve_app(api_url)
+    generator = UrlGenerator(app_url, api.dataset)
+    healthy = (api.latency, api.error_rate)
+
+    for phase in ("healthy", "outage", "recovered"):
+        if phase == "outage":
+            api.latency, api.error_rate = args.outage_latency, args.outage_error_rate
+        elif phase == "recovered":
+            api.latency, api.error_rate = healthy
+            sleep(args.recovery_wait)
+
+        requests = generator.generate(SCENARIOS["browse"], args.requests)
+        api_requests_count = api.requests_count
+        results, elapsed = run_load([url for _, url in requests], args.concurrency)
+
+        print("phase {}, API requests {}".format(phase, api.requests_count - api_requests_count))
+        report(phase, results, elapsed)
+        print_circuits()
+
+    app_server.shutdown()
+    api_server.shutdown()
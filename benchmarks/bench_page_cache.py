@@ -0,0 +1,60 @@
+"""Throughput of hot pages with and without cache of whole pages.
+
+The same small set of pages is requested repeatedly, so data caches are warm
+and every request of the baseline only renders the page. Then the page cache
+is enabled on the running application and the load is repeated.
+
+Usage:
+    python bench_page_cache.py --requests 2000 --concurrency 8
+
+"""
+import argparse
+from collections import Counter
+from itertools import cycle, islice
+from urllib.request import urlopen
+from stub_api import StubApi, Dataset, serve_in_background
+from harness import serve_app, run_load, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of cache of whole pages.")
+    parser.add_argument("--latency", type=float, default=0.01, help="API latency in seconds")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per measurement")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of concurrent clients")
+    parser.add_argument("--pages", type=int, default=20, help="number of distinct hot pages")
+    args = parser.parse_args()
+
+    api_server, api_url = serve_in_background(StubApi(Dataset(args.pages, 50, 20), latency=args.latency))
+    app_server, app_url = serve_app(api_url)
+
+    from app import app
+    from config import config
+    from PageCache import PageCache
+
+    # mix of home, products and offers pages, requested with cosmetic variations of slug
+    pages = []
+
+    for category_id in range(1, args.pages + 1):
+        pages.append("{}/?page={}".format(app_url, category_id % 3))
+        pages.append("{}/kategorie-{}?id={}".format(app_url, category_id % 2, category_id))
+        pages.append("{}/kategorie/produkt?id={}".format(app_url, category_id * 100000 + 1))
+
+    # fill data caches
+    for url in pages:
+        urlopen(url).read()
+
+    urls = list(islice(cycle(pages), args.requests))
+
+    results, elapsed = run_load(urls, args.concurrency)
+    report("data caches only", results, elapsed)
+
+    page_cache = PageCache(app, config["page_cache"]["routes"], max_bytes=config["page_cache"]["max_bytes"])
+
+    results, elapsed = run_load(urls, args.concurrency)
+    report("page cache", results, elapsed)
+
+    stats = sum((cache.stats for cache in page_cache.caches.values()), Counter())
+    print("page cache hits {}, misses {}".format(stats["hits"], stats["misses"]))
+
+    app_server.shutdown()
+    api_server.shutdown()
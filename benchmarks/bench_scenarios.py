@@ -0,0 +1,118 @@
+"""Scripted browsing scenarios against the application and local stub of the API.
+
+Scenarios request home page, products pages and offers pages with categories
+and products chosen by Zipf-like popularity, so caches see realistic hot keys.
+
+Usage:
+    python bench_scenarios.py --scenario browse --requests 1000 --concurrency 8 \\
+        --latency 0.05 --jitter 0.02 --categories 2000 --products 100 --offers 50
+
+"""
+import argparse
+import random
+from itertools import accumulate
+from stub_api import add_stub_arguments, stub_from_arguments, serve_in_background
+from harness import serve_app, run_load, report
+
+# share of page kinds requested by every scenario
+SCENARIOS = {
+    "home": {"home": 1},
+    "category": {"category": 1},
+    "product": {"product": 1},
+    "browse": {"home": 0.2, "category": 0.5, "product": 0.3}
+}
+
+
+class UrlGenerator(object):
+    """Generator of application urls with Zipf-like popularity of categories and products."""
+
+    def __init__(self, base_url, dataset, skew=1.0, seed=0):
+        """Initialize generator.
+
+        Args:
+            base_url (str): base url of the application
+            dataset (stub_api.Dataset): data served by the stub
+            skew (float, optional): exponent of popularity distribution, 0 is uniform
+            seed (int, optional): seed of random choices
+
+        """
+        self.base_url = base_url
+        self.dataset = dataset
+        self.random = random.Random(seed)
+
+        self.category_weights = list(accumulate(1 / rank ** skew for rank in range(1, dataset.categories_count + 1)))
+        self.product_weights = list(accumulate(1 / rank ** skew for rank in range(1, dataset.products_per_category + 1)))
+
+    def category_id(self):
+        return self.random.choices(range(1, self.dataset.categories_count + 1), cum_weights=self.category_weights)[0]
+
+    def product_index(self):
+        return self.random.choices(range(self.dataset.products_per_category), cum_weights=self.product_weights)[0]
+
+    def home(self):
+        pages_count = max(1, self.dataset.categories_count // 9)
+        return "{}/?page={}".format(self.base_url, min(self.product_index(), pages_count - 1))
+
+    def category(self):
+        pages_count = max(1, self.dataset.products_per_category // 5)
+        page = min(self.product_index() // 5, pages_count - 1)
+        return "{}/kategorie?id={}&page={}".format(self.base_url, self.category_id(), page)
+
+    def product(self):
+        product_id = self.category_id() * 100000 + self.product_index()
+        return "{}/kategorie/produkt?id={}".format(self.base_url, product_id)
+
+    def generate(self, scenario, count):
+        """Generate urls of scenario.
+
+        Args:
+            scenario (dict): share of page kinds
+            count (int): number of urls
+
+        Returns:
+            list: tuples of page kind and url
+
+        """
+        kinds = self.random.choices(list(scenario.keys()), weights=list(scenario.values()), k=count)
+        return [(kind, getattr(self, kind)()) for kind in kinds]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Browsing scenarios against the application.")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="browse")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--skew", type=float, default=1.0, help="popularity skew, 0 is uniform")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    api = stub_from_arguments(args)
+    api_server, api_url = serve_in_background(api)
+    app_server, app_url = serve_app(api_url)
+    generator = UrlGenerator(app_url, api.dataset, skew=args.skew)
+
+    for concurrency in args.concurrency:
+        requests = generator.generate(SCENARIOS[args.scenario], args.requests)
+        api_requests_count = api.requests_count
+        results, elapsed = run_load([url for _, url in requests], concurrency)
+
+        print("scenario {}, concurrency {}, API requests {}".format(args.scenario, concurrency,
+                                                                   api.requests_count - api_requests_count))
+        report("all", results, elapsed)
+
+        for kind in sorted(set(kind for kind, _ in requests)):
+            report(kind, [result for (request_kind, _), result in zip(requests, results) if request_kind == kind],
+                   elapsed)
+
+    # show whether prefetched records were used afterwards
+    from app import prefetcher
+
+    if prefetcher is not None:
+        for name, hit_rate in sorted(prefetcher.hit_rates().items()):
+            print("prefetched {:<28} {prefetches:6d} records, {prefetch_hits:6d} hits, hit rate {hit_rate:.2f}".format(
+                name, **hit_rate))
+
+        print("prefetch loads dropped {}, failed {}".format(prefetcher.stats["dropped"], prefetcher.stats["failed"]))
+
+    app_server.shutdown()
+    api_server.shutdown()
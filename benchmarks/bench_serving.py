@@ -0,0 +1,40 @@
+"""Load test of threaded application server against slow local stub of the API.
+
+Every request asks for a different products page, so it misses the caches
+and waits for upstream. Throughput should grow with number of concurrent clients
+as request threads await their API calls concurrently on the shared event loop.
+
+Usage:
+    python bench_serving.py --latency 0.05 --requests 200
+
+"""
+import argparse
+from urllib.request import urlopen
+from stub_api import StubApi, Dataset, serve_in_background
+from harness import serve_app, run_load, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of application server.")
+    parser.add_argument("--latency", type=float, default=0.05, help="API latency in seconds")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    categories_count = args.requests * len(args.concurrency)
+    api_server, api_url = serve_in_background(StubApi(Dataset(categories_count, 5, 5), latency=args.latency))
+    app_server, app_url = serve_app(api_url)
+
+    # warm up list of categories shared by all pages
+    urlopen(app_url + "/").read()
+
+    category_ids = iter(range(1, categories_count + 1))
+
+    for concurrency in args.concurrency:
+        urls = ["{}/kategorie?id={}".format(app_url, next(category_ids)) for _ in range(args.requests)]
+
+        results, elapsed = run_load(urls, concurrency)
+        report("concurrency {}".format(concurrency), results, elapsed)
+
+    app_server.shutdown()
+    api_server.shutdown()
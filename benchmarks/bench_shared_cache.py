@@ -0,0 +1,103 @@
+"""Upstream load and memory of worker processes with private and shared caches.
+
+Several worker processes request the same pages against one local stub
+of the API. With private caches every worker fetches every record itself,
+with shared cache backend records fetched by one worker are loaded by the others.
+
+Usage:
+    python bench_shared_cache.py --workers 4 --categories 20
+
+"""
+import os
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from time import perf_counter
+from stub_api import StubApi, Dataset, serve_in_background
+
+
+def run_worker(api_url, shared_cache_path, urls, results):
+    """Request urls by application in this process and report its peak RSS.
+
+    Args:
+        api_url (str): base url of the API
+        shared_cache_path (str): path to shared cache database or None
+        urls (list): paths of pages
+        results (multiprocessing.Queue): queue of elapsed times and peak RSS in kB
+
+    """
+    os.environ["HEUREKA_API_URL"] = api_url
+
+    if shared_cache_path:
+        os.environ["HEUREKA_SHARED_CACHE"] = shared_cache_path
+
+    # harness adds application to path
+    import harness
+    from app import app
+
+    client = app.test_client()
+    start = perf_counter()
+
+    for url in urls:
+        client.get(url)
+
+    results.put((perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def run_workers(api, api_url, workers, urls, shared_cache_path=None):
+    """Run worker processes concurrently and print their upstream calls and memory.
+
+    Args:
+        api (StubApi): stub of the API
+        api_url (str): base url of the API
+        workers (int): number of worker processes
+        urls (list): paths requested by every worker
+        shared_cache_path (str, optional): path to shared cache database
+
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    api_requests_count = api.requests_count
+
+    processes = [context.Process(target=run_worker, args=(api_url, shared_cache_path, urls, results))
+                 for _ in range(workers)]
+
+    for process in processes:
+        process.start()
+
+    measurements = [results.get() for _ in processes]
+
+    for process in processes:
+        process.join()
+
+    print("{:<16} API requests {:6d}   slowest worker {:6.2f} s   peak RSS total {:8.1f} MB".format(
+        "shared cache" if shared_cache_path else "private caches", api.requests_count - api_requests_count,
+        max(elapsed for elapsed, _ in measurements), sum(rss for _, rss in measurements) / 1024))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of cache shared by worker processes.")
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes")
+    parser.add_argument("--categories", type=int, default=20, help="number of requested categories")
+    parser.add_argument("--latency", type=float, default=0.01, help="API latency in seconds")
+    args = parser.parse_args()
+
+    api = StubApi(Dataset(args.categories, 20, 200), latency=args.latency)
+    api_server, api_url = serve_in_background(api)
+
+    urls = ["/"]
+
+    for category_id in range(1, args.categories + 1):
+        urls.append("/kategorie?id={}".format(category_id))
+        urls.append("/kategorie/produkt?id={}".format(category_id * 100000 + 1))
+
+    run_workers(api, api_url, args.workers, urls)
+
+    # database on tmpfs when available
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+    with tempfile.TemporaryDirectory(dir=directory) as shared_directory:
+        run_workers(api, api_url, args.workers, urls, os.path.join(shared_directory, "cache.sqlite3"))
+
+    api_server.shutdown()
@@ -0,0 +1,114 @@
+"""Helpers shared by benchmarks: serving the application and driving load."""
+import sys
+import os
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import logging
+from time import perf_counter
+from threading import Thread
+from collections import Counter
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import make_server
+
+
+def serve_app(api_url):
+    """Start application in threaded server.
+
+    Note: Application modules read configuration on import, so this must be
+    called before anything imports them.
+
+    Args:
+        api_url (str): base url of the API
+
+    Returns:
+        tuple: server and its base url
+
+    """
+    os.environ["HEUREKA_API_URL"] = api_url
+
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, "http://127.0.0.1:{}".format(server.server_port)
+
+
+def fetch(url):
+    """Download url and measure latency.
+
+    Args:
+        url (str): url to download
+
+    Returns:
+        tuple: latency in seconds and status code
+
+    """
+    start = perf_counter()
+
+    try:
+        with urlopen(url) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+
+    return perf_counter() - start, status
+
+
+def run_load(urls, concurrency):
+    """Download urls by given number of concurrent clients.
+
+    Args:
+        urls (list): urls to download
+        concurrency (int): number of concurrent clients
+
+    Returns:
+        tuple: list of (latency, status) tuples and total elapsed time in seconds
+
+    """
+    start = perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+
+    return results, perf_counter() - start
+
+
+def percentile(values, percent):
+    """Compute percentile using nearest rank.
+
+    Args:
+        values (list): measured values
+        percent (float): percentile in range 0-100
+
+    Returns:
+        float: percentile of values
+
+    """
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+
+    return ordered[rank]
+
+
+def report(name, results, elapsed):
+    """Print throughput, latency percentiles and status counts.
+
+    Args:
+        name (str): name of measurement
+        results (list): (latency, status) tuples
+        elapsed (float): total elapsed time in seconds
+
+    """
+    latencies = [latency for latency, _ in results]
+    statuses = Counter(status for _, status in results)
+
+    print("{:<24} {:8.1f} req/s   p50 {:7.1f} ms   p90 {:7.1f} ms   p99 {:7.1f} ms   max {:7.1f} ms   {}".format(
+        name, len(results) / elapsed, *[1000 * percentile(latencies, percent) for percent in (50, 90, 99, 100)],
+        dict(statuses)))
@@ -0,0 +1,309 @@
+"""Local stub of Heureka API serving generated data.
+
+Serves the same endpoints as the real API, so the application can be run
+and measured offline by pointing HEUREKA_API_URL to the stub. Data are
+generated deterministically on request, so large datasets take no memory.
+Responses can be delayed with latency and jitter, rare responses can be
+delayed by tail latency (e.g. stalls of the server) and responses can fail
+with error rate.
+
+Usage:
+    python stub_api.py --port 5001 --latency 0.05 --jitter 0.02 --tail-rate 0.01 --tail-latency 0.5 \\
+        --error-rate 0.01 --categories 2000 --products 100 --offers 20
+
+"""
+import re
+import json
+import random
+import argparse
+from time import sleep
+from threading import Thread, Lock
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    """HTTP server handling every request in its own thread, `ThreadingHTTPServer` needs Python 3.7."""
+    daemon_threads = True
+
+
+class Dataset(object):
+    """Deterministically generated categories, products and offers.
+
+    Products of category N have IDs N * 100000 + index and offers
+    of product M have IDs M * 10000 + index.
+
+    """
+
+    def __init__(self, categories_count=20, products_per_category=50, offers_per_product=10):
+        """Initialize dataset sizes.
+
+        Args:
+            categories_count (int, optional): number of categories
+            products_per_category (int, optional): number of products in every category (max 100000)
+            offers_per_product (int, optional): number of offers of every product (max 10000)
+
+        """
+        self.categories_count = categories_count
+        self.products_per_category = products_per_category
+        self.offers_per_product = offers_per_product
+
+        self.categories = [self.category(category_id) for category_id in range(1, categories_count + 1)]
+
+    def has_category(self, category_id):
+        return 1 <= category_id <= self.categories_count
+
+    def has_product(self, product_id):
+        return self.has_category(product_id // 100000) and product_id % 100000 < self.products_per_category
+
+    def has_offer(self, offer_id):
+        return self.has_product(offer_id // 10000) and offer_id % 10000 < self.offers_per_product
+
+    def category(self, category_id):
+        return {"categoryId": category_id, "title": "Kategorie {}".format(category_id)}
+
+    def product(self, product_id):
+        category_id, index = divmod(product_id, 100000)
+        return {"productId": product_id, "categoryId": category_id, "title": "Produkt {} {}".format(category_id, index)}
+
+    def products(self, category_id, offset, limit):
+        indices = range(offset, min(offset + limit, self.products_per_category))
+        return [self.product(category_id * 100000 + index) for index in indices]
+
+    def offer(self, offer_id):
+        product_id, index = divmod(offer_id, 10000)
+        return {
+            "offerId": offer_id,
+            "productId": product_id,
+            "title": "Nabídka {} obchodu {}".format(product_id, index),
+            "description": "Popis produktu {} v obchodě {}.".format(product_id, index),
+            "url": "http://eshop{}.example.com/{}".format(index, product_id),
+            "img_url": "http://eshop{}.example.com/{}.png".format(index, product_id),
+            "price": float(100 + (product_id + 37 * index) % 900)
+        }
+
+    def offers(self, product_id, offset, limit):
+        indices = range(offset, min(offset + limit, self.offers_per_product))
+        return [self.offer(product_id * 10000 + index) for index in indices]
+
+
+class StubApi(object):
+    """Resolver of API queries over generated dataset."""
+
+    routes = [
+        (re.compile(r"^/categories/?$"), "categories"),
+        (re.compile(r"^/category/(\d+)/?$"), "category"),
+        (re.compile(r"^/products/(\d+)/count/?$"), "products_count"),
+        (re.compile(r"^/products/(\d+)/(\d+)/(\d+)/?$"), "products"),
+        (re.compile(r"^/product/(\d+)/?$"), "product"),
+        (re.compile(r"^/offers/(\d+)/count/?$"), "offers_count"),
+        (re.compile(r"^/offers/(\d+)/(\d+)/(\d+)/?$"), "offers"),
+        (re.compile(r"^/offer/(\d+)/?$"), "offer"),
+    ]
+
+    def __init__(self, dataset, latency=0, jitter=0, error_rate=0, seed=0, tail_rate=0, tail_latency=0):
+        """Initialize stub.
+
+        Args:
+            dataset (Dataset): generated data
+            latency (float, optional): base delay of every response in seconds
+            jitter (float, optional): mean of exponentially distributed extra delay in seconds
+            error_rate (float, optional): probability of responding with server error
+            seed (int, optional): seed of random jitter and errors
+            tail_rate (float, optional): probability of response delayed by tail latency
+            tail_latency (float, optional): extra delay of rare slow responses in seconds
+
+        """
+        self.dataset = dataset
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+
+        self.random = random.Random(seed)
+        self.requests_count = 0
+
+        # numbers of requests being served at the moment and at most
+        self.active_count = 0
+        self.max_active_count = 0
+
+        self._lock = Lock()
+
+    def get_delay_and_error(self):
+        """Draw delay of response and whether it fails.
+
+        Returns:
+            tuple: delay in seconds and error flag
+
+        """
+        with self._lock:
+            self.requests_count += 1
+            self.active_count += 1
+            self.max_active_count = max(self.max_active_count, self.active_count)
+            delay = self.latency + (self.random.expovariate(1 / self.jitter) if self.jitter else 0)
+
+            if self.tail_rate and self.random.random() < self.tail_rate:
+                delay += self.tail_latency
+
+            error = self.random.random() < self.error_rate
+
+        return delay, error
+
+    def finish(self):
+        """Mark request as served."""
+        with self._lock:
+            self.active_count -= 1
+
+    def resolve(self, path):
+        """Resolve query path.
+
+        Args:
+            path (str): query path
+
+        Returns:
+            data to be returned as JSON or None when not found
+
+        """
+        for pattern, name in self.routes:
+            match = pattern.match(path)
+
+            if match:
+                return getattr(self, name)(*[int(group) for group in match.groups()])
+
+        return None
+
+    def categories(self):
+        return self.dataset.categories
+
+    def category(self, category_id):
+        return self.dataset.category(category_id) if self.dataset.has_category(category_id) else None
+
+    def products_count(self, category_id):
+        return {"count": self.dataset.products_per_category} if self.dataset.has_category(category_id) else None
+
+    def products(self, category_id, offset, limit):
+        return self.dataset.products(category_id, offset, limit) if self.dataset.has_category(category_id) else None
+
+    def product(self, product_id):
+        return self.dataset.product(product_id) if self.dataset.has_product(product_id) else None
+
+    def offers_count(self, product_id):
+        return {"count": self.dataset.offers_per_product} if self.dataset.has_product(product_id) else None
+
+    def offers(self, product_id, offset, limit):
+        return self.dataset.offers(product_id, offset, limit) if self.dataset.has_product(product_id) else None
+
+    def offer(self, offer_id):
+        return self.dataset.offer(offer_id) if self.dataset.has_offer(offer_id) else None
+
+
+def make_handler(api):
+    """Create request handler class bound to stub.
+
+    Args:
+        api (StubApi): stub resolving queries
+
+    Returns:
+        class: request handler
+
+    """
+
+    class StubHandler(BaseHTTPRequestHandler):
+        # keep connections alive between requests, do not delay small writes
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            delay, error = api.get_delay_and_error()
+
+            if delay:
+                sleep(delay)
+
+            data = None if error else api.resolve(self.path)
+
+            if error:
+                self.send_response(500)
+                body = b"{}"
+            elif data is None:
+                self.send_response(404)
+                body = b"{}"
+            else:
+                self.send_response(200)
+                body = json.dumps(data).encode("utf-8")
+
+            # client may have given up waiting for delayed response
+            try:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            finally:
+                api.finish()
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve_in_background(api, port=0):
+    """Start stub server in daemon thread.
+
+    Args:
+        api (StubApi): stub resolving queries
+        port (int, optional): port to listen on, random free port by default
+
+    Returns:
+        tuple: server and its base url
+
+    """
+    server = ThreadingServer(("127.0.0.1", port), make_handler(api))
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, "http://127.0.0.1:{}".format(server.server_address[1])
+
+
+def add_stub_arguments(parser):
+    """Add command line options of stub to argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): parser to extend
+
+    """
+    parser.add_argument("--latency", type=float, default=0, help="base API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="mean extra API latency in seconds")
+    parser.add_argument("--tail-rate", type=float, default=0, help="probability of API response with tail latency")
+    parser.add_argument("--tail-latency", type=float, default=0, help="extra API latency of tail responses in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="probability of API server error")
+    parser.add_argument("--categories", type=int, default=20, help="number of categories")
+    parser.add_argument("--products", type=int, default=50, help="products per category")
+    parser.add_argument("--offers", type=int, default=10, help="offers per product")
+
+
+def stub_from_arguments(args):
+    """Create stub from parsed command line options.
+
+    Args:
+        args (argparse.Namespace): options added by add_stub_arguments
+
+    Returns:
+        StubApi: configured stub
+
+    """
+    dataset = Dataset(args.categories, args.products, args.offers)
+    return StubApi(dataset, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                   tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of Heureka API.")
+    parser.add_argument("--port", type=int, default=5001)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingServer(("127.0.0.1", args.port), make_handler(stub_from_arguments(args)))
+    print("Serving stub API on http://127.0.0.1:{}".format(args.port))
+    server.serve_forever()
@@ -1,6 +1,5 @@
-from json import dumps
-from datetime import datetime
-from collections import OrderedDict
+from functools import wraps
+from asyncio import ensure_future, shield, get_event_loop
 from Cache import Cache
 
 
@@ -8,12 +7,19 @@ class AsyncCache(Cache):
     """Time Aware Least Recent Used (TLRU) cache decorator for asynchronous functions.
 
     Cache can be defined with
-     - limited number of stored records which are invalidated
-       in FIFO order,
-     - limited lifetime of records which are checked and possibly
-       invalidated on every decorator call,
+     - limited number or approximate size in bytes of stored records
+       which are invalidated in LRU order,
+     - limited lifetime of records which are indexed by expiration
+       time and lazily invalidated in bounded batches on decorator call,
      - distibuted into multiple subcaches using any function
-       parameter as key.
+       parameter as key or hash of record key (`shards`).
+
+    Concurrent misses of the same record share one in-flight future,
+    i.e. decorated function is awaited once for all callers.
+
+    Optionally, records can be served stale for `stale_ttl` seconds
+    after their lifetime while they are refreshed in background task,
+    and stale records can be served when their refresh fails.
 
     Example:
         >>> from AsyncCache import AsyncCache
@@ -30,47 +36,137 @@ class AsyncCache(Cache):
             max_size (int, optional): maximum number of stored records
             max_lifetime (int, optional): maximum lifetime of stored records in seconds
             group_key (str, optional): parameter name of decorated function
+            invalidation_batch (int, optional): maximum number of records invalidated per call
+            key_fn (function, optional): builds hashable record key from args and kwargs
+                of decorated function
+            stale_ttl (int, optional): seconds after lifetime during which stale record
+                is served while being refreshed in background
+            serve_stale_on_error (bool, optional): serve stale record when its refresh fails
+            max_bytes (int, optional): maximum approximate size of stored records in bytes
+            sizer (function, optional): approximates size of stored value in bytes
+            shards (int, optional): number of subcaches of ungrouped cache, limits are
+                divided among them
+            frozen (bool, optional): store read-only copies of values
+            backend (CacheBackend, optional): storage shared with caches of other processes
+            negative_ttl (int, optional): lifetime of negative results in seconds, disabled by default
+            negative_exceptions (tuple, optional): exception types of decorated function cached as negative results
+            is_negative (function, optional): checks whether returned value is negative result
+            negative_max_size (int, optional): maximum number of stored negative results
 
         """
         super().__init__(*args, **kwargs)
 
-    async def _add_or_replace(self, key, cache, func, *args, **kwargs):
+        # futures of in-flight calls
+        self._in_flight = {}
+
+    async def _add_or_replace(self, group, key, cache, func, *args, **kwargs):
         """Add records to cache or replace invalid records.
 
         Args:
-            key (str): key to record in cache
+            group: subcache key or None
+            key (tuple): key to record in cache
             cache (OrderedDict): records stored in cache or subcache
             func (function): decorated function
             *args: arguments of decorated function
             **kwargs: keyword arguments of decorated function
 
         Returns:
-            OrderedDict: updated cache
+            dict: valid record
 
         """
-        if key in cache:
-            if self.max_lifetime:
-                add_or_replace = datetime.now() - cache[key]["fetch_time"] > self.max_lifetime
-            else:
-                add_or_replace = False
-            pop_allowed = False
-        else:
-            add_or_replace = True
-            pop_allowed = True
-
-        # record is not cached yet or is beyond its lifetime
-        if add_or_replace:
-            # when limit of cached records is reached, pop the oldest one
-            if self.max_size and pop_allowed and len(cache) == self.max_size:
-                _, _ = cache.popitem(last=False)
-
-            # cache new records
-            cache[key] = {
-                "data": await func(*args, **kwargs),
-                "fetch_time": datetime.now()
-            }
-
-        return cache
+        if self.backend is None:
+            return await self._fetch(group, key, cache, func, *args, **kwargs)
+
+        # blocking calls of shared backend run in default executor of the loop
+        loop = get_event_loop()
+        record = await loop.run_in_executor(None, self._load_shared, group, key, cache)
+
+        if record is not None:
+            return record
+
+        token = await loop.run_in_executor(None, self.backend.acquire, self.namespace, key)
+
+        try:
+            record = await loop.run_in_executor(None, self._load_shared, group, key, cache)
+
+            if record is None:
+                record = await self._fetch(group, key, cache, func, *args, **kwargs)
+
+                # negative results are not shared
+                if not record.get("negative"):
+                    await loop.run_in_executor(None, self._save_shared, key, record)
+        finally:
+            if token is not None:
+                await loop.run_in_executor(None, self.backend.release, self.namespace, key, token)
+
+        return record
+
+    async def _fetch(self, group, key, cache, func, *args, **kwargs):
+        """Await decorated function and store its value.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+            func (function): decorated function
+            *args: arguments of decorated function
+            **kwargs: keyword arguments of decorated function
+
+        Returns:
+            dict: new record or stale record when decorated function failed
+
+        """
+        try:
+            data = await func(*args, **kwargs)
+        except Exception as error:
+            record = cache.get(key)
+
+            if self.serve_stale_on_error and record is not None:
+                return record
+
+            if isinstance(error, self.negative_exceptions):
+                self._store_negative(group, key, cache, error=error)
+
+            raise
+
+        if self.is_negative is not None and self.is_negative(data):
+            return self._store_negative(group, key, cache, data=data)
+
+        # cache new records
+        return self._store(group, key, cache, data)
+
+    def _get_in_flight(self, group, key, cache, func, *args, **kwargs):
+        """Get future of in-flight call for record or start a new one.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+            func (function): decorated function
+            *args: arguments of decorated function
+            **kwargs: keyword arguments of decorated function
+
+        Returns:
+            asyncio.Future: future resolving to valid record
+
+        """
+        future = self._in_flight.get((group, key))
+
+        if future is None:
+            future = ensure_future(self._add_or_replace(group, key, cache, func, *args, **kwargs))
+            self._in_flight[(group, key)] = future
+
+            def done(_):
+                if self._in_flight.get((group, key)) is future:
+                    del self._in_flight[(group, key)]
+
+                # exception is raised to awaiting callers, background refresh has none
+                if not future.cancelled():
+                    future.exception()
+
+            future.add_done_callback(done)
+
+        return future
 
     def __call__(self, func):
         """Wrap function with cache decorator on call.
@@ -82,8 +178,10 @@ class AsyncCache(Cache):
             cached value
 
         """
+        make_key = self._compile_key(func)
+        self.namespace = "{}.{}".format(func.__module__, func.__qualname__)
 
-        async def wrapper(*args, **kwargs):
+        async def get_record(*args, **kwargs):
             """Retrieve record from cache.
 
             Args:
@@ -91,34 +189,85 @@ class AsyncCache(Cache):
                 **kwargs: keyword arguments of decorated function
 
             Returns:
-                cached value
+                dict: cached record
 
             """
-            # build key from function args and kwargs key-value pairs
-            args_kwargs_dict = self._get_args_kwargs_dict(func, *args, **kwargs)
-            key = dumps(args_kwargs_dict)
-
-            # add record to cache and/or retrieve it
-            if self.group_key:
-                # use selected argument's value as key
-                group = args_kwargs_dict[self.group_key]
-
-                # add subcache if needed
-                if group not in self.cache:
-                    self.cache[group] = OrderedDict()
-
-                # cache into subcache and retrieve result
-                self.cache[group] = await self._add_or_replace(key, self.cache[group], func, *args, **kwargs)
-                cached_result = self.cache[group][key]
+            # build group and key from function args and kwargs values
+            group, key = make_key(args, kwargs)
+            cache = self._get_subcache(group)
+
+            # retrieve record from cache, serve it stale or wait for in-flight call,
+            # which is shielded so cancellation of one caller does not cancel it for the others
+            record = self._get_valid(key, cache)
+
+            if record is not None:
+                self._touch(group, key, cache)
+                self._count_hit(record)
             else:
-                # cache and retrieve result
-                self.cache = await self._add_or_replace(key, self.cache, func, *args, **kwargs)
-                cached_result = self.cache[key]
+                stale_record = cache.get(key)
+                negative_record = self._get_negative(group, key)
+
+                if negative_record is not None:
+                    record = negative_record
+                else:
+                    in_flight = self._get_in_flight(group, key, cache, func, *args, **kwargs)
 
-            # invalidate all records above lifetime threshold
+                    if self._is_servable_stale(stale_record):
+                        record = stale_record
+                        self._count("stale_hits")
+                    else:
+                        record = await shield(in_flight)
+                        self._count("misses")
+
+            # invalidate records above lifetime threshold
             if self.max_lifetime:
                 self._invalidate_by_lifetime()
 
-            return cached_result["data"]
+            return record
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return (await get_record(*args, **kwargs))["data"]
+
+        async def versioned(*args, **kwargs):
+            """Retrieve cached value together with version of its record.
+
+            Returns:
+                tuple: cached value and its version
+
+            """
+            record = await get_record(*args, **kwargs)
+            return record["data"], record["version"]
+
+        async def conditional(*args, **kwargs):
+            """Retrieve cached value together with version and remaining lifetime of its record.
+
+            Returns:
+                tuple: cached value, its version and seconds until it expires
+
+            """
+            record = await get_record(*args, **kwargs)
+            return record["data"], record["version"], self.remaining_lifetime(record)
+
+        async def prefetch(*args, **kwargs):
+            """Load record into cache unless it is cached already.
+
+            Returns:
+                cached value
+
+            """
+            group, key = make_key(args, kwargs)
+            cache = self._get_subcache(group)
+            record = self._get_valid(key, cache) or self._get_negative(group, key)
+
+            if record is None:
+                record = await shield(self._get_in_flight(group, key, cache, func, *args, **kwargs))
+                self._mark_prefetched(record)
+
+            return record["data"]
 
+        wrapper.cache = self
+        wrapper.versioned = versioned
+        wrapper.conditional = conditional
+        wrapper.prefetch = prefetch
         return wrapper
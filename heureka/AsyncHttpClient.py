@@ -0,0 +1,85 @@
+import aiohttp
+from asyncio import get_event_loop
+
+
+class AsyncHttpClient(object):
+    """Asynchronous HTTP client sharing one session and connection pool.
+
+    Session is created lazily in the running event loop and reused
+    by all requests, so connections are kept alive between them.
+    Number of connections is limited in total and per host.
+
+    Example:
+        >>> from AsyncHttpClient import AsyncHttpClient
+        >>> client = AsyncHttpClient("http://localhost:5000", connect_timeout=1, read_timeout=5)
+        >>> status, body = await client.get("/categories")
+
+    """
+
+    def __init__(self, base_url, connect_timeout=None, read_timeout=None, max_connections=100,
+                 max_connections_per_host=10, keepalive_timeout=30):
+        """Initialize client settings.
+
+        Args:
+            base_url (str): scheme, host and port of all requests
+            connect_timeout (float, optional): timeout of establishing connection in seconds
+            read_timeout (float, optional): timeout of waiting for response data in seconds
+            max_connections (int, optional): maximum number of open connections
+            max_connections_per_host (int, optional): maximum number of open connections to one host
+            keepalive_timeout (float, optional): seconds to keep idle connection open
+
+        """
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        self._session = None
+        self._loop = None
+
+    def _get_session(self):
+        """Get shared session, create it when missing or bound to another loop.
+
+        Returns:
+            aiohttp.ClientSession: shared session
+
+        """
+        loop = get_event_loop()
+
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._loop = loop
+
+        return self._session
+
+    async def get(self, query, read_timeout=None):
+        """Send GET request.
+
+        Note: Query must start with '/'.
+
+        Args:
+            query (str): path and query string of request
+            read_timeout (float, optional): timeout of waiting for response data in seconds, overrides session's one
+
+        Returns:
+            tuple: status code and body of response
+
+        """
+        kwargs = {}
+
+        if read_timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=read_timeout)
+
+        async with self._get_session().get(self.base_url + query, **kwargs) as response:
+            return response.status, await response.read()
+
+    async def close(self):
+        """Close shared session and its connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
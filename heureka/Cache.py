@@ -1,19 +1,162 @@
-from json import dumps
-from inspect import getargspec
-from datetime import datetime, timedelta
-from collections import OrderedDict
+import pickle
+from sys import getsizeof
+from hashlib import sha1
+from copy import copy
+from math import ceil
+from time import monotonic, time
+from functools import wraps
+from heapq import heappush, heappop
+from itertools import count
+from inspect import signature, Parameter
+from threading import Lock, RLock
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, Counter
+
+
+def approximate_size(obj):
+    """Approximate memory footprint of object in bytes.
+
+    Note: Only built-in containers and attributes of objects
+    with slots are traversed and shared objects are counted repeatedly.
+
+    Args:
+        obj: object to measure
+
+    Returns:
+        int: approximate size in bytes
+
+    """
+    size = getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key) + approximate_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(approximate_size(getattr(obj, name, None)) for name in obj.__slots__)
+
+    return size
+
+
+class FrozenDict(dict):
+    """Read-only dictionary, which can be shared without defensive copies.
+
+    Note: Unlike mapping proxy, it can be pickled and serialized to JSON.
+
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("'{}' object is read-only".format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(obj):
+    """Create read-only copy of object made of built-in containers.
+
+    Dictionaries are frozen into FrozenDict, lists into tuples and sets
+    into frozen sets, recursively.
+
+    Args:
+        obj: object to freeze
+
+    Returns:
+        read-only object
+
+    """
+    if isinstance(obj, FrozenDict):
+        return obj
+    elif isinstance(obj, dict):
+        return FrozenDict((key, freeze(value)) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        return tuple(freeze(item) for item in obj)
+    elif isinstance(obj, set):
+        return frozenset(obj)
+
+    return obj
+
+
+# versions of records which can not be pickled
+local_versions = count(1)
+
+
+def content_version(data):
+    """Derive version of record from its content.
+
+    Note: Values which can not be pickled get version unique in this process.
+
+    Args:
+        data: cached value
+
+    Returns:
+        str: digest of pickled value
+
+    """
+    try:
+        # fixed protocol, so versions match between processes and Python versions
+        return sha1(pickle.dumps(data, protocol=4)).hexdigest()
+    except Exception:
+        return "local-{}".format(next(local_versions))
 
 
 class Cache(object):
     """Time Aware Least Recent Used (TLRU) cache decorator.
 
     Cache can be defined with
-     - limited number of stored records which are invalidated
-       in FIFO order,
-     - limited lifetime of records which are checked and possibly
-       invalidated on every decorator call,
+     - limited number or approximate size in bytes of stored records
+       which are invalidated in LRU order,
+     - limited lifetime of records which are indexed by expiration
+       time and lazily invalidated in bounded batches on decorator call,
      - distibuted into multiple subcaches using any function
-       parameter as key.
+       parameter as key or hash of record key (`shards`).
+
+    Cache is thread-safe, every subcache is guarded by its own lock,
+    so threads working with different subcaches do not block each other.
+    Concurrent misses of the same record are coalesced, i.e. decorated
+    function is called once and other callers wait for its result.
+
+    Optionally, records can be served stale for `stale_ttl` seconds
+    after their lifetime while they are refreshed in background,
+    and stale records can be served when their refresh fails.
+
+    Records are keyed by tuple of argument values in order of parameters
+    of decorated function, unless custom `key_fn` is supplied.
+    With `frozen`, records are stored as read-only copies, so callers
+    can share them without copying.
+
+    Every stored record gets version derived from its content, so values
+    derived from cached data (e.g. rendered templates or ETags) can be keyed
+    by it and change whenever the record changes, while equal records have
+    equal versions in all processes. Decorated function returns value
+    with its version through `versioned` attribute and additionally with
+    remaining lifetime of its record through `conditional` attribute,
+    e.g. for max age of responses built from it.
+
+    Records can be loaded ahead of use through `prefetch` attribute
+    of decorated function, such records are marked, so their later hits
+    show whether prefetching pays off.
+
+    Records can be dumped with their fetch times and loaded into another
+    cache, e.g. of restarted process, records above lifetime are skipped.
+
+    Optional shared `backend` is used on misses, so processes load records
+    fetched by each other and only one of them calls decorated function
+    for the same record.
+
+    Negative results, i.e. raised `negative_exceptions` (e.g. not found
+    errors) and values matching `is_negative` (e.g. empty lists), can be cached
+    for short `negative_ttl` in separate store limited to `negative_max_size`
+    records, so requests of missing records do not call decorated function
+    again and again, yet they can not evict valid records. Cached exceptions
+    are raised again on hits, negative records are not shared through backend.
+
+    Counts of hits, stale hits, negative hits, misses, evictions, expirations,
+    prefetches and hits of prefetched records are collected in `stats`, cache
+    is available as `cache` attribute of decorated function.
 
     Example:
         >>> from Cache import Cache
@@ -23,110 +166,755 @@ class Cache(object):
 
     """
 
-    def __init__(self, max_size=None, max_lifetime=None, group_key=None):
+    # shared pool of threads refreshing stale records in background
+    refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+    def __init__(self, max_size=None, max_lifetime=None, group_key=None, invalidation_batch=100, key_fn=None,
+                 stale_ttl=0, serve_stale_on_error=False, max_bytes=None, sizer=approximate_size, shards=1,
+                 frozen=False, backend=None, negative_ttl=None, negative_exceptions=(), is_negative=None,
+                 negative_max_size=1000):
         """Initialize cache storage and limitations.
 
         Args:
             max_size (int, optional): maximum number of stored records
             max_lifetime (int, optional): maximum lifetime of stored records in seconds
             group_key (str, optional): parameter name of decorated function
+            invalidation_batch (int, optional): maximum number of records invalidated per call
+            key_fn (function, optional): builds hashable record key from args and kwargs
+                of decorated function
+            stale_ttl (int, optional): seconds after lifetime during which stale record
+                is served while being refreshed in background
+            serve_stale_on_error (bool, optional): serve stale record when its refresh fails
+            max_bytes (int, optional): maximum approximate size of stored records in bytes
+            sizer (function, optional): approximates size of stored value in bytes
+            shards (int, optional): number of subcaches of ungrouped cache, limits are
+                divided among them
+            frozen (bool, optional): store read-only copies of values
+            backend (CacheBackend, optional): storage shared with caches of other processes
+            negative_ttl (int, optional): lifetime of negative results in seconds, disabled by default
+            negative_exceptions (tuple, optional): exception types of decorated function cached as negative results
+            is_negative (function, optional): checks whether returned value is negative result
+            negative_max_size (int, optional): maximum number of stored negative results
 
         """
         self.max_size = max_size
-        self.max_lifetime = timedelta(seconds=max_lifetime) if max_lifetime else None
+        self.max_lifetime = max_lifetime
         self.group_key = group_key
+        self.invalidation_batch = invalidation_batch
+        self.key_fn = key_fn
+        self.stale_ttl = stale_ttl
+        self.serve_stale_on_error = serve_stale_on_error
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self.frozen = frozen
+        self.backend = backend
+        self.negative_ttl = negative_ttl
+        self.negative_exceptions = negative_exceptions if negative_ttl else ()
+        self.is_negative = is_negative if negative_ttl else None
+        self.negative_max_size = negative_max_size
+
+        # records of decorated function in shared backend, set on decoration
+        self.namespace = None
+        self.shards = shards if not group_key else 1
+
+        # initialize cache or dictionary of subcaches, their locks and sizes in bytes
+        self.grouped = bool(group_key) or self.shards > 1
+        self.cache = {} if self.grouped else OrderedDict()
+        self.sizes = {}
+        self.stats = Counter()
+        self._subcache_locks = {}
+
+        # limits of single subcache
+        self._max_size = ceil(max_size / self.shards) if max_size else None
+        self._max_bytes = max_bytes // self.shards if max_bytes else None
+
+        # min-heap of (expiration time, sequence, group, key) entries, sequence breaks ties
+        self._expirations = []
+        self._sequence = count()
+
+        # per-record locks of in-flight calls with number of waiting callers
+        self._lock = Lock()
+        self._key_locks = {}
+
+        # negative results by (group, key) in LRU order, separate from valid records
+        self.negatives = OrderedDict()
+        self._negative_lock = Lock()
+
+        # counters are updated under lock, so concurrent updates of request threads are not lost
+        self._stats_lock = Lock()
+
+    @property
+    def records_count(self):
+        """int: number of stored records"""
+        if not self.grouped:
+            return len(self.cache)
+
+        return sum(len(subcache) for subcache in list(self.cache.values()))
+
+    @property
+    def bytes(self):
+        """int: approximate size of stored records in bytes, counted only when `max_bytes` is set"""
+        return sum(list(self.sizes.values()))
+
+    def remaining_lifetime(self, record):
+        """Get time until record expires, negative records expire after lifetime of negative results.
+
+        Args:
+            record (dict): cached record
+
+        Returns:
+            float: seconds until record expires, 0 for expired record served stale, None when records do not expire
+
+        """
+        lifetime = self.negative_ttl if record.get("negative") else self.max_lifetime
 
-        # initialize cache or dictionary of subcaches
-        self.cache = {} if group_key else OrderedDict()
+        if not lifetime:
+            return None
 
-    def _get_args_kwargs_dict(self, func, *args, **kwargs):
-        """Create dictionary of arguments and keyword arguments
-        and their values.
+        return max(0, lifetime - (monotonic() - record["fetch_time"]))
+
+    def _compile_key(self, func):
+        """Introspect decorated function once and create function
+        building group and record key from call arguments.
+
+        Plain parameters are bound positionally with their defaults filled in,
+        so the key is a tuple of argument values in order of parameters.
+        Functions with variadic parameters fall back to full binding.
 
         Args:
             func (function): decorated function
-            *args: arguments of decorated function
-            **kwargs: keyword arguments of decorated function
 
         Returns:
-            dict: mapping of args/kwargs values to their names
+            function: maps (args, kwargs) to (group, key) tuple
+
+        Raises:
+            ValueError: group key is not a parameter of decorated function
 
         """
-        args_spec = getargspec(func)
+        func_signature = signature(func)
+        params = list(func_signature.parameters.values())
+        names = tuple(param.name for param in params)
+        defaults = tuple(param.default for param in params)
+
+        if self.group_key and self.group_key not in names:
+            raise ValueError("Group key '{}' is not a parameter of {}.".format(self.group_key, func.__name__))
+
+        if any(param.kind in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD) for param in params):
+            def bind(args, kwargs):
+                bound_args = func_signature.bind(*args, **kwargs)
+                bound_args.apply_defaults()
+                values = bound_args.arguments
+
+                return tuple(tuple(sorted(value.items())) if isinstance(value, dict) else value
+                             for value in values.values())
+        else:
+            def bind(args, kwargs):
+                if not kwargs:
+                    return args + defaults[len(args):]
+
+                # fill remaining parameters from kwargs or their defaults
+                return args + tuple(kwargs.get(name, default)
+                                    for name, default in zip(names[len(args):], defaults[len(args):]))
+
+        group_index = names.index(self.group_key) if self.group_key else None
+        key_fn = self.key_fn
+
+        if key_fn and group_index is None:
+            def make_key(args, kwargs):
+                return None, key_fn(*args, **kwargs)
+        elif key_fn:
+            def make_key(args, kwargs):
+                return bind(args, kwargs)[group_index], key_fn(*args, **kwargs)
+        elif group_index is not None:
+            def make_key(args, kwargs):
+                key = bind(args, kwargs)
+                return key[group_index], key
+        else:
+            def make_key(args, kwargs):
+                return None, bind(args, kwargs)
 
-        # collect args and kwargs names and their default values
-        args_name = args_spec[0]
-        kwargs_default_values = list(args_spec[3]) if args_spec[3] else []
+        if self.shards > 1:
+            shards = self.shards
+            make_unsharded_key = make_key
 
-        args_dict = dict(zip(args_name, list(args) + kwargs_default_values))
+            def make_key(args, kwargs):
+                _, key = make_unsharded_key(args, kwargs)
+                return hash(key) % shards, key
 
-        # ovewrite default kwargs values with passed kwargs values
-        return {**args_dict, **kwargs}
+        return make_key
 
     def _invalidate_by_lifetime(self):
-        """Invalidate all records above lifetime threshold."""
-        if self.group_key:
-            for group in self.cache:
-                for key in self._get_invalid_keys(self.cache[group]):
-                    del self.cache[group][key]
-        else:
-            for key in self._get_invalid_keys(self.cache):
-                del self.cache[key]
+        """Invalidate records above lifetime threshold.
+
+        Records are popped from expiration heap in order of their expiration time,
+        so only expired records are visited and at most `invalidation_batch`
+        of them per call. Heap entries of replaced or evicted records are skipped.
+
+        """
+        now = monotonic()
+
+        # check without lock whether anything expired, which is the common case
+        try:
+            if self._expirations[0][0] >= now:
+                return
+        except IndexError:
+            return
+
+        for _ in range(self.invalidation_batch):
+            with self._lock:
+                if not self._expirations or self._expirations[0][0] >= now:
+                    break
+
+                _, _, group, key = heappop(self._expirations)
+
+            cache = self.cache.get(group, {}) if self.grouped else self.cache
+
+            with self._get_subcache_lock(group):
+                record = cache.get(key)
+
+                if record is not None and self._is_expired(record, now, stale=True):
+                    self._remove(group, key, cache)
+                    self._count("expirations")
+
+    def _is_expired(self, record, now=None, stale=False):
+        """Check whether record is above lifetime threshold.
 
-    def _get_invalid_keys(self, cache):
-        """Collect keys to records which should be invalidated.
+        Args:
+            record (dict): cached record
+            now (float, optional): current monotonic time
+            stale (bool, optional): extend lifetime threshold by stale window
+
+        Returns:
+            bool: record should be replaced or, with stale window, invalidated
+
+        """
+        if not self.max_lifetime:
+            return False
+
+        now = monotonic() if now is None else now
+        threshold = self.max_lifetime + self.stale_ttl if stale else self.max_lifetime
+
+        return now - record["fetch_time"] > threshold
+
+    def _is_servable_stale(self, record):
+        """Check whether expired record can be served while being refreshed.
+
+        Args:
+            record (dict): cached record or None
+
+        Returns:
+            bool: record is within stale window
+
+        """
+        return bool(record is not None and self.stale_ttl and not self._is_expired(record, stale=True))
+
+    def _store(self, group, key, cache, data, fetch_time=None):
+        """Store record into cache and index its expiration time.
 
         Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
             cache (OrderedDict): records stored in cache or subcache
+            data: value returned by decorated function
+            fetch_time (float, optional): monotonic time of fetching data, defaults to now
 
         Returns:
-            list: keys of records which should be invalidated
+            dict: stored record
+
         """
-        invalid_keys = []
+        if self.frozen:
+            data = freeze(data)
+
+        fetch_time = monotonic() if fetch_time is None else fetch_time
+        record = {
+            "data": data,
+            "fetch_time": fetch_time,
+            "size": self.sizer(data) if self.max_bytes else 0,
+            "version": content_version(data)
+        }
+
+        # record which can not fit at all is returned without caching
+        if self._max_bytes and record["size"] > self._max_bytes:
+            return record
+
+        if self.negatives:
+            with self._negative_lock:
+                self.negatives.pop((group, key), None)
+
+        with self._get_subcache_lock(group):
+            if key in cache:
+                self._remove(group, key, cache)
+
+            # when limits of cached records are reached, pop the least recently used ones
+            while cache and (self._max_size and len(cache) >= self._max_size or
+                             self._max_bytes and self.sizes.get(group, 0) + record["size"] > self._max_bytes):
+                self._remove(group, next(iter(cache)), cache)
+                self._count("evictions")
+
+            cache[key] = record
+            self.sizes[group] = self.sizes.get(group, 0) + record["size"]
+
+        if self.max_lifetime:
+            expiration_time = fetch_time + self.max_lifetime + self.stale_ttl
+
+            with self._lock:
+                heappush(self._expirations, (expiration_time, next(self._sequence), group, key))
+
+        return record
+
+    def _remove(self, group, key, cache):
+        """Remove record from cache and account its size.
+
+        Note: Lock of subcache must be held by caller.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+
+        """
+        record = cache.pop(key)
+        self.sizes[group] -= record["size"]
+
+    def _store_negative(self, group, key, cache, data=None, error=None):
+        """Store negative result and remove valid record it replaces.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+            data (optional): negative value returned by decorated function
+            error (Exception, optional): exception raised by decorated function
+
+        Returns:
+            dict: stored negative record
+
+        """
+        if error is not None:
+            # traceback would keep frames of the failed call alive
+            error = copy(error).with_traceback(None)
+
+        if self.frozen:
+            data = freeze(data)
+
+        record = {
+            "data": data,
+            "error": error,
+            "fetch_time": monotonic(),
+            "size": 0,
+            "version": content_version(data if error is None else error),
+            "negative": True
+        }
+
+        with self._get_subcache_lock(group):
+            if key in cache:
+                self._remove(group, key, cache)
+
+        with self._negative_lock:
+            self.negatives.pop((group, key), None)
+
+            while len(self.negatives) >= self.negative_max_size:
+                self.negatives.popitem(last=False)
+                self._count("negative_evictions")
+
+            self.negatives[(group, key)] = record
+
+        return record
+
+    def _get_negative(self, group, key):
+        """Get negative result if it is present and within its lifetime.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+
+        Returns:
+            dict: negative record with value or None
+
+        Raises:
+            Exception: copy of cached exception of decorated function
+
+        """
+        # check without lock whether any negative result is stored, which is the common case
+        if not self.negatives:
+            return None
+
+        with self._negative_lock:
+            record = self.negatives.get((group, key))
+
+            if record is None:
+                return None
+
+            if monotonic() - record["fetch_time"] > self.negative_ttl:
+                del self.negatives[(group, key)]
+                return None
+
+            self.negatives.move_to_end((group, key))
+
+        self._count("negative_hits")
+
+        if record["error"] is not None:
+            raise copy(record["error"])
+
+        return record
+
+    def dump(self):
+        """Export cached records with wall-clock time of their fetching.
+
+        Returns:
+            list: (group, key, data, fetch time) tuples in LRU order, fetch time is UNIX timestamp
+
+        """
+        # shift from monotonic to wall-clock time
+        offset = time() - monotonic()
+        subcaches = list(self.cache.items()) if self.grouped else [(None, self.cache)]
+        records = []
+
+        for group, cache in subcaches:
+            with self._get_subcache_lock(group):
+                records.extend((group, key, record["data"], record["fetch_time"] + offset)
+                               for key, record in cache.items())
+
+        return records
+
+    def load(self, records):
+        """Import dumped records which are still within their lifetime or stale window.
+
+        Args:
+            records (list): (group, key, data, fetch time) tuples, fetch time is UNIX timestamp
+
+        Returns:
+            int: number of loaded records
+
+        """
+        offset = time() - monotonic()
+        loaded = 0
+
+        for group, key, data, fetch_time in records:
+            record = {"fetch_time": fetch_time - offset}
+
+            if self._is_expired(record, stale=True):
+                continue
+
+            # hashes of strings differ between processes, so shard is assigned again
+            if self.shards > 1:
+                group = hash(key) % self.shards
+
+            self._store(group, key, self._get_subcache(group), data, fetch_time=record["fetch_time"])
+            loaded += 1
+
+        return loaded
+
+    def _get_subcache(self, group):
+        """Get cache or subcache for given group, create subcache if needed.
+
+        Args:
+            group: subcache key or None
+
+        Returns:
+            OrderedDict: records stored in cache or subcache
+
+        """
+        if not self.grouped:
+            return self.cache
+
+        subcache = self.cache.get(group)
 
-        for key, cached in cache.items():
-            if datetime.now() - cached["fetch_time"] > self.max_lifetime:
-                invalid_keys.append(key)
+        if subcache is None:
+            with self._lock:
+                subcache = self.cache.get(group)
 
-        return invalid_keys
+                if subcache is None:
+                    self._subcache_locks[group] = RLock()
+                    subcache = self.cache[group] = OrderedDict()
 
-    def _add_or_replace(self, key, cache, func, *args, **kwargs):
+        return subcache
+
+    def _get_subcache_lock(self, group):
+        """Get lock guarding modifications of cache or subcache.
+
+        Args:
+            group: subcache key or None
+
+        Returns:
+            threading.RLock: lock of cache or subcache
+
+        """
+        subcache_lock = self._subcache_locks.get(group)
+
+        if subcache_lock is None:
+            with self._lock:
+                subcache_lock = self._subcache_locks.setdefault(group, RLock())
+
+        return subcache_lock
+
+    def _count(self, name):
+        """Increment counter of statistics.
+
+        Args:
+            name (str): name of counter
+
+        """
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def collect_stats(self):
+        """Copy statistics consistently, while they are updated by other threads.
+
+        Returns:
+            dict: counts by name
+
+        """
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _count_hit(self, record):
+        """Count hit of record and first hit of prefetched record.
+
+        Args:
+            record (dict): cached record
+
+        """
+        with self._stats_lock:
+            self.stats["hits"] += 1
+
+            if record.get("prefetched"):
+                record["prefetched"] = False
+                self.stats["prefetch_hits"] += 1
+
+    def _mark_prefetched(self, record):
+        """Mark record loaded ahead of use.
+
+        Args:
+            record (dict): cached record
+
+        """
+        record["prefetched"] = True
+        self._count("prefetches")
+
+    def _get_valid(self, key, cache):
+        """Get record from cache if it is present and within its lifetime.
+
+        Args:
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+
+        Returns:
+            dict: cached record or None
+
+        """
+        record = cache.get(key)
+
+        if record is None or self._is_expired(record):
+            return None
+
+        return record
+
+    def _touch(self, group, key, cache):
+        """Mark record as most recently used.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+
+        """
+        with self._get_subcache_lock(group):
+            try:
+                cache.move_to_end(key)
+            except KeyError:
+                # record was removed meanwhile
+                pass
+
+    @contextmanager
+    def _key_lock(self, group, key):
+        """Hold lock of single record so only one caller fetches it.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+
+        """
+        with self._lock:
+            key_lock = self._key_locks.get((group, key))
+
+            if key_lock is None:
+                key_lock = self._key_locks[(group, key)] = [Lock(), 0]
+
+            key_lock[1] += 1
+
+        try:
+            with key_lock[0]:
+                yield
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+
+                if not key_lock[1]:
+                    del self._key_locks[(group, key)]
+
+    def _add_or_replace(self, group, key, cache, func, *args, **kwargs):
         """Add records to cache or replace invalid records.
 
         Args:
-            key (str): key to record in cache
+            group: subcache key or None
+            key (tuple): key to record in cache
             cache (OrderedDict): records stored in cache or subcache
             func (function): decorated function
             *args: arguments of decorated function
             **kwargs: keyword arguments of decorated function
 
         Returns:
-            OrderedDict: updated cache
+            dict: valid record
 
         """
-        if key in cache:
-            if self.max_lifetime:
-                add_or_replace = datetime.now() - cache[key]["fetch_time"] > self.max_lifetime
-            else:
-                add_or_replace = False
-            pop_allowed = False
-        else:
-            add_or_replace = True
-            pop_allowed = True
+        with self._key_lock(group, key):
+            # record could be fetched by another caller or process while waiting for lock
+            record = self._get_valid(key, cache) or self._get_negative(group, key)
+
+            if record is None:
+                record = self._load_shared(group, key, cache)
+
+            if record is None:
+                with self._shared_lease(key):
+                    record = self._load_shared(group, key, cache)
+
+                    if record is None:
+                        record = self._fetch(group, key, cache, func, *args, **kwargs)
+
+        return record
+
+    def _fetch(self, group, key, cache, func, *args, **kwargs):
+        """Call decorated function and store its value.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+            func (function): decorated function
+            *args: arguments of decorated function
+            **kwargs: keyword arguments of decorated function
+
+        Returns:
+            dict: new record or stale record when decorated function failed
+
+        """
+        try:
+            data = func(*args, **kwargs)
+        except Exception as error:
+            record = cache.get(key)
+
+            if self.serve_stale_on_error and record is not None:
+                return record
+
+            if isinstance(error, self.negative_exceptions):
+                self._store_negative(group, key, cache, error=error)
+
+            raise
+
+        if self.is_negative is not None and self.is_negative(data):
+            return self._store_negative(group, key, cache, data=data)
+
+        # cache new records
+        record = self._store(group, key, cache, data)
+        self._save_shared(key, record)
+
+        return record
+
+    def _load_shared(self, group, key, cache):
+        """Load valid record from shared backend into cache.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+
+        Returns:
+            dict: stored record or None
+
+        """
+        if self.backend is None:
+            return None
+
+        shared = self.backend.get(self.namespace, key)
 
-        # record is not cached yet or is beyond its lifetime
-        if add_or_replace:
-            # when limit of cached records is reached, pop the oldest one
-            if self.max_size and pop_allowed and len(cache) == self.max_size:
-                _, _ = cache.popitem(last=False)
+        if shared is None:
+            return None
 
-            # cache new records
-            cache[key] = {
-                "data": func(*args, **kwargs),
-                "fetch_time": datetime.now()
-            }
+        # shift from wall-clock to monotonic time
+        data, fetch_time = shared
+        fetch_time -= time() - monotonic()
 
-        return cache
+        if self._is_expired({"fetch_time": fetch_time}):
+            return None
+
+        return self._store(group, key, cache, data, fetch_time=fetch_time)
+
+    def _save_shared(self, key, record):
+        """Save record into shared backend.
+
+        Args:
+            key (tuple): key to record in cache
+            record (dict): cached record
+
+        """
+        if self.backend is None:
+            return
+
+        fetch_time = record["fetch_time"] + time() - monotonic()
+        expire_time = fetch_time + self.max_lifetime + self.stale_ttl if self.max_lifetime else None
+
+        self.backend.set(self.namespace, key, record["data"], fetch_time, expire_time)
+
+    @contextmanager
+    def _shared_lease(self, key):
+        """Hold lease of record in shared backend so only one process fetches it.
+
+        Args:
+            key (tuple): key to record in cache
+
+        """
+        token = self.backend.acquire(self.namespace, key) if self.backend is not None else None
+
+        try:
+            yield
+        finally:
+            if token is not None:
+                self.backend.release(self.namespace, key, token)
+
+    def _refresh(self, group, key, cache, func, *args, **kwargs):
+        """Replace stale record in background unless it is already being refreshed.
+
+        Note: Errors of background refresh are not raised, the record
+        is refreshed again on next call within stale window.
+
+        Args:
+            group: subcache key or None
+            key (tuple): key to record in cache
+            cache (OrderedDict): records stored in cache or subcache
+            func (function): decorated function
+            *args: arguments of decorated function
+            **kwargs: keyword arguments of decorated function
+
+        """
+        with self._lock:
+            if (group, key) in self._key_locks:
+                return
+
+            # register lock so concurrent calls do not schedule another refresh
+            self._key_locks[(group, key)] = [Lock(), 1]
+
+        def refresh():
+            try:
+                self._add_or_replace(group, key, cache, func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._key_locks[(group, key)][1] -= 1
+
+                    if not self._key_locks[(group, key)][1]:
+                        del self._key_locks[(group, key)]
+
+        self.refresh_executor.submit(refresh)
 
     def __call__(self, func):
         """Wrap function with cache decorator on call.
@@ -138,8 +926,10 @@ class Cache(object):
             cached value
 
         """
+        make_key = self._compile_key(func)
+        self.namespace = "{}.{}".format(func.__module__, func.__qualname__)
 
-        def wrapper(*args, **kwargs):
+        def get_record(*args, **kwargs):
             """Retrieve record from cache.
 
             Args:
@@ -147,34 +937,82 @@ class Cache(object):
                 **kwargs: keyword arguments of decorated function
 
             Returns:
-                cached value
+                dict: cached record
 
             """
-            # build key from function args and kwargs key-value pairs
-            args_kwargs_dict = self._get_args_kwargs_dict(func, *args, **kwargs)
-            key = dumps(args_kwargs_dict)
-
-            # add record to cache and/or retrieve it
-            if self.group_key:
-                # use selected argument's value as key
-                group = args_kwargs_dict[self.group_key]
-
-                # add subcache if needed
-                if group not in self.cache:
-                    self.cache[group] = OrderedDict()
-
-                # cache into subcache and retrieve result
-                self.cache[group] = self._add_or_replace(key, self.cache[group], func, *args, **kwargs)
-                cached_result = self.cache[group][key]
-            else:
-                # cache and retrieve result
-                self.cache = self._add_or_replace(key, self.cache, func, *args, **kwargs)
-                cached_result = self.cache[key]
+            # build group and key from function args and kwargs values
+            group, key = make_key(args, kwargs)
+            cache = self._get_subcache(group)
+
+            # retrieve record from cache, serve it stale or add it
+            record = self._get_valid(key, cache)
 
-            # invalidate all records above lifetime threshold
+            if record is not None:
+                self._touch(group, key, cache)
+                self._count_hit(record)
+            else:
+                stale_record = cache.get(key)
+                negative_record = self._get_negative(group, key)
+
+                if negative_record is not None:
+                    record = negative_record
+                elif self._is_servable_stale(stale_record):
+                    self._refresh(group, key, cache, func, *args, **kwargs)
+                    record = stale_record
+                    self._count("stale_hits")
+                else:
+                    record = self._add_or_replace(group, key, cache, func, *args, **kwargs)
+                    self._count("misses")
+
+            # invalidate records above lifetime threshold
             if self.max_lifetime:
                 self._invalidate_by_lifetime()
 
-            return cached_result["data"]
+            return record
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_record(*args, **kwargs)["data"]
+
+        def versioned(*args, **kwargs):
+            """Retrieve cached value together with version of its record.
+
+            Returns:
+                tuple: cached value and its version
+
+            """
+            record = get_record(*args, **kwargs)
+            return record["data"], record["version"]
+
+        def conditional(*args, **kwargs):
+            """Retrieve cached value together with version and remaining lifetime of its record.
+
+            Returns:
+                tuple: cached value, its version and seconds until it expires
+
+            """
+            record = get_record(*args, **kwargs)
+            return record["data"], record["version"], self.remaining_lifetime(record)
+
+        def prefetch(*args, **kwargs):
+            """Load record into cache unless it is cached already.
+
+            Returns:
+                cached value
+
+            """
+            group, key = make_key(args, kwargs)
+            cache = self._get_subcache(group)
+            record = self._get_valid(key, cache)
+
+            if record is None:
+                record = self._add_or_replace(group, key, cache, func, *args, **kwargs)
+                self._mark_prefetched(record)
+
+            return record["data"]
 
+        wrapper.cache = self
+        wrapper.versioned = versioned
+        wrapper.conditional = conditional
+        wrapper.prefetch = prefetch
         return wrapper
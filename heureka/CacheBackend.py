@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+
+
+class CacheBackend(ABC):
+    """Interface of storage shared by caches of multiple processes.
+
+    Cache keeps its records in process memory and uses shared backend
+    on misses, i.e. record fetched by any process is loaded from backend
+    instead of calling decorated function again. Leases of keys make sure
+    only one process calls decorated function for the same record, lease
+    is released only by its owner, even when it expired and was acquired
+    by another process meanwhile.
+
+    Records are identified by namespace of decorated function and record key,
+    times are UNIX timestamps, so they are comparable between processes.
+
+    """
+
+    @abstractmethod
+    def get(self, namespace, key):
+        """Get stored record.
+
+        Args:
+            namespace (str): name of decorated function
+            key (tuple): key to record in cache
+
+        Returns:
+            tuple: data and fetch time or None when record is missing or expired
+
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, namespace, key, data, fetch_time, expire_time=None):
+        """Store record.
+
+        Args:
+            namespace (str): name of decorated function
+            key (tuple): key to record in cache
+            data: value returned by decorated function
+            fetch_time (float): time of fetching data
+            expire_time (float, optional): time after which record is not served at all
+
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def acquire(self, namespace, key):
+        """Acquire lease of record, wait while it is held by another process.
+
+        Args:
+            namespace (str): name of decorated function
+            key (tuple): key to record in cache
+
+        Returns:
+            str: token of lease owner, None when waiting timed out
+
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, namespace, key, token):
+        """Release acquired lease of record unless it is owned by another process already.
+
+        Args:
+            namespace (str): name of decorated function
+            key (tuple): key to record in cache
+            token (str): token of lease owner returned by `acquire`
+
+        """
+        raise NotImplementedError
@@ -0,0 +1,206 @@
+from time import monotonic
+from threading import Lock
+from LatencyWindow import LatencyWindow
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half-open", "open"
+
+# admissions of allowed requests
+REQUEST, PROBE = "request", "probe"
+
+
+class Circuit(object):
+    """State of requests of one endpoint pattern."""
+
+    __slots__ = ("state", "failures", "opened_at", "probing", "latencies", "timeout")
+
+    def __init__(self, latencies, timeout):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.latencies = latencies
+        self.timeout = timeout
+
+
+class CircuitBreaker(object):
+    """Circuit breaker with timeouts adapted to observed latencies, per endpoint pattern.
+
+    Circuit opens after number of consecutive failures, then requests
+    fail fast until recovery time passes. After that single probe request
+    is allowed (half-open), its success closes the circuit and its failure
+    opens it again. Results of requests admitted before the circuit opened
+    do not change state of open or half-open circuit.
+
+    Timeout of request is percentile of latencies of recent successful requests
+    multiplied by safety factor, bounded by minimum and maximum timeout.
+    Timed out request doubles the timeout and probe request gets maximum
+    timeout, so circuit recovers even when endpoint became slower.
+
+    Example:
+        >>> from CircuitBreaker import CircuitBreaker
+        >>> circuit_breaker = CircuitBreaker(failure_threshold=5, recovery_time=10)
+        >>> admission = circuit_breaker.allow("/product/{}")
+        >>> if admission:
+        ...     timeout = circuit_breaker.timeout("/product/{}", admission)
+        ...     circuit_breaker.record("/product/{}", admission, True, 0.02)
+
+    """
+
+    def __init__(self, failure_threshold=5, recovery_time=10, min_timeout=0.5, max_timeout=10, timeout_multiplier=3,
+                 percentile=99, window=100, min_samples=20):
+        """Initialize limits of circuits.
+
+        Args:
+            failure_threshold (int, optional): number of consecutive failures opening circuit
+            recovery_time (float, optional): seconds of failing fast before probe request
+            min_timeout (float, optional): minimum timeout of request in seconds
+            max_timeout (float, optional): maximum timeout of request in seconds, used until enough latencies
+                are observed
+            timeout_multiplier (float, optional): safety factor of latency percentile
+            percentile (float, optional): percentile of latencies in range 0-100
+            window (int, optional): number of recent latencies of every pattern
+            min_samples (int, optional): number of latencies needed to adapt timeout
+
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+
+        self.circuits = {}
+        self._lock = Lock()
+
+    def _get_circuit(self, key):
+        """Get circuit of endpoint pattern, create it if needed.
+
+        Args:
+            key (str): endpoint pattern
+
+        Returns:
+            Circuit: state of requests of the pattern
+
+        """
+        circuit = self.circuits.get(key)
+
+        if circuit is None:
+            with self._lock:
+                latencies = LatencyWindow(self.window, self.percentile, self.min_samples)
+                circuit = self.circuits.setdefault(key, Circuit(latencies, self.max_timeout))
+
+        return circuit
+
+    def allow(self, key):
+        """Check whether request can be sent, open circuit lets single probe through after recovery time.
+
+        Note: Every allowed request must be recorded with its admission.
+
+        Args:
+            key (str): endpoint pattern
+
+        Returns:
+            str: REQUEST or PROBE when request can be sent, None otherwise
+
+        """
+        circuit = self._get_circuit(key)
+
+        if circuit.state == CLOSED:
+            return REQUEST
+
+        with self._lock:
+            if circuit.state == OPEN and monotonic() - circuit.opened_at >= self.recovery_time:
+                circuit.state = HALF_OPEN
+
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return PROBE
+
+            return REQUEST if circuit.state == CLOSED else None
+
+    def timeout(self, key, admission=REQUEST):
+        """Get timeout of request adapted to recent latencies, maximum timeout for probe request.
+
+        Args:
+            key (str): endpoint pattern
+            admission (str, optional): admission of request returned by `allow`
+
+        Returns:
+            float: timeout in seconds
+
+        """
+        if admission == PROBE:
+            return self.max_timeout
+
+        return self._get_circuit(key).timeout
+
+    def record(self, key, admission, succeeded, latency=None, timed_out=False):
+        """Record result of allowed request.
+
+        Args:
+            key (str): endpoint pattern
+            admission (str): admission of request returned by `allow`
+            succeeded (bool): request succeeded, None when it was cancelled
+            latency (float, optional): latency of successful request in seconds
+            timed_out (bool, optional): failed request timed out
+
+        """
+        circuit = self._get_circuit(key)
+
+        probe = admission == PROBE
+
+        with self._lock:
+            if probe:
+                circuit.probing = False
+
+            if succeeded is None:
+                return
+
+            if succeeded and latency is not None:
+                self._observe(circuit, latency)
+
+            # latencies of timed out requests are unknown, endpoint may have become slower
+            if not succeeded and timed_out:
+                circuit.timeout = min(self.max_timeout, circuit.timeout * 2)
+
+            # only probe decides about circuit which is not closed,
+            # requests admitted before it opened may still finish
+            if not probe and circuit.state != CLOSED:
+                return
+
+            if succeeded:
+                circuit.state = CLOSED
+                circuit.failures = 0
+            else:
+                circuit.failures += 1
+
+                if probe or circuit.failures >= self.failure_threshold:
+                    circuit.state = OPEN
+                    circuit.opened_at = monotonic()
+
+    def _observe(self, circuit, latency):
+        """Add latency of successful request and periodically adapt timeout.
+
+        Note: Lock must be held by caller.
+
+        Args:
+            circuit (Circuit): state of requests of endpoint pattern
+            latency (float): latency in seconds
+
+        """
+        percentile = circuit.latencies.observe(latency)
+
+        if percentile is not None:
+            circuit.timeout = min(self.max_timeout, max(self.min_timeout, percentile * self.timeout_multiplier))
+
+    def states(self):
+        """Get current states and timeouts of all circuits.
+
+        Returns:
+            dict: endpoint pattern mapped to tuple of state and timeout
+
+        """
+        with self._lock:
+            return {key: (circuit.state, circuit.timeout) for key, circuit in self.circuits.items()}
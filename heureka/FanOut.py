@@ -0,0 +1,127 @@
+import asyncio
+from urllib.parse import urlsplit
+
+
+class FanOut(object):
+    """Executor of concurrent API requests with bounded concurrency and deadline.
+
+    Requests are limited in total and per host, so large pages do not flood
+    the API. Results of concurrently run awaitables are collected until deadline,
+    unfinished ones keep running in background, e.g. to fill the cache,
+    and are replaced by default value.
+
+    Semaphores are created lazily in the running event loop.
+
+    Example:
+        >>> from FanOut import FanOut
+        >>> fan_out = FanOut(max_concurrency=50, max_concurrency_per_host=20)
+        >>> async with fan_out.limit("http://localhost:5000"):
+        ...     await request()
+        >>> results = await fan_out.gather([request(1), request(2)], timeout=2)
+
+    """
+
+    def __init__(self, max_concurrency=50, max_concurrency_per_host=20):
+        """Initialize concurrency limits.
+
+        Args:
+            max_concurrency (int, optional): maximum number of concurrent requests
+            max_concurrency_per_host (int, optional): maximum number of concurrent requests to one host
+
+        """
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_host = max_concurrency_per_host
+
+        self._semaphore = None
+        self._host_semaphores = {}
+        self._loop = None
+
+    def _get_semaphores(self, url):
+        """Get global semaphore and semaphore of url host, create them when missing or bound to another loop.
+
+        Args:
+            url (str): url of request
+
+        Returns:
+            tuple: global and host semaphore
+
+        """
+        loop = asyncio.get_event_loop()
+
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._host_semaphores = {}
+            self._loop = loop
+
+        host = urlsplit(url).netloc
+        host_semaphore = self._host_semaphores.get(host)
+
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+
+        return self._semaphore, host_semaphore
+
+    def limit(self, url):
+        """Limit concurrency of request, use as `async with fan_out.limit(url)`.
+
+        Args:
+            url (str): url of request
+
+        Returns:
+            LimitContext: asynchronous context manager holding both semaphores
+
+        """
+        return LimitContext(*self._get_semaphores(url))
+
+    async def gather(self, awaitables, timeout=None, default=None):
+        """Run awaitables concurrently and collect results finished before timeout.
+
+        Note: Exceptions of awaitables finished before timeout are raised.
+
+        Args:
+            awaitables (list): coroutines or futures
+            timeout (float, optional): maximum time to wait in seconds, None waits for all
+            default (optional): result of unfinished awaitables
+
+        Returns:
+            list: results in order of awaitables
+
+        """
+        tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+
+        if not tasks:
+            return []
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+
+        # late tasks keep running, their errors must be retrieved when they finish
+        for task in pending:
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        return [task.result() if task in done else default for task in tasks]
+
+
+class LimitContext(object):
+    """Asynchronous context manager acquiring host and global semaphore.
+
+    Host semaphore is acquired first, so requests waiting for busy host
+    do not hold global capacity.
+
+    """
+
+    def __init__(self, semaphore, host_semaphore):
+        self.semaphore = semaphore
+        self.host_semaphore = host_semaphore
+
+    async def __aenter__(self):
+        await self.host_semaphore.acquire()
+
+        try:
+            await self.semaphore.acquire()
+        except BaseException:
+            self.host_semaphore.release()
+            raise
+
+    async def __aexit__(self, *args):
+        self.host_semaphore.release()
+        self.semaphore.release()
@@ -0,0 +1,147 @@
+import asyncio
+from time import perf_counter
+from threading import Lock
+from collections import Counter
+from LatencyWindow import LatencyWindow
+
+
+class Hedger(object):
+    """Hedging of slow asynchronous requests, per endpoint pattern.
+
+    When request does not finish within percentile of recent latencies
+    of its endpoint pattern, duplicate request is sent and result of whichever
+    finishes first is used, the other one is cancelled. Number of duplicates
+    is limited by budget, every request adds its share of token and every
+    duplicate takes whole token, so extra load stays within the budget.
+
+    Example:
+        >>> from Hedger import Hedger
+        >>> hedger = Hedger(percentile=95, budget=0.05)
+        >>> status, body = await hedger.run("/offers/{}/{}/{}", lambda: client.get("/offers/1/0/100"))
+
+    """
+
+    def __init__(self, percentile=95, budget=0.05, max_tokens=10, window=100, min_samples=20, min_delay=0.001):
+        """Initialize hedging policy.
+
+        Args:
+            percentile (float, optional): percentile of latencies after which duplicate is sent, in range 0-100
+            budget (float, optional): maximum ratio of duplicate requests to all requests
+            max_tokens (float, optional): maximum number of duplicates sent in a burst
+            window (int, optional): number of recent latencies of every pattern
+            min_samples (int, optional): number of latencies needed before requests are hedged
+            min_delay (float, optional): minimum delay of duplicate in seconds
+
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.max_tokens = max_tokens
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+
+        self.tokens = 0.0
+        self.latencies = {}
+        self.delays = {}
+        self.stats = Counter()
+
+        self._lock = Lock()
+
+    def delay(self, key):
+        """Get delay after which request of endpoint pattern is hedged.
+
+        Args:
+            key (str): endpoint pattern
+
+        Returns:
+            float: delay in seconds or None when not enough latencies are observed
+
+        """
+        return self.delays.get(key)
+
+    def observe(self, key, latency):
+        """Add latency of successful request and periodically update delay of duplicates.
+
+        Args:
+            key (str): endpoint pattern
+            latency (float): latency in seconds
+
+        """
+        latencies = self.latencies.get(key)
+
+        if latencies is None:
+            window = LatencyWindow(self.window, self.percentile, self.min_samples)
+
+            with self._lock:
+                latencies = self.latencies.setdefault(key, window)
+
+        percentile = latencies.observe(latency)
+
+        if percentile is not None:
+            self.delays[key] = max(self.min_delay, percentile)
+
+    def _take_token(self):
+        """Take token of duplicate request if budget allows it.
+
+        Returns:
+            bool: duplicate can be sent
+
+        """
+        with self._lock:
+            if self.tokens < 1:
+                return False
+
+            self.tokens -= 1
+            return True
+
+    async def run(self, key, request):
+        """Run request and hedge it by duplicate when it is slow.
+
+        Note: Exception is raised only when all sent requests fail.
+
+        Args:
+            key (str): endpoint pattern
+            request (function): creates coroutine of the request, called once per sent request
+
+        Returns:
+            result of request finished first
+
+        """
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.budget)
+
+        self.stats["requests"] += 1
+        start = perf_counter()
+        delay = self.delay(key)
+        tasks = [asyncio.ensure_future(request())]
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+
+                if not done and self._take_token():
+                    tasks.append(asyncio.ensure_future(request()))
+                    self.stats["hedges"] += 1
+
+            pending = set(tasks)
+
+            # first successful result wins, failure is raised only by the last request
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+
+                if succeeded or not pending:
+                    break
+
+            winner = succeeded[0] if succeeded else next(iter(done))
+            result = winner.result()
+
+            if winner is not tasks[0]:
+                self.stats["hedge_wins"] += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        self.observe(key, perf_counter() - start)
+
+        return result
@@ -0,0 +1,145 @@
+from threading import Lock, BoundedSemaphore
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from urllib.parse import urlsplit
+
+
+class HttpClient(object):
+    """Thread-safe HTTP client keeping pool of persistent connections to one host.
+
+    Connections are reused for subsequent requests (keep-alive), number
+    of simultaneously open connections is limited and every request
+    has separate connect and read timeout.
+
+    Example:
+        >>> from HttpClient import HttpClient
+        >>> client = HttpClient("http://localhost:5000", connect_timeout=1, read_timeout=5)
+        >>> status, body = client.get("/categories")
+
+    """
+
+    def __init__(self, base_url, connect_timeout=None, read_timeout=None, max_connections=10):
+        """Initialize client and its connection pool.
+
+        Args:
+            base_url (str): scheme, host and port of all requests
+            connect_timeout (float, optional): timeout of establishing connection in seconds
+            read_timeout (float, optional): timeout of waiting for response in seconds
+            max_connections (int, optional): maximum number of open connections
+
+        """
+        url = urlsplit(base_url)
+
+        self.base_url = base_url
+        self.connection_class = HTTPSConnection if url.scheme == "https" else HTTPConnection
+        self.host = url.hostname
+        self.port = url.port
+        self.path_prefix = url.path.rstrip("/")
+
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # idle connections are reused in LIFO order, so the warmest one is taken first
+        self._idle = []
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_connections)
+
+    def _acquire(self):
+        """Take idle connection from pool or open a new one.
+
+        Returns:
+            tuple: connection and flag whether it was reused
+
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+
+        return self._connect(), False
+
+    def _connect(self):
+        """Open a new connection.
+
+        Returns:
+            http.client.HTTPConnection: connected connection
+
+        """
+        connection = self.connection_class(self.host, self.port, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+
+        return connection
+
+    def _release(self, connection):
+        """Return connection to pool.
+
+        Args:
+            connection (http.client.HTTPConnection): connection with fully read response
+
+        """
+        with self._lock:
+            self._idle.append(connection)
+
+    def get(self, query, read_timeout=None):
+        """Send GET request.
+
+        Note: Query must start with '/'.
+
+        Args:
+            query (str): path and query string of request
+            read_timeout (float, optional): timeout of waiting for response in seconds, overrides client's one
+
+        Returns:
+            tuple: status code and body of response
+
+        """
+        with self._slots:
+            connection, reused = self._acquire()
+
+            try:
+                try:
+                    response = self._request(connection, query, read_timeout)
+                except (RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # server closed idle keep-alive connection, retry once on a new one
+                    if not reused:
+                        raise
+
+                    connection.close()
+                    connection = self._connect()
+                    response = self._request(connection, query, read_timeout)
+
+                body = response.read()
+            except Exception:
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+
+            return response.status, body
+
+    def _request(self, connection, query, read_timeout=None):
+        """Send request over connection and wait for response headers.
+
+        Args:
+            connection (http.client.HTTPConnection): open connection
+            query (str): path and query string of request
+            read_timeout (float, optional): timeout of waiting for response in seconds, overrides client's one
+
+        Returns:
+            http.client.HTTPResponse: response
+
+        """
+        # pooled connection may have been used with another timeout
+        connection.sock.settimeout(self.read_timeout if read_timeout is None else read_timeout)
+        connection.request("GET", self.path_prefix + query, headers={"Connection": "keep-alive"})
+        return connection.getresponse()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for connection in idle:
+            connection.close()
@@ -0,0 +1,57 @@
+from threading import Lock
+from collections import deque
+
+
+class LatencyWindow(object):
+    """Recent latencies of requests with periodically recomputed percentile.
+
+    Percentile is known once window has minimum number of samples
+    and it is recomputed every `update_interval` observations, sorting
+    the window is cheap, but needless on every request.
+
+    Example:
+        >>> from LatencyWindow import LatencyWindow
+        >>> window = LatencyWindow(size=100, percentile=95)
+        >>> percentile = window.observe(0.02)
+
+    """
+
+    def __init__(self, size=100, percentile=99, min_samples=20, update_interval=10):
+        """Initialize empty window.
+
+        Args:
+            size (int, optional): number of recent latencies
+            percentile (float, optional): percentile of latencies in range 0-100
+            min_samples (int, optional): number of latencies needed before percentile is computed
+            update_interval (int, optional): number of observations between recomputations of percentile
+
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.update_interval = update_interval
+
+        self.latencies = deque(maxlen=size)
+        self.observations = 0
+
+        self._lock = Lock()
+
+    def observe(self, latency):
+        """Add latency of request.
+
+        Args:
+            latency (float): latency in seconds
+
+        Returns:
+            float: recomputed percentile of latencies or None when it is not recomputed
+
+        """
+        with self._lock:
+            self.latencies.append(latency)
+            self.observations += 1
+
+            if len(self.latencies) < self.min_samples or self.observations % self.update_interval:
+                return None
+
+            latencies = sorted(self.latencies)
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))]
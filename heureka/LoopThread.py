@@ -0,0 +1,70 @@
+import asyncio
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LoopThread(object):
+    """Asyncio event loop running forever in a background daemon thread.
+
+    Coroutines can be submitted from any thread, so many requests handled
+    by threaded server await their I/O concurrently on one shared loop.
+
+    Example:
+        >>> from LoopThread import LoopThread
+        >>> loop_thread = LoopThread()
+        >>> result = loop_thread.run(some_coroutine())
+
+    """
+
+    def __init__(self, name="event-loop", max_workers=None):
+        """Create event loop and start its thread.
+
+        Args:
+            name (str, optional): name of the thread
+            max_workers (int, optional): number of threads of default executor of the loop,
+                which runs blocking calls
+
+        """
+        self.loop = asyncio.new_event_loop()
+
+        if max_workers:
+            self.loop.set_default_executor(ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name))
+        self.thread = Thread(target=self._run_forever, name=name, daemon=True)
+        self.thread.start()
+
+    def _run_forever(self):
+        """Run event loop in current thread until stopped."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine, timeout=None):
+        """Run coroutine on the loop and wait for its result.
+
+        Note: Must not be called from the loop thread itself.
+
+        Args:
+            coroutine (coroutine): coroutine to run
+            timeout (float, optional): maximum time to wait in seconds
+
+        Returns:
+            result of the coroutine
+
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def submit(self, coroutine):
+        """Schedule coroutine on the loop without waiting for it.
+
+        Args:
+            coroutine (coroutine): coroutine to run
+
+        Returns:
+            concurrent.futures.Future: future of the coroutine result
+
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def stop(self):
+        """Stop the loop and wait for its thread to finish."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
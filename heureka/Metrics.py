@@ -0,0 +1,217 @@
+from bisect import bisect_left
+from threading import Lock
+
+# upper bounds of latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram(object):
+    """Histogram of observed values in fixed buckets with their count and sum.
+
+    Example:
+        >>> from Metrics import Histogram
+        >>> histogram = Histogram()
+        >>> histogram.observe(0.02)
+
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Initialize empty buckets.
+
+        Args:
+            buckets (tuple, optional): sorted upper bounds of buckets
+
+        """
+        self.buckets = buckets
+
+        # last count is of values above all bounds
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+        self._lock = Lock()
+
+    def observe(self, value):
+        """Add value to its bucket.
+
+        Args:
+            value (float): observed value
+
+        """
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative_counts(self):
+        """Count values less than or equal to every bound.
+
+        Returns:
+            list: (bound, count) tuples, last bound is infinity
+
+        """
+        with self._lock:
+            counts = list(self.counts)
+
+        cumulative = []
+        total = 0
+
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            cumulative.append((bound, total))
+
+        return cumulative
+
+
+class Metrics(object):
+    """Registry of cache statistics, API latency histograms and circuit states.
+
+    Statistics of registered caches and states of circuits are read on collection,
+    so cache hits are not slowed down by instrumentation. Latencies of API requests
+    are observed per client and endpoint pattern.
+
+    Example:
+        >>> from Metrics import Metrics
+        >>> metrics = Metrics()
+        >>> metrics.register_cache("get_product", get_product.cache)
+        >>> metrics.observe_latency("sync", "/product/{}", 0.02)
+        >>> text = metrics.render()
+
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Initialize empty registry.
+
+        Args:
+            buckets (tuple, optional): upper bounds of latency histogram buckets in seconds
+
+        """
+        self.buckets = buckets
+        self.caches = {}
+        self.latencies = {}
+        self.circuit_breaker = None
+
+        self._lock = Lock()
+
+    def register_cache(self, name, cache):
+        """Register cache of decorated function.
+
+        Args:
+            name (str): name of decorated function
+            cache (Cache): cache of decorated function
+
+        """
+        self.caches[name] = cache
+
+    def register_circuit_breaker(self, circuit_breaker):
+        """Register circuit breaker of API requests.
+
+        Args:
+            circuit_breaker (CircuitBreaker): circuit breaker of endpoint patterns
+
+        """
+        self.circuit_breaker = circuit_breaker
+
+    def observe_latency(self, client, pattern, seconds):
+        """Observe latency of API request.
+
+        Args:
+            client (str): name of API client
+            pattern (str): endpoint pattern of request
+            seconds (float): latency of request
+
+        """
+        histogram = self.latencies.get((client, pattern))
+
+        if histogram is None:
+            with self._lock:
+                histogram = self.latencies.setdefault((client, pattern), Histogram(self.buckets))
+
+        histogram.observe(seconds)
+
+    def collect(self):
+        """Collect current values of all metrics.
+
+        Returns:
+            dict: statistics, records count and bytes of caches by function name,
+                latency histograms by client and endpoint pattern and states
+                and timeouts of circuits by endpoint pattern
+
+        """
+        caches = {}
+
+        for name, cache in self.caches.items():
+            caches[name] = {
+                "stats": cache.collect_stats(),
+                "records": cache.records_count,
+                "bytes": cache.bytes
+            }
+
+        latencies = {}
+
+        for (client, pattern), histogram in list(self.latencies.items()):
+            latencies[(client, pattern)] = {
+                "buckets": histogram.cumulative_counts(),
+                "count": histogram.count,
+                "sum": histogram.sum
+            }
+
+        circuits = self.circuit_breaker.states() if self.circuit_breaker is not None else {}
+
+        return {"caches": caches, "latencies": latencies, "circuits": circuits}
+
+    def render(self):
+        """Render current values of all metrics in Prometheus text format.
+
+        Returns:
+            str: metrics in Prometheus text format
+
+        """
+        collected = self.collect()
+        lines = [
+            "# HELP heureka_cache_events_total Events of cache of decorated function.",
+            "# TYPE heureka_cache_events_total counter"
+        ]
+
+        for name, cache in sorted(collected["caches"].items()):
+            for event, count in sorted(cache["stats"].items()):
+                lines.append('heureka_cache_events_total{{function="{}",event="{}"}} {}'.format(name, event, count))
+
+        for metric, help_text in (("records", "Number of records in cache."),
+                                  ("bytes", "Approximate size of records of cache limited by size in bytes.")):
+            lines.append("# HELP heureka_cache_{} {}".format(metric, help_text))
+            lines.append("# TYPE heureka_cache_{} gauge".format(metric))
+
+            for name, cache in sorted(collected["caches"].items()):
+                lines.append('heureka_cache_{}{{function="{}"}} {}'.format(metric, name, cache[metric]))
+
+        lines.append("# HELP heureka_api_request_duration_seconds Latency of API requests.")
+        lines.append("# TYPE heureka_api_request_duration_seconds histogram")
+
+        for (client, pattern), histogram in sorted(collected["latencies"].items()):
+            labels = 'client="{}",pattern="{}"'.format(client, pattern)
+
+            for bound, count in histogram["buckets"]:
+                lines.append('heureka_api_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                    labels, "+Inf" if bound == float("inf") else bound, count))
+
+            lines.append("heureka_api_request_duration_seconds_sum{{{}}} {}".format(labels, histogram["sum"]))
+            lines.append("heureka_api_request_duration_seconds_count{{{}}} {}".format(labels, histogram["count"]))
+
+        lines.append("# HELP heureka_circuit_state Current state of circuit of API endpoint pattern.")
+        lines.append("# TYPE heureka_circuit_state gauge")
+
+        for pattern, (state, _) in sorted(collected["circuits"].items()):
+            for name in ("closed", "half-open", "open"):
+                lines.append('heureka_circuit_state{{pattern="{}",state="{}"}} {}'.format(
+                    pattern, name, int(name == state)))
+
+        lines.append("# HELP heureka_api_request_timeout_seconds Timeout of API requests adapted to their latencies.")
+        lines.append("# TYPE heureka_api_request_timeout_seconds gauge")
+
+        for pattern, (_, timeout) in sorted(collected["circuits"].items()):
+            lines.append('heureka_api_request_timeout_seconds{{pattern="{}"}} {}'.format(pattern, timeout))
+
+        return "\n".join(lines) + "\n"
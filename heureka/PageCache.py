@@ -0,0 +1,107 @@
+from functools import wraps
+from flask import request, current_app
+from Cache import Cache
+
+
+class UncacheableResponse(Exception):
+    """Response of cached view which must not be stored, e.g. not modified response."""
+
+    def __init__(self, response):
+        super().__init__(response.status)
+        self.response = response
+
+
+class PageCache(object):
+    """Cache of whole responses of selected views for anonymous traffic.
+
+    Responses are keyed by endpoint and integer query parameters the view
+    reads with their defaults filled in. Path segments are ignored,
+    because they are cosmetic slugs and `id` query parameter is authoritative,
+    unless some parameter without default is missing, then slugs identify the page.
+    Only successful responses, which do not forbid storing, are stored
+    and concurrent misses of the same page are rendered once.
+
+    Requests with cookies or authorization bypass the cache. Cached responses
+    still answer `If-None-Match` by 304.
+
+    Example:
+        >>> from PageCache import PageCache
+        >>> page_cache = PageCache(app, {"render_products": {"max_lifetime": 30, "args": {"id": None, "page": 0}}})
+
+    """
+
+    def __init__(self, app=None, routes=None, max_bytes=None):
+        """Initialize caches of routes.
+
+        Args:
+            app (flask.Flask, optional): application with registered views
+            routes (dict, optional): endpoint mapped to dictionary of `max_lifetime`
+                and `args`, i.e. query parameters with their defaults
+            max_bytes (int, optional): maximum approximate size of responses of single route
+
+        """
+        self.routes = routes or {}
+        self.max_bytes = max_bytes
+        self.caches = {}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Wrap views of configured endpoints with cache.
+
+        Note: Views must be registered before.
+
+        Args:
+            app (flask.Flask): application with registered views
+
+        """
+        for endpoint, route in self.routes.items():
+            app.view_functions[endpoint] = self._wrap(endpoint, app.view_functions[endpoint], route["max_lifetime"],
+                                                      route["args"])
+
+    def _wrap(self, endpoint, view, max_lifetime, args):
+        """Create cached variant of view.
+
+        Args:
+            endpoint (str): name of endpoint
+            view (function): view function
+            max_lifetime (int): lifetime of cached responses in seconds
+            args (dict): query parameters read by view with their defaults
+
+        Returns:
+            function: cached view
+
+        """
+        @Cache(max_lifetime=max_lifetime, max_bytes=self.max_bytes)
+        def render(key):
+            response = current_app.make_response(view(**request.view_args))
+
+            if response.status_code != 200 or response.cache_control.no_store:
+                raise UncacheableResponse(response)
+
+            return response.get_data(), response.status_code, tuple(response.headers.items())
+
+        self.caches[endpoint] = render.cache
+
+        @wraps(view)
+        def cached_view(**view_args):
+            if request.method != "GET" or request.cookies or "Authorization" in request.headers:
+                return view(**view_args)
+
+            # normalize query parameters, so equivalent urls share cached response
+            key = tuple(request.args.get(name, default, type=int) for name, default in args.items())
+
+            # page without ID is resolved by its slugs
+            if None in key:
+                key += tuple(view_args.values())
+
+            try:
+                body, status, headers = render(key)
+            except UncacheableResponse as error:
+                return error.response
+
+            response = current_app.response_class(body, status=status, headers=headers)
+            return response.make_conditional(request)
+
+        return cached_view
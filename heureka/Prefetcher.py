@@ -0,0 +1,119 @@
+import asyncio
+from collections import Counter
+
+
+class Prefetcher(object):
+    """Background loader of cached records which are likely to be requested next.
+
+    Prefetching runs on shared event loop with limited number of concurrent
+    loads, and loads above budget of pending ones are dropped, so prefetching
+    can not flood the API. Hit rates of prefetched records are read from
+    stats of caches of prefetched functions.
+
+    Example:
+        >>> from Prefetcher import Prefetcher
+        >>> prefetcher = Prefetcher(loop_thread, max_concurrency=4, max_pending=100)
+        >>> prefetcher.submit(prefetch_next_page())
+
+    """
+
+    def __init__(self, loop_thread, max_concurrency=4, max_pending=100):
+        """Initialize limits of prefetching.
+
+        Args:
+            loop_thread (LoopThread): event loop running in background thread
+            max_concurrency (int, optional): maximum number of concurrent loads
+            max_pending (int, optional): maximum number of waiting and running loads
+
+        """
+        self.loop_thread = loop_thread
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+
+        # number of loads waiting for or holding semaphore, used only from loop thread
+        self.pending = 0
+        self.stats = Counter()
+        self.caches = {}
+
+        self._semaphore = None
+
+    def submit(self, coroutine):
+        """Schedule prefetching coroutine on the loop without waiting for it.
+
+        Args:
+            coroutine (coroutine): coroutine calling `prefetch`
+
+        """
+        self.loop_thread.submit(self._run(coroutine))
+
+    async def _run(self, coroutine):
+        """Run prefetching coroutine, its errors are only counted.
+
+        Args:
+            coroutine (coroutine): coroutine calling `prefetch`
+
+        """
+        try:
+            await coroutine
+        except Exception:
+            self.stats["failed"] += 1
+
+    @property
+    def has_budget(self):
+        """bool: more loads can be started"""
+        return self.pending < self.max_pending
+
+    async def prefetch(self, func, *args, **kwargs):
+        """Load record of cached function unless budget is exhausted.
+
+        Synchronous functions run in default executor of the loop.
+
+        Args:
+            func (function): function decorated by Cache or AsyncCache
+            *args: arguments of decorated function
+            **kwargs: keyword arguments of decorated function
+
+        Returns:
+            cached value or None when load was dropped
+
+        """
+        if not self.has_budget:
+            self.stats["dropped"] += 1
+            return None
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.caches[func.__name__] = func.cache
+        self.pending += 1
+
+        try:
+            async with self._semaphore:
+                if asyncio.iscoroutinefunction(func.prefetch):
+                    return await func.prefetch(*args, **kwargs)
+
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(None, lambda: func.prefetch(*args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def hit_rates(self):
+        """Compute share of prefetched records which were hit afterwards.
+
+        Returns:
+            dict: name of prefetched function mapped to its counts and hit rate
+
+        """
+        hit_rates = {}
+
+        for name, cache in self.caches.items():
+            prefetches = cache.stats["prefetches"]
+            prefetch_hits = cache.stats["prefetch_hits"]
+
+            hit_rates[name] = {
+                "prefetches": prefetches,
+                "prefetch_hits": prefetch_hits,
+                "hit_rate": prefetch_hits / prefetches if prefetches else 0.0
+            }
+
+        return hit_rates
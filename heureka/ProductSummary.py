@@ -0,0 +1,74 @@
+from sys import maxsize
+from collections import namedtuple
+from utils import clean_string
+
+# compact offer of single eshop
+ShopOffer = namedtuple("ShopOffer", ["title", "url", "price"])
+
+
+class ProductSummary(object):
+    """Aggregated offers of single product shared by products and offers pages.
+
+    Summary is built from pages of offers once per offers download,
+    after which it holds normalized title, price range, offers sorted
+    by price, deduplicated image urls and chosen description.
+
+    Example:
+        >>> from ProductSummary import ProductSummary
+        >>> summary = ProductSummary(1, "Product")
+        >>> summary.add_offers([{"title": "Offer", "url": "http://eshop.cz", "price": 100}])
+        >>> summary.finalize()
+
+    """
+
+    __slots__ = ("product_id", "title", "normalized_title", "min_price", "max_price", "description", "img_urls",
+                 "offers")
+
+    def __init__(self, product_id, title):
+        """Initialize empty summary.
+
+        Args:
+            product_id (int): id of product
+            title (str): title of product
+
+        """
+        self.product_id = product_id
+        self.title = title
+        self.normalized_title = clean_string(title)
+
+        self.min_price = maxsize
+        self.max_price = 0
+        self.description = None
+
+        # image urls are deduplicated by keys of dictionary, which keeps their order
+        self.img_urls = {}
+        self.offers = []
+
+    def add_offers(self, offers):
+        """Aggregate page of offers.
+
+        Args:
+            offers (list): offers downloaded from API
+
+        """
+        for offer in offers:
+            self.min_price = min(self.min_price, offer["price"])
+            self.max_price = max(self.max_price, offer["price"])
+
+            if self.description is None and offer.get("description"):
+                self.description = offer["description"]
+
+            if offer.get("img_url"):
+                self.img_urls[offer["img_url"]] = None
+
+            self.offers.append(ShopOffer(offer["title"], offer["url"], offer["price"]))
+
+    def finalize(self):
+        """Sort offers by price and freeze collected values."""
+        self.offers = tuple(sorted(self.offers, key=lambda offer: offer.price))
+        self.img_urls = tuple(self.img_urls)
+
+    @property
+    def img_url(self):
+        """str: first image url or None"""
+        return self.img_urls[0] if self.img_urls else None
@@ -0,0 +1,75 @@
+from array import array
+
+
+class SlugIndex(object):
+    """Ordered IDs of records indexed by their slugs (normalized titles) and back.
+
+    IDs are kept in array in original order, so page of them is sliced
+    without materializing list of all keys. Slugs shared by several records
+    are ambiguous and resolve to no ID, such records need explicit ID.
+
+    Example:
+        >>> from SlugIndex import SlugIndex
+        >>> index = SlugIndex([(1, "auta"), (2, "kola")])
+        >>> index.get_id("kola")
+        2
+        >>> index.page(0, 1)
+        array('q', [1])
+
+    """
+
+    def __init__(self, slugs):
+        """Build index.
+
+        Args:
+            slugs (iterable): (ID, slug) tuples in order of records
+
+        """
+        self.ids = array("q")
+        self.slugs = {}
+        self.ids_by_slug = {}
+
+        for record_id, slug in slugs:
+            self.ids.append(record_id)
+            self.slugs[record_id] = slug
+            self.ids_by_slug[slug] = None if slug in self.ids_by_slug else record_id
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_id(self, slug):
+        """Get ID of record with slug.
+
+        Args:
+            slug (str): normalized title
+
+        Returns:
+            int: ID or None when slug is unknown or ambiguous
+
+        """
+        return self.ids_by_slug.get(slug)
+
+    def get_slug(self, record_id):
+        """Get slug of record.
+
+        Args:
+            record_id (int): ID of record
+
+        Returns:
+            str: normalized title or None when ID is unknown
+
+        """
+        return self.slugs.get(record_id)
+
+    def page(self, lower_bound, upper_bound):
+        """Slice IDs of one page.
+
+        Args:
+            lower_bound (int): index of first ID
+            upper_bound (int): index after last ID
+
+        Returns:
+            array: IDs of page
+
+        """
+        return self.ids[lower_bound:upper_bound]
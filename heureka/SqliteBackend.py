@@ -0,0 +1,130 @@
+import os
+import pickle
+import sqlite3
+from uuid import uuid4
+from time import time, sleep
+from threading import local
+from CacheBackend import CacheBackend
+
+
+class SqliteBackend(CacheBackend):
+    """Cache backend shared by processes through SQLite database file.
+
+    Database should be placed on tmpfs (e.g. `/dev/shm`), so it is kept
+    in memory. Records and keys are pickled, leases are rows with expiration
+    time, so lease of crashed process expires, and with token of their owner,
+    so holder running past its lease does not release lease of another. Errors of database are not raised,
+    cache then behaves as if the record was not shared.
+
+    Example:
+        >>> from SqliteBackend import SqliteBackend
+        >>> backend = SqliteBackend("/dev/shm/heureka-cache.sqlite3")
+        >>> @Cache(max_lifetime=10, backend=backend)
+        ... def func(a):
+        ...     return a
+
+    """
+
+    def __init__(self, path, lease_timeout=10, poll_interval=0.01, cleanup_interval=1000):
+        """Open database and create its tables.
+
+        Args:
+            path (str): path to database file
+            lease_timeout (float, optional): maximum time of holding and waiting for lease in seconds
+            poll_interval (float, optional): seconds between attempts to acquire lease
+            cleanup_interval (int, optional): number of stored records between deletions of expired ones
+
+        """
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+
+        # connections can not be shared by threads
+        self._local = local()
+        self._sets_count = 0
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS records (namespace TEXT, key BLOB, data BLOB, fetch_time REAL, "
+                           "expire_time REAL, PRIMARY KEY (namespace, key))")
+        connection.execute("CREATE TABLE IF NOT EXISTS leases (namespace TEXT, key BLOB, expire_time REAL, "
+                           "owner TEXT, PRIMARY KEY (namespace, key))")
+
+    def _connection(self):
+        """Get connection of current thread and process, open it if needed.
+
+        Returns:
+            sqlite3.Connection: autocommitted connection
+
+        """
+        connection = getattr(self._local, "connection", None)
+
+        # forked process must not use connection of its parent
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.lease_timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def get(self, namespace, key):
+        try:
+            row = self._connection().execute(
+                "SELECT data, fetch_time FROM records WHERE namespace = ? AND key = ? AND "
+                "(expire_time IS NULL OR expire_time > ?)", (namespace, pickle.dumps(key), time())).fetchone()
+        except sqlite3.Error:
+            return None
+
+        if row is None:
+            return None
+
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, namespace, key, data, fetch_time, expire_time=None):
+        try:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+                               (namespace, pickle.dumps(key), pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
+                                fetch_time, expire_time))
+
+            # delete expired records once in a while
+            self._sets_count += 1
+
+            if not self._sets_count % self.cleanup_interval:
+                connection.execute("DELETE FROM records WHERE expire_time < ?", (time(),))
+        except sqlite3.Error:
+            pass
+
+    def acquire(self, namespace, key):
+        key = pickle.dumps(key)
+        token = "{}-{}".format(os.getpid(), uuid4().hex)
+        deadline = time() + self.lease_timeout
+
+        while True:
+            now = time()
+
+            try:
+                connection = self._connection()
+                connection.execute("DELETE FROM leases WHERE namespace = ? AND key = ? AND expire_time < ?",
+                                   (namespace, key, now))
+                cursor = connection.execute("INSERT OR IGNORE INTO leases VALUES (?, ?, ?, ?)",
+                                            (namespace, key, now + self.lease_timeout, token))
+            except sqlite3.Error:
+                return None
+
+            if cursor.rowcount == 1:
+                return token
+
+            if now > deadline:
+                return None
+
+            sleep(self.poll_interval)
+
+    def release(self, namespace, key, token):
+        try:
+            self._connection().execute("DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?",
+                                       (namespace, pickle.dumps(key), token))
+        except sqlite3.Error:
+            pass
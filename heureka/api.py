@@ -1,12 +1,24 @@
+import asyncio
 from sys import maxsize
 from AsyncCache import AsyncCache
 from collections import OrderedDict
-from utils import get_response, get_response_async, clean_string
+from werkzeug.exceptions import NotFound
+from utils import get_response, get_response_async, clean_string, metrics
 from Cache import Cache
+from SqliteBackend import SqliteBackend
+from SlugIndex import SlugIndex
+from ProductSummary import ProductSummary
 from config import config
 
+# optional cache storage shared by worker processes
+shared_backend = SqliteBackend(config["shared_cache"]["path"]) if config["shared_cache"]["path"] else None
 
-@Cache(max_lifetime=600)
+# missing records are cached briefly in bounded store, so requests of nonexistent IDs do not reach the API
+negative_ttl = config["negative_cache"]["ttl"]
+negative_max_size = config["negative_cache"]["max_size"]
+
+
+@Cache(max_lifetime=600, stale_ttl=300, serve_stale_on_error=True, frozen=True, backend=shared_backend)
 def get_categories():
     categories_list = get_response("/categories")
 
@@ -23,36 +35,137 @@ def get_categories():
     return categories_dict
 
 
-@Cache(max_lifetime=120)
+@Cache(max_size=2, key_fn=lambda categories, version: version)
+def index_categories(categories, version):
+    """Index categories by their normalized titles, once per version of cached categories.
+
+    Args:
+        categories (dict): categories by ID
+        version (str): content version of cached categories
+
+    Returns:
+        SlugIndex: ordered category IDs indexed by normalized titles
+
+    """
+    return SlugIndex((category_id, category["normalized_title"]) for category_id, category in categories.items())
+
+
+def get_categories_index():
+    """Get categories with their version, remaining lifetime and index.
+
+    Returns:
+        tuple: categories by ID, their version, seconds until they expire and their index
+
+    """
+    categories, version, max_age = get_categories.conditional()
+    return categories, version, max_age, index_categories(categories, version)
+
+
+@Cache(max_lifetime=120, stale_ttl=60, serve_stale_on_error=True, shards=8, frozen=True, backend=shared_backend,
+       negative_ttl=negative_ttl, negative_exceptions=(NotFound,), negative_max_size=negative_max_size)
 def get_category(category_id):
-    return get_response("/category/{}".format(category_id))
+    category = get_response("/category/{}".format(category_id))
+    category["normalized_title"] = clean_string(category["title"])
+
+    return category
 
 
-@Cache(max_size=2 * config["products"]["pagination"]["per_page"], max_lifetime=120, group_key="category_id")
+@Cache(max_size=2 * config["products"]["pagination"]["per_page"], max_lifetime=120, group_key="category_id",
+       stale_ttl=60, serve_stale_on_error=True, frozen=True, backend=shared_backend, negative_ttl=negative_ttl,
+       negative_exceptions=(NotFound,), negative_max_size=negative_max_size)
 def get_products(category_id, offset=0, limit=maxsize):
     return get_response("/products/{}/{}/{}".format(category_id, offset, limit))
 
 
-@Cache(max_lifetime=120)
+@Cache(max_size=1000, max_lifetime=120, stale_ttl=60, serve_stale_on_error=True, backend=shared_backend,
+       negative_ttl=negative_ttl, negative_exceptions=(NotFound,), negative_max_size=negative_max_size)
+def get_product_slugs(category_id):
+    """Index products of category by their normalized titles.
+
+    Note: Whole listing of category is downloaded once per lifetime, it is
+    used only by urls without product ID.
+
+    Args:
+        category_id (int): id of category
+
+    Returns:
+        SlugIndex: ordered product IDs indexed by normalized titles
+
+    """
+    products = get_response("/products/{}/{}/{}".format(category_id, 0, maxsize))
+    return SlugIndex((product["productId"], clean_string(product["title"])) for product in products)
+
+
+@Cache(max_lifetime=120, stale_ttl=60, serve_stale_on_error=True, backend=shared_backend,
+       negative_ttl=negative_ttl, negative_exceptions=(NotFound,), negative_max_size=negative_max_size)
 def get_products_count(category_id):
     return get_response("/products/{}/count/".format(category_id))["count"]
 
 
-@Cache(max_lifetime=120)
+@Cache(max_lifetime=120, stale_ttl=60, serve_stale_on_error=True, shards=8, frozen=True, backend=shared_backend,
+       negative_ttl=negative_ttl, negative_exceptions=(NotFound,), negative_max_size=negative_max_size)
 def get_product(product_id):
     return get_response("/product/{}".format(product_id))
 
 
-@AsyncCache(max_lifetime=120)
+@AsyncCache(max_lifetime=120, stale_ttl=60, serve_stale_on_error=True, max_bytes=64 * 1024 ** 2,
+            backend=shared_backend, negative_ttl=negative_ttl, negative_exceptions=(NotFound,),
+            is_negative=lambda offers: not offers, negative_max_size=negative_max_size)
 async def get_offers_async(product_id, offset=0, limit=maxsize):
     return await get_response_async("/offers/{}/{}/{}".format(product_id, offset, limit))
 
 
-@Cache(max_lifetime=120)
+@AsyncCache(max_lifetime=120, stale_ttl=60, serve_stale_on_error=True, max_bytes=64 * 1024 ** 2,
+            key_fn=lambda product: product["productId"], backend=shared_backend, negative_ttl=negative_ttl,
+            negative_exceptions=(NotFound,), is_negative=lambda summary: not summary.offers,
+            negative_max_size=negative_max_size)
+async def get_product_summary_async(product):
+    """Summarize all offers of product, summaries are cached by product ID.
+
+    Offers are downloaded in pages which are folded into the summary one by one.
+    When the first page is full, remaining pages are downloaded concurrently
+    based on offers count.
+
+    Args:
+        product (dict): product with its ID and title
+
+    Returns:
+        ProductSummary: summary of product offers
+
+    """
+    product_id = product["productId"]
+    page_size = config["offers"]["page_size"]
+    summary = ProductSummary(product_id, product["title"])
+
+    first_page = await get_response_async("/offers/{}/{}/{}".format(product_id, 0, page_size))
+    summary.add_offers(first_page)
+
+    if len(first_page) == page_size:
+        offers_count = (await get_response_async("/offers/{}/count/".format(product_id)))["count"]
+        pages = await asyncio.gather(*[get_response_async("/offers/{}/{}/{}".format(product_id, offset, page_size))
+                                       for offset in range(page_size, offers_count, page_size)])
+
+        for page in pages:
+            summary.add_offers(page)
+
+    summary.finalize()
+    return summary
+
+
+@Cache(max_lifetime=120, backend=shared_backend, negative_ttl=negative_ttl, negative_exceptions=(NotFound,),
+       negative_max_size=negative_max_size)
 def get_offers_count(product_id):
     return get_response("/offers/{}/count/".format(product_id))["count"]
 
 
-@Cache(max_lifetime=120)
+@Cache(max_lifetime=120, backend=shared_backend, negative_ttl=negative_ttl, negative_exceptions=(NotFound,),
+       negative_max_size=negative_max_size)
 def get_offer(offer_id):
     return get_response("/offer/{}".format(offer_id))
+
+
+# statistics of API caches are exposed by metrics endpoint
+for cached_function in (get_categories, index_categories, get_category, get_products, get_product_slugs,
+                        get_products_count, get_product, get_offers_async, get_product_summary_async, get_offers_count,
+                        get_offer):
+    metrics.register_cache(cached_function.__name__, cached_function.cache)
@@ -1,12 +1,32 @@
-import asyncio
+import atexit
 from flask import Flask, request
-from routes import home, products, offers, page_not_found
-from utils import url_for_page
+from routes import home, products, offers, page_not_found, resolve_category_id, resolve_product_id
+from utils import url_for_page, metrics
 from config import config
+from LoopThread import LoopThread
+from PageCache import PageCache
+from Prefetcher import Prefetcher
+from warm_up import warm_up, dump_snapshot, load_snapshot
 
 app = Flask(__name__)
-loop = asyncio.new_event_loop()
-asyncio.set_event_loop(loop)
+
+# shared event loop awaiting asynchronous API calls of all request threads
+loop_thread = LoopThread(max_workers=config["api"]["pool"]["max_connections_per_host"])
+
+# optional background loader of records likely requested next
+prefetcher = None
+
+if config["prefetch"]["enabled"]:
+    prefetcher = Prefetcher(loop_thread, max_concurrency=config["prefetch"]["max_concurrency"],
+                            max_pending=config["prefetch"]["max_pending"])
+
+# optionally start with warm caches, from snapshot of previous process and by loading first categories
+if config["snapshot"]["path"]:
+    load_snapshot(config["snapshot"]["path"])
+    atexit.register(dump_snapshot, config["snapshot"]["path"])
+
+if config["warm_up"]["enabled"]:
+    loop_thread.run(warm_up(config["warm_up"]["categories"]))
 
 # add globals so they can be used in all templates  
 app.jinja_env.globals["config"] = config
@@ -24,15 +44,38 @@ def render_home():
 def render_products(category):
     category_id = request.args.get("id", type=int)
     page = request.args.get("page", 0, type=int)
-    return products(loop, category_id, page)
+
+    # pretty url without ID is resolved by slug
+    if category_id is None:
+        category_id = resolve_category_id(category)
+
+    return products(loop_thread, category_id, page, prefetcher)
 
 
 @app.route("/<category>/<product>")
 def render_offers(category, product):
     product_id = request.args.get("id", type=int)
-    return offers(loop, product_id)
+
+    # pretty url without ID is resolved by slugs
+    if product_id is None:
+        product_id = resolve_product_id(category, product)
+
+    return offers(loop_thread, product_id)
+
+
+@app.route("/metrics")
+def render_metrics():
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
 
 @app.errorhandler(404)
 def render_page_not_found(error):
     return page_not_found()
+
+
+# optional cache of whole pages, views must be registered before
+if config["page_cache"]["enabled"]:
+    page_cache = PageCache(app, config["page_cache"]["routes"], max_bytes=config["page_cache"]["max_bytes"])
+
+    for endpoint, cache in page_cache.caches.items():
+        metrics.register_cache(endpoint, cache)
@@ -1,4 +1,18 @@
+from os import environ
+
 config = {
+    "api": {
+        "base_url": environ.get("HEUREKA_API_URL", "http://python-servers-vtnovk529892.codeanyapp.com:5000"),
+        "timeout": {
+            "connect": 3,
+            "read": 10
+        },
+        "pool": {
+            "max_connections": 100,
+            "max_connections_per_host": 20,
+            "keepalive_timeout": 30
+        }
+    },
     "categories": {
         "pagination": {
             "per_page": 9,
@@ -22,9 +36,73 @@ config = {
             "truncation_limit": 300
         }
     },
+    "offers": {
+        "page_size": 100
+    },
+    "fan_out": {
+        "max_concurrency": 50,
+        "max_concurrency_per_host": 20,
+        "page_deadline": 2.0
+    },
+    "negative_cache": {
+        "ttl": 10,
+        "max_size": 10000
+    },
+    "hedging": {
+        "enabled": environ.get("HEUREKA_HEDGING") == "1",
+        "percentile": 95,
+        "budget": 0.05,
+        "max_tokens": 10
+    },
+    "circuit_breaker": {
+        "failure_threshold": 5,
+        "recovery_time": 10,
+        "min_timeout": 0.5,
+        "timeout_multiplier": 3,
+        "percentile": 99,
+        "window": 100,
+        "min_samples": 20
+    },
+    "fragments": {
+        "max_bytes": 32 * 1024 ** 2
+    },
+    "prefetch": {
+        "enabled": environ.get("HEUREKA_PREFETCH") == "1",
+        "max_concurrency": 4,
+        "max_pending": 100
+    },
+    "warm_up": {
+        "enabled": environ.get("HEUREKA_WARM_UP") == "1",
+        "categories": 10
+    },
+    "snapshot": {
+        "path": environ.get("HEUREKA_SNAPSHOT")
+    },
+    "shared_cache": {
+        "path": environ.get("HEUREKA_SHARED_CACHE")
+    },
+    "page_cache": {
+        "enabled": environ.get("HEUREKA_PAGE_CACHE") == "1",
+        "max_bytes": 64 * 1024 ** 2,
+        "routes": {
+            "render_home": {
+                "max_lifetime": 60,
+                "args": {"page": 0}
+            },
+            "render_products": {
+                "max_lifetime": 30,
+                "args": {"id": None, "page": 0}
+            },
+            "render_offers": {
+                "max_lifetime": 30,
+                "args": {"id": None}
+            }
+        }
+    },
     "placeholders": {
         "description": "Popis produktu není dostupný.",
-        "img_url": "/static/img/placeholder.png"
+        "img_url": "/static/img/placeholder.png",
+        "price": "Cena není dostupná."
     }
 
 }
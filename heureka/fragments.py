@@ -0,0 +1,78 @@
+from flask import render_template, request
+from markupsafe import Markup
+from Cache import Cache
+from config import config
+from utils import metrics
+
+
+@Cache(max_bytes=config["fragments"]["max_bytes"], shards=8,
+       key_fn=lambda template_name, key, **context: (template_name, key))
+def render_fragment(template_name, key, **context):
+    """Render template of page fragment, fragments are cached by template name and key.
+
+    Note: Key must identify everything the fragment is rendered from, i.e. versions
+    of cached records and request values it depends on. Fragments of replaced
+    records are not hit anymore and they are evicted in LRU order.
+
+    Args:
+        template_name (str): name of fragment template
+        key (tuple): hashable identification of rendered data
+        **context: variables of fragment template
+
+    Returns:
+        Markup: rendered fragment
+
+    """
+    return Markup(render_template(template_name, **context))
+
+
+metrics.register_cache(render_fragment.__name__, render_fragment.cache)
+
+
+def render_left_navigation(categories, version, active_id=None):
+    """Render left menu of all categories.
+
+    Args:
+        categories (dict): categories ordered by ID
+        version (str): content version of cached categories
+        active_id (int, optional): id of currently selected category
+
+    Returns:
+        Markup: rendered menu
+
+    """
+    return render_fragment("fragments/left_navigation.html", (version, active_id), categories=categories,
+                           active_id=active_id)
+
+
+def render_product_tile(summary, version, category_title):
+    """Render tile of single product on products page.
+
+    Args:
+        summary (ProductSummary): summary of product offers
+        version (str): content version of cached summary, None for placeholder
+        category_title (str): normalized title of product category
+
+    Returns:
+        Markup: rendered tile
+
+    """
+    return render_fragment("fragments/product_tile.html", (summary.product_id, version, category_title),
+                           summary=summary, category_title=category_title)
+
+
+def render_pagination(pagination, **query_args):
+    """Render pagination links of current endpoint.
+
+    Args:
+        pagination (Pagination): pagination set to current page
+        **query_args: other query parameters of links
+
+    Returns:
+        Markup: rendered pagination
+
+    """
+    key = (request.endpoint, tuple(sorted(request.view_args.items())), pagination.current_page,
+           pagination.pages_count, tuple(sorted(query_args.items())))
+
+    return render_fragment("fragments/pagination.html", key, pagination=pagination, query_args=query_args)
@@ -2,3 +2,4 @@ from .home import home
 from .products import products
 from .offers import offers
 from .page_not_found import page_not_found
+from .slugs import resolve_category_id, resolve_product_id
@@ -3,9 +3,11 @@ import sys
 sys.path.append("..")
 
 from flask import render_template
-from api import get_categories
+from api import get_categories_index
 from config import config
+from utils import conditional_response
 from Pagination import Pagination
+from fragments import render_left_navigation, render_pagination
 
 
 def home(page):
@@ -15,10 +17,10 @@ def home(page):
         page (int): current pagination page
 
     Returns:
-        render_template function
+        flask.Response: rendered or not modified page
 
     """
-    categories = get_categories()
+    categories, categories_version, max_age, categories_index = get_categories_index()
     categories_per_page = config["categories"]["pagination"]["per_page"]
 
     # set pagination to correct page    
@@ -37,8 +39,11 @@ def home(page):
     lower_bound = page * categories_per_page
     upper_bound = (page + 1) * categories_per_page
 
-    tile_ids = list(categories.keys())[lower_bound:upper_bound]
-    tile_categories = {id: categories[id] for id in tile_ids}
+    tile_categories = {id: categories[id] for id in categories_index.page(lower_bound, upper_bound)}
 
-    return render_template("home.html", title="Categories", pagination=pagination, categories=categories,
-                           tile_categories=tile_categories)
+    def render():
+        return render_template("home.html", title="Categories", tile_categories=tile_categories,
+                               left_navigation=render_left_navigation(categories, categories_version),
+                               pagination_links=render_pagination(pagination))
+
+    return conditional_response((categories_version,), max_age, render)
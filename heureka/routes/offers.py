@@ -2,56 +2,61 @@ import sys
 
 sys.path.append("..")
 
+import asyncio
 from flask import render_template
-from api import get_product, get_category, get_offers_async
-from utils import clean_string
+from api import get_product, get_category, get_product_summary_async
 from config import config
+from utils import conditional_response
 
 
-def offers(loop, product_id):
-    """Render offers template.
+async def load_offers_page(product_id):
+    """Load data of offers page concurrently.
+
+    Category and summary of offers depend only on product, so they are loaded
+    at the same time once the product is known. Synchronous API calls
+    run in default executor of the loop.
 
     Args:
-        loop (asyncio.unix_events._UnixSelectorEventLoop): asyncio event loop
         product_id (int): id of currently selected product
 
     Returns:
-        render_template function
+        tuple: product, its category and summary of its offers, each with version and remaining lifetime
 
     """
-    description_placeholder = config["placeholders"]["description"]
+    loop = asyncio.get_event_loop()
+    product, product_version, product_max_age = await loop.run_in_executor(None, get_product.conditional, product_id)
+
+    category, summary = await asyncio.gather(
+        loop.run_in_executor(None, get_category.conditional, product["categoryId"]),
+        get_product_summary_async.conditional(product)
+    )
+
+    return (product, product_version, product_max_age), category, summary
+
 
-    # download single product info
-    product = get_product(product_id)
+def offers(loop_thread, product_id):
+    """Render offers template.
 
-    # download single category info
-    category = get_category(product["categoryId"])
-    category["normalized_title"] = clean_string(category["title"])
+    Args:
+        loop_thread (LoopThread): event loop running in background thread
+        product_id (int): id of currently selected product
 
-    # download offers
-    offers = loop.run_until_complete(get_offers_async(product_id))
+    Returns:
+        flask.Response: rendered or not modified page
 
-    # aggregate offers
-    img_urls = []
-    description = description_placeholder
-    eshops = []
+    """
+    description_placeholder = config["placeholders"]["description"]
 
-    for offer in offers:
-        if offer.get("img_url"):
-            img_urls.append(offer["img_url"])
-        if description == description_placeholder and offer.get("description"):
-            description = offer["description"]
-        eshops.append({
-            "url": offer["url"],
-            "price": offer["price"],
-            "title": offer["title"]
-        })
+    # download single product info, its category info and summary of offers sorted by price
+    loaded = loop_thread.run(load_offers_page(product_id))
+    (product, product_version, _), (category, category_version, _), (summary, summary_version, _) = loaded
 
-    # sort offers by price
-    eshops = sorted(eshops, key=lambda dct: dct["price"])
+    def render():
+        return render_template("offers.html", title=product["title"], category=category, img_urls=summary.img_urls,
+                               description=summary.description or description_placeholder, eshops=summary.offers)
 
-    # just for this homework to remove duplicates
-    img_urls = list(set(img_urls))
+    # page is fresh until the first of its records expires, summary without offers is negative record
+    # with short lifetime
+    max_age = min(record_max_age for _, _, record_max_age in loaded)
 
-    return render_template("offers.html", title=product["title"], category=category, img_urls=img_urls,
-                           description=description, eshops=eshops)
+    return conditional_response((product_version, category_version, summary_version), max_age, render)
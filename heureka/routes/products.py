@@ -3,79 +3,146 @@ import sys
 sys.path.append("..")
 
 import asyncio
-from flask import render_template
-from api import get_categories, get_products, get_offers_async, get_products_count
-from utils import clean_string
+from flask import render_template, abort
+from werkzeug.exceptions import HTTPException
+from api import get_categories, get_category, get_products, get_product, get_product_summary_async, get_products_count
 from config import config
+from utils import conditional_response, fan_out
+from ProductSummary import ProductSummary
 from Pagination import Pagination
+from fragments import render_left_navigation, render_product_tile, render_pagination
 
 
-def get_products_statistics(loop, products):
-    """Enrich products with additional statistics from offers.
+async def get_products_summaries(products, timeout=None):
+    """Get summaries of offers of products with their versions and remaining lifetimes.
+
+    Summaries which are not loaded before timeout are replaced by empty
+    placeholders without version and lifetime, their loading continues in background,
+    so they are served from cache next time. Summaries which can not be
+    loaded, e.g. offers of product are missing or circuit of offers endpoint
+    is open, are replaced by placeholders as well, so one product does not
+    fail the whole page.
+
+    Note: Products are shared cache records, so statistics are not written
+    into them but read from separately cached summaries.
+
+    Args:
+        products (tuple): products of currently selected category
+        timeout (float, optional): maximum time to wait for summaries in seconds
+
+    Returns:
+        list: tuples of summary, its version and seconds until it expires
+
+    """
+    async def get_summary(product):
+        try:
+            return await get_product_summary_async.conditional(product)
+        except HTTPException:
+            return None
+
+    # collect summaries of offers for all products asynchronously
+    futures = [get_summary(product) for product in products]
+    summaries = await fan_out.gather(futures, timeout=timeout)
+
+    for index, (product, summary) in enumerate(zip(products, summaries)):
+        if summary is None:
+            placeholder = ProductSummary(product["productId"], product["title"])
+            placeholder.finalize()
+            summaries[index] = (placeholder, None, None)
+
+    return summaries
+
+
+async def load_products_page(category_id, page):
+    """Load data of products page concurrently.
+
+    Products count and page of products with their offers do not depend
+    on each other, so they are loaded at the same time. Synchronous API
+    calls run in default executor of the loop. Summaries of offers
+    are awaited only until deadline of the page.
 
     Args:
-        loop (asyncio.unix_events._UnixSelectorEventLoop): asyncio event loop
-        products (list): products of currently selected category
+        category_id (int): id of existing category
+        page (int): current pagination page
 
     Returns:
-        list: products with additional statistics
+        tuple: summaries of products, version and remaining lifetime of their listing, and total products count
+            with its version and remaining lifetime
 
     """
-    description_placeholder = config["placeholders"]["description"]
-    img_url_placeholder = config["placeholders"]["img_url"]
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + config["fan_out"]["page_deadline"]
+    products_per_page = config["products"]["pagination"]["per_page"]
+    offset = page * products_per_page
+
+    async def load_products():
+        products, version, max_age = await loop.run_in_executor(None, get_products.conditional, category_id, offset,
+                                                                 products_per_page)
+        summaries = await get_products_summaries(products, timeout=max(0, deadline - loop.time()))
+        return summaries, (version, max_age)
+
+    (summaries, listing), products_count = await asyncio.gather(
+        load_products(),
+        loop.run_in_executor(None, get_products_count.conditional, category_id)
+    )
+
+    return summaries, listing, products_count
 
-    # collect offers for all products asynchronously
-    futures = [get_offers_async(product["productId"]) for product in products]
-    all_offers = loop.run_until_complete(asyncio.gather(*futures))
 
-    for product, offers in zip(products, all_offers):
-        product["normalized_title"] = clean_string(product["title"])
-        product["min_price"] = sys.maxsize
-        product["max_price"] = 0
-        product["description"] = description_placeholder
-        product["img_url"] = img_url_placeholder
+async def prefetch_products_page(prefetcher, category_id, page, products_count, product_ids):
+    """Warm caches for offers pages of shown products and for next products page.
+
+    Args:
+        prefetcher (Prefetcher): loader of records within concurrency and budget limits
+        category_id (int): id of currently selected category
+        page (int): current pagination page
+        products_count (int): total products count of category
+        product_ids (list): ids of products shown on current page
+
+    """
+    products_per_page = config["products"]["pagination"]["per_page"]
+    next_offset = (page + 1) * products_per_page
 
-        for offer in offers:
-            product["min_price"] = min(product["min_price"], offer["price"])
-            product["max_price"] = max(product["max_price"], offer["price"])
+    async def prefetch_next_page():
+        next_products = await prefetcher.prefetch(get_products, category_id, next_offset, products_per_page)
+        await asyncio.gather(*[prefetcher.prefetch(get_product_summary_async, product)
+                               for product in next_products or ()])
 
-            if product["description"] == description_placeholder and offer.get("description"):
-                product["description"] = offer["description"]
+    # offers page needs product and its category, summary is cached already
+    loads = [prefetcher.prefetch(get_category, category_id)]
+    loads.extend(prefetcher.prefetch(get_product, product_id) for product_id in product_ids)
 
-            if product["img_url"] == img_url_placeholder and offer.get("img_url"):
-                product["img_url"] = offer["img_url"]
+    if next_offset < products_count:
+        loads.append(prefetch_next_page())
 
-    return products
+    await asyncio.gather(*loads)
 
 
-def products(loop, category_id, page):
+def products(loop_thread, category_id, page, prefetcher=None):
     """Render products template.
 
     Args:
-        loop (asyncio.unix_events._UnixSelectorEventLoop): asyncio event loop
+        loop_thread (LoopThread): event loop running in background thread
         category_id (int): id of currently selected category
         page (int): current pagination page
+        prefetcher (Prefetcher, optional): loader of likely next requested records
 
     Returns:
-        render_template function
+        flask.Response: rendered or not modified page
 
     """
     products_per_page = config["products"]["pagination"]["per_page"]
 
-    # set asyncio loop for current module
-    asyncio.set_event_loop(loop)
-
-    # collect list of categories for left menu
-    categories = get_categories()
+    # collect list of categories for left menu, missing category does not reach the API again
+    categories, categories_version, categories_max_age = get_categories.conditional()
 
-    # collect one page of products for selected category
-    offset = page * products_per_page
+    if category_id not in categories:
+        abort(404)
 
-    products = get_products(category_id, offset, products_per_page)
-    products = get_products_statistics(loop, products)
-
-    # get total products count for pagination
-    products_count = get_products_count(category_id)
+    # collect one page of products for selected category and total products count for pagination
+    summaries, listing, counted = loop_thread.run(load_products_page(category_id, page))
+    products_version, products_max_age = listing
+    products_count, products_count_version, products_count_max_age = counted
 
     # set pagination to correct page
     pagination = Pagination(
@@ -89,5 +156,28 @@ def products(loop, category_id, page):
 
     pagination.set_current(page, products_count)
 
-    return render_template("products.html", title="Products", categories=categories, products=products,
-                           pagination=pagination, category_id=category_id)
+    # warm caches for likely next clicks in background
+    if prefetcher is not None and prefetcher.has_budget:
+        product_ids = [summary.product_id for summary, _, _ in summaries]
+        prefetcher.submit(prefetch_products_page(prefetcher, category_id, page, products_count, product_ids))
+
+    def render():
+        # rendered fragments are reused until their cached data are replaced
+        category_title = categories[category_id]["normalized_title"]
+        product_tiles = [render_product_tile(summary, version, category_title) for summary, version, _ in summaries]
+
+        return render_template("products.html", title="Products", product_tiles=product_tiles,
+                               left_navigation=render_left_navigation(categories, categories_version, category_id),
+                               pagination_links=render_pagination(pagination, id=category_id))
+
+    # page is modified only when some of its cached records is replaced and it is fresh until the first
+    # of them expires, page with placeholders of late summaries must not be cached by clients
+    versions = (categories_version, products_version, products_count_version) + tuple(
+        version for _, version, _ in summaries)
+    max_age = min([categories_max_age, products_max_age, products_count_max_age] +
+                  [summary_max_age for _, _, summary_max_age in summaries if summary_max_age is not None])
+
+    if None in versions:
+        max_age = None
+
+    return conditional_response(versions, max_age, render)
@@ -0,0 +1,46 @@
+import sys
+
+sys.path.append("..")
+
+from flask import abort
+from api import get_categories_index, get_product_slugs
+
+
+def resolve_category_id(category):
+    """Resolve ID of category from its slug in url without ID.
+
+    Args:
+        category (str): normalized title of category
+
+    Returns:
+        int: id of category
+
+    """
+    _, _, _, index = get_categories_index()
+    category_id = index.get_id(category)
+
+    # unknown or ambiguous slug
+    if category_id is None:
+        abort(404)
+
+    return category_id
+
+
+def resolve_product_id(category, product):
+    """Resolve ID of product from slugs of its category and its own in url without ID.
+
+    Args:
+        category (str): normalized title of category
+        product (str): normalized title of product
+
+    Returns:
+        int: id of product
+
+    """
+    product_id = get_product_slugs(resolve_category_id(category)).get_id(product)
+
+    # unknown or ambiguous slug
+    if product_id is None:
+        abort(404)
+
+    return product_id
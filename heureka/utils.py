@@ -1,11 +1,66 @@
 import re
 import json
+import socket
+import asyncio
 import aiohttp
-from flask import abort, url_for, request
+from hashlib import sha1
+from time import perf_counter
+from flask import abort, url_for, request, make_response, current_app
 from unidecode import unidecode
 from urllib.parse import quote
-from urllib.error import HTTPError
-from urllib.request import Request, urlopen
+from HttpClient import HttpClient
+from AsyncHttpClient import AsyncHttpClient
+from Metrics import Metrics
+from FanOut import FanOut
+from CircuitBreaker import CircuitBreaker
+from Hedger import Hedger
+from config import config
+
+# clients shared by all API requests, so their connections are kept alive
+http_client = HttpClient(
+    config["api"]["base_url"],
+    connect_timeout=config["api"]["timeout"]["connect"],
+    read_timeout=config["api"]["timeout"]["read"],
+    max_connections=config["api"]["pool"]["max_connections_per_host"]
+)
+
+async_http_client = AsyncHttpClient(
+    config["api"]["base_url"],
+    connect_timeout=config["api"]["timeout"]["connect"],
+    read_timeout=config["api"]["timeout"]["read"],
+    max_connections=config["api"]["pool"]["max_connections"],
+    max_connections_per_host=config["api"]["pool"]["max_connections_per_host"],
+    keepalive_timeout=config["api"]["pool"]["keepalive_timeout"]
+)
+
+# limits of concurrent asynchronous API requests
+fan_out = FanOut(
+    max_concurrency=config["fan_out"]["max_concurrency"],
+    max_concurrency_per_host=config["fan_out"]["max_concurrency_per_host"]
+)
+
+# circuits of API endpoint patterns shared by both clients, timeouts adapt to observed latencies
+circuit_breaker = CircuitBreaker(
+    failure_threshold=config["circuit_breaker"]["failure_threshold"],
+    recovery_time=config["circuit_breaker"]["recovery_time"],
+    min_timeout=config["circuit_breaker"]["min_timeout"],
+    max_timeout=config["api"]["timeout"]["read"],
+    timeout_multiplier=config["circuit_breaker"]["timeout_multiplier"],
+    percentile=config["circuit_breaker"]["percentile"],
+    window=config["circuit_breaker"]["window"],
+    min_samples=config["circuit_breaker"]["min_samples"]
+)
+
+# optional duplicates of slow asynchronous API requests within budget of extra load
+hedger = Hedger(
+    percentile=config["hedging"]["percentile"],
+    budget=config["hedging"]["budget"],
+    max_tokens=config["hedging"]["max_tokens"]
+) if config["hedging"]["enabled"] else None
+
+# registry of cache statistics, API latencies and circuits exposed by metrics endpoint
+metrics = Metrics()
+metrics.register_circuit_breaker(circuit_breaker)
 
 
 def get_response(query):
@@ -19,15 +74,39 @@ def get_response(query):
         dict: data from API
 
     """
-    base_url = "http://python-servers-vtnovk529892.codeanyapp.com:5000{}"
-    request = Request(base_url.format(query))
+    pattern = endpoint_pattern(query)
+
+    # fail fast while endpoint is failing, caches then serve stale records
+    admission = circuit_breaker.allow(pattern)
+
+    if not admission:
+        abort(503)
+
+    start = perf_counter()
+    succeeded = False
+    timed_out = False
 
     try:
-        response = urlopen(request).read()
-        return json.loads(response)
-    except HTTPError:
+        status, body = http_client.get(query, read_timeout=circuit_breaker.timeout(pattern, admission))
+        succeeded = status < 500
+    except OSError as error:
+        # timed out or unreachable API
+        timed_out = isinstance(error, socket.timeout)
+        abort(503)
+    finally:
+        latency = perf_counter() - start
+        metrics.observe_latency("sync", pattern, latency)
+        circuit_breaker.record(pattern, admission, succeeded, latency, timed_out)
+
+    # server errors must not be cached as missing records
+    if status >= 500:
+        abort(503)
+
+    if status >= 400:
         abort(404)
 
+    return json.loads(body)
+
 
 async def get_response_async(query):
     """Asynchronously get response to API request.
@@ -40,15 +119,68 @@ async def get_response_async(query):
         dict: data from API
 
     """
-    base_url = "http://python-servers-vtnovk529892.codeanyapp.com:5000{}"
+    pattern = endpoint_pattern(query)
+
+    # fail fast while endpoint is failing, caches then serve stale records
+    admission = circuit_breaker.allow(pattern)
+
+    if not admission:
+        abort(503)
+
+    # slow request can be duplicated by hedger
+    def request():
+        return async_http_client.get(query, read_timeout=circuit_breaker.timeout(pattern, admission))
+
+    # cancelled request is neither success nor failure
+    succeeded = None
+    timed_out = False
+    latency = None
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(base_url.format(query)) as response:
-                return await response.json()
-    except aiohttp.client_exceptions.ServerDisconnectedError:
+        async with fan_out.limit(async_http_client.base_url):
+            start = perf_counter()
+
+            try:
+                status, body = await (hedger.run(pattern, request) if hedger is not None else request())
+                succeeded = status < 500
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                # timed out, unreachable or disconnected API, only status 4xx means missing record
+                succeeded = False
+                timed_out = isinstance(error, asyncio.TimeoutError)
+                abort(503)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                succeeded = False
+                raise
+            finally:
+                latency = perf_counter() - start
+                metrics.observe_latency("async", pattern, latency)
+    finally:
+        circuit_breaker.record(pattern, admission, succeeded, latency, timed_out)
+
+    # server errors must not be cached as missing records
+    if status >= 500:
+        abort(503)
+
+    if status >= 400:
         abort(404)
 
+    return json.loads(body)
+
+
+def endpoint_pattern(query):
+    """Replace numeric parts of API request query, so requests of one endpoint share pattern.
+
+    Args:
+        query (str): API request query
+
+    Returns:
+        str: endpoint pattern, e.g. '/offers/{}/{}/{}'
+
+    """
+    return re.sub(r"/\d+", "/{}", query)
+
 
 def clean_string(text):
     """Clean and normalize text
@@ -70,6 +202,42 @@ def clean_string(text):
     return quote(text)
 
 
+def conditional_response(versions, max_age, render):
+    """Create response with ETag derived from versions of cached data behind the page.
+
+    When client already has the page with the same ETag, empty 304 response
+    is returned without rendering.
+
+    Args:
+        versions (tuple): versions of cached records rendered in the page
+        max_age (float): seconds the page is fresh in caches of clients, i.e. the smallest remaining lifetime
+            of its records, None forbids storing it
+        render (function): renders the page
+
+    Returns:
+        flask.Response: full or not modified response
+
+    """
+    # versions are derived from content of records, so ETag is the same in all worker processes
+    etag = sha1(repr(versions).encode()).hexdigest()
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+
+    response.set_etag(etag)
+
+    # page built from stale records is stored, but revalidated by its ETag
+    if max_age is None:
+        response.cache_control.no_store = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = int(max_age)
+
+    return response
+
+
 def url_for_page(page, kwargs={}):
     """Create url for target endpoint with page parameter.
 
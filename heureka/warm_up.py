@@ -0,0 +1,85 @@
+import os
+import pickle
+import asyncio
+from itertools import islice
+from api import (get_categories, get_category, get_products, get_products_count, get_product,
+                 get_product_summary_async)
+from config import config
+
+# API functions whose caches are persisted in snapshots
+cached_functions = (get_categories, get_category, get_products, get_products_count, get_product,
+                    get_product_summary_async)
+
+
+async def warm_up(categories_count):
+    """Load categories and first products page with summaries and products count of first categories.
+
+    Categories are loaded first, then all categories are warmed up concurrently.
+    Failed loads are not raised, so unavailable API does not prevent start.
+
+    Args:
+        categories_count (int): number of first categories to warm up
+
+    Returns:
+        int: number of failed loads
+
+    """
+    loop = asyncio.get_event_loop()
+    products_per_page = config["products"]["pagination"]["per_page"]
+
+    try:
+        categories = await loop.run_in_executor(None, get_categories)
+    except Exception:
+        return 1
+
+    async def warm_up_category(category_id):
+        products = await loop.run_in_executor(None, get_products, category_id, 0, products_per_page)
+        await asyncio.gather(*[get_product_summary_async(product) for product in products])
+
+    loads = []
+
+    for category_id in islice(categories, categories_count):
+        loads.append(warm_up_category(category_id))
+        loads.append(loop.run_in_executor(None, get_products_count, category_id))
+
+    results = await asyncio.gather(*loads, return_exceptions=True)
+    return sum(isinstance(result, Exception) for result in results)
+
+
+def dump_snapshot(path, functions=cached_functions):
+    """Save records of caches to file.
+
+    Note: File is replaced atomically, so it is never read half-written.
+
+    Args:
+        path (str): path to snapshot file
+        functions (tuple, optional): functions decorated by Cache or AsyncCache
+
+    """
+    snapshot = {func.__name__: func.cache.dump() for func in functions}
+    temporary_path = "{}.{}.tmp".format(path, os.getpid())
+
+    with open(temporary_path, "wb") as snapshot_file:
+        pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(temporary_path, path)
+
+
+def load_snapshot(path, functions=cached_functions):
+    """Load records of caches from file, records above lifetime are skipped.
+
+    Args:
+        path (str): path to snapshot file
+        functions (tuple, optional): functions decorated by Cache or AsyncCache
+
+    Returns:
+        int: number of loaded records, 0 when snapshot is missing or unreadable
+
+    """
+    try:
+        with open(path, "rb") as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return 0
+
+    return sum(func.cache.load(snapshot.get(func.__name__, [])) for func in functions)
@@ -0,0 +1,186 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import asyncio
+import unittest
+from AsyncCache import AsyncCache
+
+
+class TestAsyncCache(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_normal(self):
+        cache = AsyncCache(max_size=1)
+        calls = []
+
+        @cache
+        async def func(a, b=1):
+            calls.append((a, b))
+            return b
+
+        self.assertEqual(self.run_async(func(1, b=1)), 1)
+        self.assertEqual(self.run_async(func(1, b=1)), 1)
+        self.assertEqual(calls, [(1, 1)])
+
+        # overflow maximum size
+        self.assertEqual(self.run_async(func(1, b=2)), 2)
+        self.assertEqual(list(cache.cache.keys()), [(1, 2)])
+
+    def test_versioned(self):
+        cache = AsyncCache()
+
+        @cache
+        async def func(a):
+            return a
+
+        result, version = self.run_async(func.versioned(1))
+        self.assertEqual(result, 1)
+        self.assertEqual(self.run_async(func.versioned(1)), (1, version))
+        self.assertNotEqual(self.run_async(func.versioned(2))[1], version)
+
+    def test_prefetch(self):
+        cache = AsyncCache()
+        calls = []
+
+        @cache
+        async def func(a):
+            calls.append(a)
+            return a
+
+        self.assertEqual(self.run_async(func.prefetch(1)), 1)
+        self.assertEqual(self.run_async(func(1)), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(cache.stats["prefetch_hits"], 1)
+
+    def test_grouped_limited_max_lifetime(self):
+        cache = AsyncCache(max_lifetime=0.1, group_key="a")
+        calls = []
+
+        @cache
+        async def func(a, b=1):
+            calls.append((a, b))
+            return b
+
+        self.run_async(func(1))
+        self.run_async(asyncio.sleep(0.15))
+        self.run_async(func(1))
+        self.run_async(func(2))
+        self.assertEqual(calls, [(1, 1), (1, 1), (2, 1)])
+
+        self.run_async(asyncio.sleep(0.15))
+        self.run_async(func(3))
+        self.assertEqual({group: list(records) for group, records in cache.cache.items()},
+                         {1: [], 2: [], 3: [(3, 1)]})
+
+    def test_concurrent_misses_coalesced(self):
+        cache = AsyncCache(max_lifetime=60)
+        calls = []
+
+        @cache
+        async def func(a):
+            calls.append(a)
+            await asyncio.sleep(0.1)
+            return a
+
+        results = self.run_async(asyncio.gather(*[func(a) for a in [1] * 50 + [2] * 50]))
+
+        self.assertEqual(results, [1] * 50 + [2] * 50)
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(cache._in_flight, {})
+
+    def test_cancelled_caller_does_not_cancel_call(self):
+        cache = AsyncCache()
+        calls = []
+
+        @cache
+        async def func(a):
+            calls.append(a)
+            await asyncio.sleep(0.1)
+            return a
+
+        async def cancel_first():
+            first = asyncio.ensure_future(func(1))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await func(1)
+
+        self.assertEqual(self.run_async(cancel_first()), 1)
+        self.assertEqual(calls, [1])
+
+    def test_stale_while_revalidate(self):
+        cache = AsyncCache(max_lifetime=0.1, stale_ttl=1)
+        calls = []
+
+        @cache
+        async def func(a):
+            calls.append(a)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        self.assertEqual(self.run_async(func(1)), 1)
+        self.run_async(asyncio.sleep(0.15))
+
+        # stale record is served while being refreshed in background
+        self.assertEqual(self.run_async(func(1)), 1)
+        self.assertEqual(self.run_async(func(1)), 1)
+        self.run_async(asyncio.sleep(0.1))
+        self.assertEqual(self.run_async(func(1)), 2)
+        self.assertEqual(calls, [1, 1])
+
+    def test_serve_stale_on_error(self):
+        cache = AsyncCache(max_lifetime=0.1, serve_stale_on_error=True)
+        errors = []
+
+        @cache
+        async def func(a):
+            if errors:
+                raise errors[0]
+            return a
+
+        self.assertEqual(self.run_async(func(1)), 1)
+        errors.append(ValueError("upstream error"))
+        self.run_async(asyncio.sleep(0.15))
+
+        self.assertEqual(self.run_async(func(1)), 1)
+
+        with self.assertRaises(ValueError):
+            self.run_async(func(2))
+
+
+    def test_negative_caching(self):
+        cache = AsyncCache(max_lifetime=60, negative_ttl=60, negative_exceptions=(KeyError,),
+                           is_negative=lambda value: not value)
+        calls = []
+
+        @cache
+        async def func(a):
+            calls.append(a)
+
+            if a < 0:
+                raise KeyError(a)
+
+            return list(range(a))
+
+        for _ in range(3):
+            with self.assertRaises(KeyError):
+                self.run_async(func(-1))
+
+        self.assertEqual(self.run_async(func(0)), [])
+        self.assertEqual(self.run_async(func.versioned(0))[0], [])
+        self.assertEqual(self.run_async(func(2)), [0, 1])
+        self.assertEqual(calls, [-1, 0, 2])
+        self.assertEqual(cache.records_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,19 @@
 import sys
 
 sys.path.append("..")
+sys.path.append("../benchmarks")
 
+import pickle
 import unittest
 from io import StringIO
 from contextlib import contextmanager
 from time import sleep
-from heureka.Cache import Cache
+from random import Random
+from json import dumps
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from heureka.Cache import Cache, FrozenDict, approximate_size, freeze
+from bench_cache import get_args_kwargs_dict
 
 
 @contextmanager
@@ -38,19 +45,56 @@ class TestCache(unittest.TestCase):
         def func(a, b, c=3, d=4):
             pass
 
-        cache = Cache()
         args = [1, 2]
 
         # default keyword argument value
         kwargs = {}
-        result = cache._get_args_kwargs_dict(func, *args, **kwargs)
+        result = get_args_kwargs_dict(func, *args, **kwargs)
         self.assertEqual(result, {"a": 1, "b": 2, "c": 3, "d": 4})
 
         # supplied keyword argument value
         kwargs = {"c": 4}
-        result = cache._get_args_kwargs_dict(func, *args, **kwargs)
+        result = get_args_kwargs_dict(func, *args, **kwargs)
         self.assertEqual(result, {"a": 1, "b": 2, "c": 4, "d": 4})
 
+    def test_compile_key(self):
+        def func(a, b, c=3, d=4):
+            pass
+
+        make_key = Cache()._compile_key(func)
+        self.assertEqual(make_key((1, 2), {}), (None, (1, 2, 3, 4)))
+        self.assertEqual(make_key((1,), {"b": 2, "d": 5}), (None, (1, 2, 3, 5)))
+        self.assertEqual(make_key((1, 2, 3, 4), {}), (None, (1, 2, 3, 4)))
+
+        # group is taken from bound argument values
+        make_key = Cache(group_key="c")._compile_key(func)
+        self.assertEqual(make_key((1, 2), {"c": 5}), (5, (1, 2, 5, 4)))
+
+        # custom key function
+        make_key = Cache(group_key="a", key_fn=lambda a, b, **kwargs: b)._compile_key(func)
+        self.assertEqual(make_key((1, 2), {"c": 5}), (1, 2))
+
+        # variadic parameters
+        def variadic(a, *args, b=2, **kwargs):
+            pass
+
+        make_key = Cache()._compile_key(variadic)
+        self.assertEqual(make_key((1, 5), {"c": 3}), (None, (1, (5,), 2, (("c", 3),))))
+
+        with self.assertRaises(ValueError):
+            Cache(group_key="e")._compile_key(func)
+
+    def test_unserializable_args(self):
+        cache = Cache()
+
+        @cache
+        def func(a, b=1):
+            return b
+
+        # arguments which are not JSON serializable but hashable
+        self.assertEqual(func(frozenset([1, 2]), b=date(2018, 1, 1)), date(2018, 1, 1))
+        self.assertEqual(list(cache.cache.keys()), [(frozenset([1, 2]), date(2018, 1, 1))])
+
     def test_normal(self):
         cache = Cache()
 
@@ -61,16 +105,17 @@ class TestCache(unittest.TestCase):
 
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}'], "inside func(1, b=1)")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 1)], "inside func(1, b=1)")
 
         with captured_output() as out:
             result = func(1, b=2)
-        self.assert_multiple_normal(result, cache, out, 2, ['{"a": 1, "b": 1}', '{"a": 1, "b": 2}'],
+        self.assert_multiple_normal(result, cache, out, 2, [(1, 1), (1, 2)],
                                     "inside func(1, b=2)")
 
+        # hit moves record to the end
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}', '{"a": 1, "b": 2}'], "")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 2), (1, 1)], "")
 
     def test_normal_limited_max_size(self):
         cache = Cache(max_size=1)
@@ -82,17 +127,17 @@ class TestCache(unittest.TestCase):
 
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}'], "inside func(1, b=1)")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 1)], "inside func(1, b=1)")
 
         # overflow maximum size
         with captured_output() as out:
             result = func(1, b=2)
-        self.assert_multiple_normal(result, cache, out, 2, ['{"a": 1, "b": 2}'], "inside func(1, b=2)")
+        self.assert_multiple_normal(result, cache, out, 2, [(1, 2)], "inside func(1, b=2)")
 
         # overflow maximum size again
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}'], "inside func(1, b=1)")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 1)], "inside func(1, b=1)")
 
     def test_normal_limited_max_lifetime(self):
         cache = Cache(max_lifetime=0.1)
@@ -105,20 +150,20 @@ class TestCache(unittest.TestCase):
         # replacement
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}'], "inside func(1, b=1)")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 1)], "inside func(1, b=1)")
 
         sleep(0.15)
 
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}'], "inside func(1, b=1)")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 1)], "inside func(1, b=1)")
 
         sleep(0.15)
 
         # invalidation
         with captured_output() as out:
             result = func(1, b=2)
-        self.assert_multiple_normal(result, cache, out, 2, ['{"a": 1, "b": 2}'], "inside func(1, b=2)")
+        self.assert_multiple_normal(result, cache, out, 2, [(1, 2)], "inside func(1, b=2)")
 
     def test_normal_mixed(self):
         cache = Cache(max_size=2, max_lifetime=0.1)
@@ -130,17 +175,17 @@ class TestCache(unittest.TestCase):
 
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_normal(result, cache, out, 1, ['{"a": 1, "b": 1}'], "inside func(1, b=1)")
+        self.assert_multiple_normal(result, cache, out, 1, [(1, 1)], "inside func(1, b=1)")
 
         with captured_output() as out:
             result = func(1, b=2)
-        self.assert_multiple_normal(result, cache, out, 2, ['{"a": 1, "b": 1}', '{"a": 1, "b": 2}'],
+        self.assert_multiple_normal(result, cache, out, 2, [(1, 1), (1, 2)],
                                     "inside func(1, b=2)")
 
         # overflow maximum size
         with captured_output() as out:
             result = func(1, b=3)
-        self.assert_multiple_normal(result, cache, out, 3, ['{"a": 1, "b": 2}', '{"a": 1, "b": 3}'],
+        self.assert_multiple_normal(result, cache, out, 3, [(1, 2), (1, 3)],
                                     "inside func(1, b=3)")
 
         sleep(0.15)
@@ -148,7 +193,142 @@ class TestCache(unittest.TestCase):
         # replace and invalidate
         with captured_output() as out:
             result = func(1, b=3)
-        self.assert_multiple_normal(result, cache, out, 3, ['{"a": 1, "b": 3}'], "inside func(1, b=3)")
+        self.assert_multiple_normal(result, cache, out, 3, [(1, 3)], "inside func(1, b=3)")
+
+    def test_normal_lru_eviction(self):
+        cache = Cache(max_size=2)
+
+        @cache
+        def func(a):
+            return a
+
+        func(1)
+        func(2)
+        func(1)
+
+        # least recently used record is evicted
+        func(3)
+        self.assertEqual(list(cache.cache.keys()), [(1,), (3,)])
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 3, "evictions": 1})
+        self.assertIs(func.cache, cache)
+
+    def test_normal_limited_max_bytes(self):
+        cache = Cache(max_bytes=10, sizer=len)
+
+        @cache
+        def func(a):
+            return "x" * a
+
+        func(4)
+        func(5)
+        self.assertEqual(cache.sizes, {None: 9})
+
+        # evict records until new one fits
+        func(6)
+        self.assertEqual(list(cache.cache.keys()), [(6,)])
+        self.assertEqual(cache.sizes, {None: 6})
+        self.assertEqual(cache.stats["evictions"], 2)
+
+        # record larger than the limit is not cached
+        self.assertEqual(func(11), "x" * 11)
+        self.assertEqual(list(cache.cache.keys()), [(6,)])
+
+    def test_approximate_size(self):
+        self.assertEqual(approximate_size("abc"), sys.getsizeof("abc"))
+        self.assertGreater(approximate_size([{"price": 1.0, "title": "abc"}] * 10), 10 * sys.getsizeof("abc"))
+
+    def test_freeze(self):
+        frozen = freeze({"a": [{"b": 1}], "c": {2}})
+        self.assertEqual(frozen, {"a": ({"b": 1},), "c": frozenset([2])})
+        self.assertIsInstance(frozen["a"][0], FrozenDict)
+
+        with self.assertRaises(TypeError):
+            frozen["a"] = 1
+        with self.assertRaises(TypeError):
+            frozen["a"][0].update(b=2)
+
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)), frozen)
+        self.assertEqual(dumps(freeze({"a": [{"b": 1}]})), '{"a": [{"b": 1}]}')
+
+    def test_normal_frozen(self):
+        cache = Cache(frozen=True)
+
+        @cache
+        def func(a):
+            return [{"a": a}]
+
+        result = func(1)
+        self.assertIs(func(1), result)
+
+        with self.assertRaises(TypeError):
+            result[0]["a"] = 2
+
+    def test_versioned(self):
+        cache = Cache(max_lifetime=0.1)
+        results = {1: "a"}
+
+        @cache
+        def func(a):
+            return results.get(a, a)
+
+        result, version = func.versioned(1)
+        self.assertEqual(result, "a")
+        self.assertEqual(func.versioned(1), ("a", version))
+        self.assertNotEqual(func.versioned(2)[1], version)
+
+        # replaced record with equal content keeps version, e.g. in another process
+        sleep(0.15)
+        self.assertEqual(func.versioned(1)[1], version)
+        self.assertEqual(Cache()(lambda a: "a").versioned(1)[1], version)
+
+        # changed content gets new version
+        results[1] = "b"
+        sleep(0.15)
+        self.assertNotEqual(func.versioned(1)[1], version)
+
+    def test_prefetch(self):
+        cache = Cache()
+        calls = []
+
+        @cache
+        def func(a):
+            calls.append(a)
+            return a
+
+        self.assertEqual(func.prefetch(1), 1)
+        self.assertEqual(func.prefetch(1), 1)
+        self.assertEqual(calls, [1])
+
+        # only first hit of prefetched record is counted
+        func(1)
+        func(1)
+        self.assertEqual(cache.stats["prefetches"], 1)
+        self.assertEqual(cache.stats["prefetch_hits"], 1)
+
+    def test_dump_load(self):
+        cache = Cache(max_lifetime=0.2, shards=2)
+
+        @cache
+        def func(a):
+            return a
+
+        func("a")
+        sleep(0.15)
+        func("b")
+        records = pickle.loads(pickle.dumps(cache.dump()))
+        self.assertEqual(sorted(data for _, _, data, _ in records), ["a", "b"])
+
+        # record above lifetime is skipped
+        loaded_cache = Cache(max_lifetime=0.2, shards=2)
+        sleep(0.1)
+        self.assertEqual(loaded_cache.load(records), 1)
+
+        @loaded_cache
+        def loaded_func(a):
+            return None
+
+        self.assertEqual(loaded_func("b"), "b")
+        self.assertIsNone(loaded_func("a"))
 
     def test_grouped(self):
         cache = Cache(group_key="a")
@@ -161,25 +341,25 @@ class TestCache(unittest.TestCase):
         # add to first group
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 1}']}, "inside func(1, b=1)", [1])
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 1)]}, "inside func(1, b=1)", [1])
 
         with captured_output() as out:
             result = func(1, b=2)
-        self.assert_multiple_grouped(result, cache, out, 2, {1: ['{"a": 1, "b": 1}', '{"a": 1, "b": 2}']},
+        self.assert_multiple_grouped(result, cache, out, 2, {1: [(1, 1), (1, 2)]},
                                      "inside func(1, b=2)", [1])
 
         # add to second group
         with captured_output() as out:
             result = func(2)
         self.assert_multiple_grouped(result, cache, out, 1,
-                                     {1: ['{"a": 1, "b": 1}', '{"a": 1, "b": 2}'], 2: ['{"a": 2, "b": 1}']},
+                                     {1: [(1, 1), (1, 2)], 2: [(2, 1)]},
                                      "inside func(2, b=1)", [1, 2])
 
         # retrieve from first group
         with captured_output() as out:
             result = func(1, b=1)
         self.assert_multiple_grouped(result, cache, out, 1,
-                                     {1: ['{"a": 1, "b": 1}', '{"a": 1, "b": 2}'], 2: ['{"a": 2, "b": 1}']}, "", [1, 2])
+                                     {1: [(1, 2), (1, 1)], 2: [(2, 1)]}, "", [1, 2])
 
     def test_grouped_limited_max_size(self):
         cache = Cache(max_size=1, group_key="a")
@@ -192,23 +372,23 @@ class TestCache(unittest.TestCase):
         # add to first group
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 1}']}, "inside func(1, b=1)", [1])
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 1)]}, "inside func(1, b=1)", [1])
 
         # overflow maximum size in first group
         with captured_output() as out:
             result = func(1, b=2)
-        self.assert_multiple_grouped(result, cache, out, 2, {1: ['{"a": 1, "b": 2}']}, "inside func(1, b=2)", [1])
+        self.assert_multiple_grouped(result, cache, out, 2, {1: [(1, 2)]}, "inside func(1, b=2)", [1])
 
         # add to second group
         with captured_output() as out:
             result = func(2)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 2}'], 2: ['{"a": 2, "b": 1}']},
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 2)], 2: [(2, 1)]},
                                      "inside func(2, b=1)", [1, 2])
 
         # overflow maximum size in first group
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 1}'], 2: ['{"a": 2, "b": 1}']},
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 1)], 2: [(2, 1)]},
                                      "inside func(1, b=1)", [1, 2])
 
     def test_grouped_limited_max_lifetime(self):
@@ -222,19 +402,19 @@ class TestCache(unittest.TestCase):
         # add to first group
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 1}']}, "inside func(1, b=1)", [1])
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 1)]}, "inside func(1, b=1)", [1])
 
         sleep(0.15)
 
         # replacement in first group
         with captured_output() as out:
             result = func(1, b=1)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 1}']}, "inside func(1, b=1)", [1])
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 1)]}, "inside func(1, b=1)", [1])
 
         # add to second group
         with captured_output() as out:
             result = func(2)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: ['{"a": 1, "b": 1}'], 2: ['{"a": 2, "b": 1}']},
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [(1, 1)], 2: [(2, 1)]},
                                      "inside func(2, b=1)", [1, 2])
 
         sleep(0.15)
@@ -242,9 +422,235 @@ class TestCache(unittest.TestCase):
         # invalidate
         with captured_output() as out:
             result = func(3)
-        self.assert_multiple_grouped(result, cache, out, 1, {1: [], 2: [], 3: ['{"a": 3, "b": 1}']},
+        self.assert_multiple_grouped(result, cache, out, 1, {1: [], 2: [], 3: [(3, 1)]},
                                      "inside func(3, b=1)", [1, 2, 3])
 
+    def test_invalidation_batch(self):
+        cache = Cache(max_lifetime=0.1, invalidation_batch=2)
+
+        @cache
+        def func(a, b=1):
+            return b
+
+        for b in range(5):
+            func(1, b=b)
+
+        sleep(0.15)
+
+        # each call invalidates at most two expired records
+        func(2)
+        self.assertEqual(len(cache.cache), 4)
+        func(2)
+        self.assertEqual(len(cache.cache), 2)
+        func(2)
+        self.assertEqual(list(cache.cache.keys()), [(2, 1)])
+
+    def test_concurrent_misses_coalesced(self):
+        cache = Cache(max_lifetime=60)
+        calls = []
+
+        @cache
+        def func(a):
+            calls.append(a)
+            sleep(0.1)
+            return a
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(func, [1] * 20 + [2] * 20))
+
+        self.assertEqual(results, [1] * 20 + [2] * 20)
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(cache._key_locks, {})
+
+    def test_sharded(self):
+        cache = Cache(max_size=4, shards=2)
+
+        @cache
+        def func(a):
+            return a
+
+        for a in range(10):
+            func(a)
+
+        # records are distributed by hash of their key, limit is divided among shards
+        self.assertEqual(sorted(cache.cache.keys()), [0, 1])
+        for shard, records in cache.cache.items():
+            self.assertLessEqual(len(records), 2)
+            for key in records:
+                self.assertEqual(hash(key) % 2, shard)
+
+    def test_thread_safety_stress(self):
+        def hammer(cache):
+            @cache
+            def get_products(category_id, offset=0, limit=5):
+                sleep(0.0001)
+                return [category_id, offset, limit]
+
+            def worker(seed):
+                random = Random(seed)
+                for _ in range(300):
+                    category_id, offset = random.randrange(8), random.randrange(6) * 5
+                    self.assertEqual(get_products(category_id, offset), [category_id, offset, 5])
+
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                list(executor.map(worker, range(32)))
+
+            for group, subcache in cache.cache.items():
+                self.assertLessEqual(len(subcache), 3)
+                self.assertEqual(cache.sizes[group], sum(record["size"] for record in subcache.values()))
+
+        hammer(Cache(max_size=3, max_lifetime=0.01, group_key="category_id", max_bytes=10 ** 6))
+        hammer(Cache(max_size=3 * 8, max_lifetime=0.01, shards=8, max_bytes=10 ** 6))
+
+    def test_stale_while_revalidate(self):
+        cache = Cache(max_lifetime=0.1, stale_ttl=1)
+        calls = []
+
+        @cache
+        def func(a):
+            calls.append(a)
+            sleep(0.05)
+            return len(calls)
+
+        self.assertEqual(func(1), 1)
+        sleep(0.15)
+
+        # stale record is served while being refreshed in background
+        self.assertEqual(func(1), 1)
+        self.assertEqual(func(1), 1)
+        sleep(0.1)
+        self.assertEqual(func(1), 2)
+        self.assertEqual(calls, [1, 1])
+
+    def test_serve_stale_on_error(self):
+        cache = Cache(max_lifetime=0.1, stale_ttl=1, serve_stale_on_error=True)
+        errors = []
+
+        @cache
+        def func(a):
+            if errors:
+                raise errors[0]
+            return a
+
+        self.assertEqual(func(1), 1)
+        errors.append(ValueError("upstream error"))
+        sleep(0.15)
+
+        # failed background refresh keeps stale record
+        self.assertEqual(func(1), 1)
+        sleep(0.05)
+        self.assertEqual(func(1), 1)
+        self.assertEqual(list(cache.cache.keys()), [(1,)])
+
+        # records which were not cached raise
+        with self.assertRaises(ValueError):
+            func(2)
+
+        # blocking refresh beyond stale window serves stale record too
+        cache.stale_ttl = 0
+        self.assertEqual(func(1), 1)
+
+    def test_negative_caching(self):
+        cache = Cache(max_size=10, max_lifetime=60, negative_ttl=0.1, negative_exceptions=(KeyError,),
+                      is_negative=lambda value: not value, negative_max_size=2)
+        calls = []
+
+        @cache
+        def func(a):
+            calls.append(a)
+
+            if a < 0:
+                raise KeyError(a)
+
+            return list(range(a))
+
+        # missing records raise cached exception without calling function again
+        for _ in range(3):
+            with self.assertRaises(KeyError):
+                func(-1)
+
+        # empty values are returned from negative records
+        self.assertEqual(func(0), [])
+        self.assertEqual(func(0), [])
+        self.assertEqual(calls, [-1, 0])
+        self.assertEqual(cache.stats["negative_hits"], 3)
+        self.assertEqual(cache.records_count, 0)
+
+        # other exceptions are not cached
+        with self.assertRaises(TypeError):
+            func(None)
+
+        with self.assertRaises(TypeError):
+            func(None)
+
+        self.assertEqual(calls, [-1, 0, None, None])
+
+        # negative records are limited separately, so they do not evict valid records
+        self.assertEqual(func(3), [0, 1, 2])
+
+        for a in range(-2, -5, -1):
+            with self.assertRaises(KeyError):
+                func(a)
+
+        self.assertEqual(len(cache.negatives), 2)
+        self.assertEqual(cache.stats["negative_evictions"], 3)
+        self.assertEqual(list(cache.cache.keys()), [(3,)])
+
+        # negative records expire after their own lifetime
+        with self.assertRaises(KeyError):
+            func(-4)
+
+        sleep(0.15)
+
+        with self.assertRaises(KeyError):
+            func(-4)
+
+        self.assertEqual(calls.count(-4), 2)
+
+    def test_stats_of_concurrent_calls(self):
+        cache = Cache(max_lifetime=60)
+
+        @cache
+        def func(a):
+            return a
+
+        func(1)
+
+        def hit(_):
+            for _ in range(2000):
+                func(1)
+
+        # hits of request threads are all counted
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(hit, range(8)))
+
+        self.assertEqual(cache.collect_stats(), {"misses": 1, "hits": 8 * 2000})
+
+    def test_conditional(self):
+        cache = Cache(max_lifetime=0.2, stale_ttl=10, negative_ttl=0.05, is_negative=lambda value: not value)
+
+        @cache
+        def func(a):
+            return list(range(a))
+
+        # remaining lifetime decreases with age of record
+        data, version, max_age = func.conditional(2)
+        self.assertEqual((data, version), func.versioned(2))
+        self.assertTrue(0.15 < max_age <= 0.2)
+
+        sleep(0.1)
+        self.assertTrue(0.05 < func.conditional(2)[2] <= 0.1)
+
+        # negative records expire after their own lifetime
+        self.assertTrue(0 < func.conditional(0)[2] <= 0.05)
+
+        # record served stale is expired already
+        sleep(0.15)
+        self.assertEqual(func.conditional(2), ([0, 1], version, 0))
+
+        # records without lifetime do not expire
+        self.assertIsNone(Cache()(func).conditional(2)[2])
+
 
 if __name__ == "__main__":
     unittest.main()
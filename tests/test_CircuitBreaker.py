@@ -0,0 +1,153 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import unittest
+from time import sleep
+from CircuitBreaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN, REQUEST, PROBE
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def record_failures(self, circuit_breaker, key, count):
+        for _ in range(count):
+            admission = circuit_breaker.allow(key)
+            self.assertTrue(admission)
+            circuit_breaker.record(key, admission, False)
+
+    def test_open_after_consecutive_failures(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=3, recovery_time=10)
+
+        # success resets count of failures
+        self.record_failures(circuit_breaker, "/product/{}", 2)
+        circuit_breaker.record("/product/{}", circuit_breaker.allow("/product/{}"), True, 0.01)
+        self.record_failures(circuit_breaker, "/product/{}", 2)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], CLOSED)
+
+        self.record_failures(circuit_breaker, "/product/{}", 1)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], OPEN)
+        self.assertIsNone(circuit_breaker.allow("/product/{}"))
+
+        # circuits of other patterns are independent
+        self.assertEqual(circuit_breaker.allow("/category/{}"), REQUEST)
+
+    def test_half_open_probe(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=1, recovery_time=0.05)
+        self.record_failures(circuit_breaker, "/product/{}", 1)
+        self.assertIsNone(circuit_breaker.allow("/product/{}"))
+
+        sleep(0.06)
+
+        # only single probe is let through
+        self.assertEqual(circuit_breaker.allow("/product/{}"), PROBE)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], HALF_OPEN)
+        self.assertIsNone(circuit_breaker.allow("/product/{}"))
+
+        # failed probe opens circuit again
+        circuit_breaker.record("/product/{}", PROBE, False)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], OPEN)
+        self.assertIsNone(circuit_breaker.allow("/product/{}"))
+
+        sleep(0.06)
+
+        # successful probe closes circuit
+        self.assertEqual(circuit_breaker.allow("/product/{}"), PROBE)
+        circuit_breaker.record("/product/{}", PROBE, True, 0.01)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], CLOSED)
+        self.assertEqual(circuit_breaker.allow("/product/{}"), REQUEST)
+
+    def test_cancelled_probe(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=1, recovery_time=0.05)
+        self.record_failures(circuit_breaker, "/product/{}", 1)
+
+        sleep(0.06)
+
+        # cancelled probe lets another one through
+        self.assertEqual(circuit_breaker.allow("/product/{}"), PROBE)
+        circuit_breaker.record("/product/{}", PROBE, None)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], HALF_OPEN)
+        self.assertEqual(circuit_breaker.allow("/product/{}"), PROBE)
+
+    def test_old_request_finished_while_half_open(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=1, recovery_time=0.05)
+
+        # requests admitted while circuit is closed, one of them fails and opens it
+        old_admissions = [circuit_breaker.allow("/product/{}") for _ in range(3)]
+        circuit_breaker.record("/product/{}", old_admissions[0], False)
+
+        sleep(0.06)
+        self.assertEqual(circuit_breaker.allow("/product/{}"), PROBE)
+
+        # results of old requests neither close or reopen circuit nor let another probe through
+        circuit_breaker.record("/product/{}", old_admissions[1], True, 0.01)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], HALF_OPEN)
+        self.assertIsNone(circuit_breaker.allow("/product/{}"))
+
+        circuit_breaker.record("/product/{}", old_admissions[2], False)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], HALF_OPEN)
+        self.assertIsNone(circuit_breaker.allow("/product/{}"))
+
+        # only probe closes circuit
+        circuit_breaker.record("/product/{}", PROBE, True, 0.01)
+        self.assertEqual(circuit_breaker.states()["/product/{}"][0], CLOSED)
+
+    def test_adaptive_timeout(self):
+        circuit_breaker = CircuitBreaker(min_timeout=0.1, max_timeout=5, timeout_multiplier=2, percentile=90,
+                                         window=100, min_samples=20)
+
+        # maximum timeout is used until enough latencies are observed
+        for _ in range(10):
+            circuit_breaker.record("/product/{}", REQUEST, True, 0.2)
+
+        self.assertEqual(circuit_breaker.timeout("/product/{}"), 5)
+
+        for _ in range(10):
+            circuit_breaker.record("/product/{}", REQUEST, True, 0.3)
+
+        self.assertAlmostEqual(circuit_breaker.timeout("/product/{}"), 0.6)
+
+        # timeout is bounded by minimum
+        for _ in range(100):
+            circuit_breaker.record("/product/{}", REQUEST, True, 0.01)
+
+        self.assertAlmostEqual(circuit_breaker.timeout("/product/{}"), 0.1)
+
+        # latencies of failed requests are not observed
+        for _ in range(100):
+            circuit_breaker.record("/product/{}", REQUEST, False, 10)
+            circuit_breaker.record("/product/{}", REQUEST, True, 0.01)
+
+        self.assertAlmostEqual(circuit_breaker.timeout("/product/{}"), 0.1)
+
+    def test_recovery_of_slower_endpoint(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=2, recovery_time=0.05, min_timeout=0.5, max_timeout=10,
+                                         timeout_multiplier=3, min_samples=20)
+
+        # fast endpoint shrinks timeout to minimum
+        for _ in range(100):
+            circuit_breaker.record("/product/{}", REQUEST, True, 0.01)
+
+        self.assertAlmostEqual(circuit_breaker.timeout("/product/{}"), 0.5)
+
+        # endpoint answers in 0.7 s, so requests time out, their failures widen timeout
+        for _ in range(2):
+            admission = circuit_breaker.allow("/product/{}")
+            self.assertEqual(admission, REQUEST)
+            circuit_breaker.record("/product/{}", admission, False, timed_out=True)
+
+        self.assertEqual(circuit_breaker.states()["/product/{}"], (OPEN, 2))
+
+        # probe is sent with maximum timeout and its success closes circuit
+        sleep(0.06)
+        self.assertEqual(circuit_breaker.allow("/product/{}"), PROBE)
+        self.assertEqual(circuit_breaker.timeout("/product/{}", PROBE), 10)
+        circuit_breaker.record("/product/{}", PROBE, True, 0.7)
+        self.assertEqual(circuit_breaker.states()["/product/{}"], (CLOSED, 2))
+
+        # other failures do not widen timeout
+        circuit_breaker.record("/product/{}", REQUEST, False)
+        self.assertEqual(circuit_breaker.timeout("/product/{}"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import asyncio
+import unittest
+from FanOut import FanOut
+
+
+class TestFanOut(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_gather_deadline(self):
+        fan_out = FanOut()
+        finished = []
+
+        async def sleep(seconds):
+            await asyncio.sleep(seconds)
+            finished.append(seconds)
+            return seconds
+
+        results = self.run_async(fan_out.gather([sleep(0), sleep(0.01), sleep(0.2)], timeout=0.1, default=-1))
+        self.assertEqual(results, [0, 0.01, -1])
+
+        # late awaitable keeps running
+        self.run_async(asyncio.sleep(0.2))
+        self.assertEqual(finished, [0, 0.01, 0.2])
+
+    def test_gather_raises(self):
+        fan_out = FanOut()
+
+        async def fail():
+            raise ValueError("error")
+
+        with self.assertRaises(ValueError):
+            self.run_async(fan_out.gather([fail()], timeout=1))
+
+    def test_limit(self):
+        fan_out = FanOut(max_concurrency=3, max_concurrency_per_host=2)
+        running = {"a": 0, "b": 0}
+        max_running = []
+
+        async def request(host):
+            async with fan_out.limit("http://{}:5000/offers".format(host)):
+                running[host] += 1
+                max_running.append((running["a"], running["a"] + running["b"]))
+                await asyncio.sleep(0.01)
+                running[host] -= 1
+
+        self.run_async(fan_out.gather([request(host) for host in "aaaabbbb"]))
+
+        # at most two requests to one host and three in total
+        self.assertEqual(max(per_host for per_host, _ in max_running), 2)
+        self.assertEqual(max(total for _, total in max_running), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import asyncio
+import unittest
+from Hedger import Hedger
+
+
+class TestHedger(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def make_request(self, delays, sent):
+        async def respond(delay):
+            if delay is None:
+                raise ValueError("failed request")
+
+            await asyncio.sleep(delay)
+            return delay
+
+        def request():
+            delay = delays[len(sent)]
+            sent.append(delay)
+            return respond(delay)
+
+        return request
+
+    def test_delay_by_percentile(self):
+        hedger = Hedger(percentile=90, min_samples=20)
+
+        for latency in range(10):
+            hedger.observe("/offers/{}/{}/{}", latency)
+
+        self.assertIsNone(hedger.delay("/offers/{}/{}/{}"))
+
+        for latency in range(10, 20):
+            hedger.observe("/offers/{}/{}/{}", latency)
+
+        self.assertEqual(hedger.delay("/offers/{}/{}/{}"), 18)
+        self.assertIsNone(hedger.delay("/product/{}"))
+
+    def test_hedge_slow_request(self):
+        hedger = Hedger(budget=1, max_tokens=1)
+        hedger.delays["/offers/{}/{}/{}"] = 0.02
+        sent = []
+
+        # duplicate finishes before slow original, which is cancelled
+        result = self.run_async(hedger.run("/offers/{}/{}/{}", self.make_request([1, 0.01], sent)))
+        self.assertEqual(result, 0.01)
+        self.assertEqual(sent, [1, 0.01])
+        self.assertEqual(hedger.stats["hedges"], 1)
+        self.assertEqual(hedger.stats["hedge_wins"], 1)
+
+        # fast request is not duplicated
+        sent = []
+        self.assertEqual(self.run_async(hedger.run("/offers/{}/{}/{}", self.make_request([0.01], sent))), 0.01)
+        self.assertEqual(sent, [0.01])
+
+    def test_failed_request(self):
+        hedger = Hedger(budget=1, max_tokens=1)
+        hedger.delays["/offers/{}/{}/{}"] = 0.01
+        sent = []
+
+        # failure of duplicate does not hide result of original
+        result = self.run_async(hedger.run("/offers/{}/{}/{}", self.make_request([0.05, None], sent)))
+        self.assertEqual(result, 0.05)
+
+        sent = []
+
+        with self.assertRaises(ValueError):
+            self.run_async(hedger.run("/offers/{}/{}/{}", self.make_request([None], sent)))
+
+    def test_budget(self):
+        hedger = Hedger(budget=0.25, max_tokens=1)
+        hedger.delays["/offers/{}/{}/{}"] = 0.001
+        sent = []
+
+        # every fourth slow request can be duplicated
+        for _ in range(8):
+            self.run_async(hedger.run("/offers/{}/{}/{}", self.make_request([0.005, 0.005], sent)))
+            sent = []
+
+        self.assertEqual(hedger.stats["requests"], 8)
+        self.assertEqual(hedger.stats["hedges"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
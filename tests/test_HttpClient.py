@@ -0,0 +1,97 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+sys.path.append("../benchmarks")
+
+import socket
+import unittest
+from time import sleep
+from threading import Thread
+from http.server import BaseHTTPRequestHandler
+from stub_api import ThreadingServer
+from HttpClient import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    client_ports = set()
+
+    def do_GET(self):
+        self.client_ports.add(self.client_address[1])
+
+        if self.path == "/slow":
+            sleep(0.2)
+
+        status = 404 if self.path == "/missing" else 200
+        body = self.path.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        Handler.client_ports = set()
+        self.server = ThreadingServer(("127.0.0.1", 0), Handler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get(self):
+        client = HttpClient(self.base_url)
+        self.assertEqual(client.get("/categories"), (200, b"/categories"))
+        self.assertEqual(client.get("/missing"), (404, b"/missing"))
+        client.close()
+
+    def test_keep_alive(self):
+        client = HttpClient(self.base_url)
+
+        for _ in range(10):
+            client.get("/categories")
+
+        # all requests were sent over one connection
+        self.assertEqual(len(Handler.client_ports), 1)
+        client.close()
+
+    def test_reconnect_closed_connection(self):
+        client = HttpClient(self.base_url)
+        client.get("/categories")
+
+        # idle connection is dropped
+        client._idle[0].sock.shutdown(socket.SHUT_RDWR)
+
+        self.assertEqual(client.get("/categories"), (200, b"/categories"))
+        client.close()
+
+    def test_read_timeout(self):
+        client = HttpClient(self.base_url, read_timeout=0.05)
+
+        with self.assertRaises(socket.timeout):
+            client.get("/slow")
+
+        self.assertEqual(client._idle, [])
+
+    def test_request_read_timeout(self):
+        client = HttpClient(self.base_url, read_timeout=5)
+
+        with self.assertRaises(socket.timeout):
+            client.get("/slow", read_timeout=0.05)
+
+        # timeout of request does not stick to pooled connection
+        self.assertEqual(client.get("/categories"), (200, b"/categories"))
+        self.assertEqual(client.get("/slow"), (200, b"/slow"))
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
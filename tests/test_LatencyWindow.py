@@ -0,0 +1,30 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import unittest
+from LatencyWindow import LatencyWindow
+
+
+class TestLatencyWindow(unittest.TestCase):
+    def test_percentile(self):
+        window = LatencyWindow(size=20, percentile=90, min_samples=10, update_interval=5)
+
+        # percentile is not computed until enough latencies are observed
+        self.assertEqual([window.observe(latency) for latency in range(9)], [None] * 9)
+
+        # then it is recomputed every update interval
+        self.assertEqual(window.observe(9), 9)
+        self.assertEqual([window.observe(latency) for latency in range(10, 15)], [None] * 4 + [13])
+
+        # only recent latencies are kept
+        for _ in range(19):
+            window.observe(1)
+
+        self.assertEqual(len(window.latencies), 20)
+        self.assertEqual(window.observe(1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
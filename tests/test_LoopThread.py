@@ -0,0 +1,50 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import asyncio
+import unittest
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from LoopThread import LoopThread
+
+
+class TestLoopThread(unittest.TestCase):
+    def setUp(self):
+        self.loop_thread = LoopThread(max_workers=2)
+
+    def tearDown(self):
+        self.loop_thread.stop()
+
+    def test_run(self):
+        async def add(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertEqual(self.loop_thread.run(add(1, 2)), 3)
+
+    def test_run_raises(self):
+        async def fail():
+            raise ValueError("error")
+
+        with self.assertRaises(ValueError):
+            self.loop_thread.run(fail())
+
+    def test_concurrent_callers(self):
+        async def wait(a):
+            await asyncio.sleep(0.1)
+            return a
+
+        start = perf_counter()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda a: self.loop_thread.run(wait(a)), range(20)))
+
+        # callers from many threads await on the loop at the same time
+        self.assertEqual(results, list(range(20)))
+        self.assertLess(perf_counter() - start, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import unittest
+from Cache import Cache
+from Metrics import Histogram, Metrics
+from CircuitBreaker import CircuitBreaker
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.1, 1))
+
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative_counts(), [(0.1, 2), (1, 3), (float("inf"), 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+
+    def test_collect(self):
+        metrics = Metrics(buckets=(0.1,))
+        cache = Cache(group_key="a", max_bytes=1024)
+
+        @cache
+        def func(a, b):
+            return "value"
+
+        func(1, 1)
+        func(1, 1)
+        func(2, 1)
+
+        metrics.register_cache("func", cache)
+        metrics.observe_latency("sync", "/product/{}", 0.05)
+
+        collected = metrics.collect()
+        self.assertEqual(collected["caches"]["func"]["stats"], {"hits": 1, "misses": 2})
+        self.assertEqual(collected["caches"]["func"]["records"], 2)
+        self.assertEqual(collected["caches"]["func"]["bytes"], 2 * sys.getsizeof("value"))
+        self.assertEqual(collected["latencies"][("sync", "/product/{}")]["count"], 1)
+
+    def test_render(self):
+        metrics = Metrics(buckets=(0.1,))
+        cache = Cache()
+
+        @cache
+        def func(a):
+            return a
+
+        func(1)
+        metrics.register_cache("func", cache)
+        metrics.observe_latency("async", "/offers/{}/{}/{}", 0.5)
+
+        lines = metrics.render().splitlines()
+        self.assertIn('heureka_cache_events_total{function="func",event="misses"} 1', lines)
+        self.assertIn('heureka_cache_records{function="func"} 1', lines)
+        self.assertIn('heureka_api_request_duration_seconds_bucket{client="async",pattern="/offers/{}/{}/{}",le="0.1"} 0',
+                      lines)
+        self.assertIn('heureka_api_request_duration_seconds_bucket{client="async",pattern="/offers/{}/{}/{}",le="+Inf"} 1',
+                      lines)
+        self.assertIn('heureka_api_request_duration_seconds_count{client="async",pattern="/offers/{}/{}/{}"} 1', lines)
+
+    def test_render_circuits(self):
+        metrics = Metrics()
+        circuit_breaker = CircuitBreaker(failure_threshold=1, max_timeout=2)
+        metrics.register_circuit_breaker(circuit_breaker)
+
+        circuit_breaker.record("/product/{}", circuit_breaker.allow("/product/{}"), False)
+
+        lines = metrics.render().splitlines()
+        self.assertIn('heureka_circuit_state{pattern="/product/{}",state="open"} 1', lines)
+        self.assertIn('heureka_circuit_state{pattern="/product/{}",state="closed"} 0', lines)
+        self.assertIn('heureka_api_request_timeout_seconds{pattern="/product/{}"} 2', lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
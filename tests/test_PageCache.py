@@ -0,0 +1,75 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import unittest
+from threading import Barrier
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, request, abort
+from PageCache import PageCache
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        app = Flask(__name__)
+
+        @app.route("/<category>")
+        def render_products(category):
+            self.calls.append(request.full_path)
+            sleep(0.05)
+
+            if request.args.get("id", type=int) == 0:
+                abort(404)
+
+            return "{} {}".format(request.args.get("id", type=int), len(self.calls))
+
+        self.page_cache = PageCache(app, {"render_products": {"max_lifetime": 10, "args": {"id": None, "page": 0}}})
+        self.client = app.test_client()
+
+    def test_normalized_key(self):
+        first = self.client.get("/a?id=1")
+        self.assertEqual(first.data, b"1 1")
+
+        # slug, default page and unknown parameters do not change the key
+        for url in ["/a?id=1", "/b?id=1", "/a?id=1&page=0", "/a?page=0&id=1&utm=x"]:
+            self.assertEqual(self.client.get(url).data, b"1 1")
+
+        self.assertEqual(self.client.get("/a?id=1&page=1").data, b"1 2")
+        self.assertEqual(self.client.get("/a?id=2").data, b"2 3")
+        self.assertEqual(self.page_cache.caches["render_products"].stats["hits"], 4)
+
+    def test_key_without_id(self):
+        # pages without ID are identified by their slugs
+        self.assertEqual(self.client.get("/a").data, b"None 1")
+        self.assertEqual(self.client.get("/a?page=0").data, b"None 1")
+        self.assertEqual(self.client.get("/b").data, b"None 2")
+
+    def test_uncacheable(self):
+        self.assertEqual(self.client.get("/a?id=0").status_code, 404)
+        self.assertEqual(self.client.get("/a?id=0").status_code, 404)
+        self.assertEqual(len(self.calls), 2)
+
+        # requests with authorization bypass the cache
+        self.client.get("/a?id=1")
+        self.client.get("/a?id=1", headers={"Authorization": "Bearer x"})
+        self.assertEqual(len(self.calls), 4)
+
+    def test_concurrent_misses_coalesced(self):
+        barrier = Barrier(4)
+
+        def get(_):
+            barrier.wait()
+            return self.client.get("/a?id=1").data
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(get, range(4)))
+
+        self.assertEqual(results, [b"1 1"] * 4)
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import asyncio
+import unittest
+from Cache import Cache
+from AsyncCache import AsyncCache
+from LoopThread import LoopThread
+from Prefetcher import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.loop_thread = LoopThread(max_workers=2)
+
+    def tearDown(self):
+        self.loop_thread.stop()
+
+    def test_prefetch(self):
+        prefetcher = Prefetcher(self.loop_thread)
+
+        @Cache()
+        def func(a):
+            return a
+
+        @AsyncCache()
+        async def async_func(a):
+            return a
+
+        async def prefetch():
+            return await asyncio.gather(prefetcher.prefetch(func, 1), prefetcher.prefetch(async_func, 2))
+
+        self.assertEqual(self.loop_thread.run(prefetch()), [1, 2])
+        self.assertEqual(func(1), 1)
+        self.assertEqual(prefetcher.hit_rates(), {
+            "func": {"prefetches": 1, "prefetch_hits": 1, "hit_rate": 1.0},
+            "async_func": {"prefetches": 1, "prefetch_hits": 0, "hit_rate": 0.0}
+        })
+
+    def test_limits(self):
+        prefetcher = Prefetcher(self.loop_thread, max_concurrency=2, max_pending=3)
+        running = []
+        max_running = []
+
+        @AsyncCache()
+        async def func(a):
+            running.append(a)
+            await asyncio.sleep(0.05)
+            max_running.append(len(running))
+            running.remove(a)
+            return a
+
+        async def prefetch():
+            return await asyncio.gather(*[prefetcher.prefetch(func, a) for a in range(5)])
+
+        # loads above budget are dropped, the rest runs at most two at a time
+        self.assertEqual(self.loop_thread.run(prefetch()), [0, 1, 2, None, None])
+        self.assertEqual(max(max_running), 2)
+        self.assertEqual(prefetcher.stats["dropped"], 2)
+        self.assertEqual(prefetcher.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
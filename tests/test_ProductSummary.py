@@ -0,0 +1,47 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import unittest
+from ProductSummary import ProductSummary, ShopOffer
+
+
+class TestProductSummary(unittest.TestCase):
+    def setUp(self):
+        self.summary = ProductSummary(1, "Velký Produkt")
+
+    def build_offer(self, price, description=None, img_url=None):
+        return {"title": "Offer {}".format(price), "url": "http://eshop.cz/{}".format(price), "price": price,
+                "description": description, "img_url": img_url}
+
+    def test_empty(self):
+        self.summary.finalize()
+        self.assertEqual(self.summary.normalized_title, "velky-produkt")
+        self.assertEqual(self.summary.offers, ())
+        self.assertEqual(self.summary.img_urls, ())
+        self.assertIsNone(self.summary.img_url)
+        self.assertIsNone(self.summary.description)
+
+    def test_add_offers(self):
+        # offers are aggregated page by page
+        self.summary.add_offers([self.build_offer(300, img_url="b.png"), self.build_offer(100, description="first")])
+        self.summary.add_offers([self.build_offer(200, description="second", img_url="a.png"),
+                                 self.build_offer(250, img_url="b.png")])
+        self.summary.finalize()
+
+        self.assertEqual(self.summary.min_price, 100)
+        self.assertEqual(self.summary.max_price, 300)
+        self.assertEqual(self.summary.description, "first")
+        self.assertEqual(self.summary.img_urls, ("b.png", "a.png"))
+        self.assertEqual(self.summary.img_url, "b.png")
+        self.assertEqual([offer.price for offer in self.summary.offers], [100, 200, 250, 300])
+        self.assertEqual(self.summary.offers[0], ShopOffer("Offer 100", "http://eshop.cz/100", 100))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            self.summary.unknown = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
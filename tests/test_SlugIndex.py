@@ -0,0 +1,39 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import pickle
+import unittest
+from SlugIndex import SlugIndex
+
+
+class TestSlugIndex(unittest.TestCase):
+    def test_index(self):
+        index = SlugIndex([(3, "auta"), (1, "kola"), (2, "lode")])
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.get_id("kola"), 1)
+        self.assertIsNone(index.get_id("vlaky"))
+        self.assertEqual(index.get_slug(2), "lode")
+        self.assertIsNone(index.get_slug(4))
+
+        # pages keep original order
+        self.assertEqual(list(index.page(0, 2)), [3, 1])
+        self.assertEqual(list(index.page(2, 4)), [2])
+        self.assertEqual(list(index.page(3, 6)), [])
+
+    def test_ambiguous_slug(self):
+        index = SlugIndex([(1, "auta"), (2, "auta"), (3, "auta"), (4, "kola")])
+
+        self.assertIsNone(index.get_id("auta"))
+        self.assertEqual(index.get_id("kola"), 4)
+        self.assertEqual(index.get_slug(2), "auta")
+
+    def test_pickle(self):
+        index = pickle.loads(pickle.dumps(SlugIndex([(1, "auta")])))
+        self.assertEqual(index.get_id("auta"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import os
+import asyncio
+import unittest
+from tempfile import TemporaryDirectory
+from Cache import Cache
+from AsyncCache import AsyncCache
+from CacheBackend import CacheBackend
+from SqliteBackend import SqliteBackend
+
+
+class TestSqliteBackend(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.backend = SqliteBackend(os.path.join(self.directory.name, "cache.sqlite3"), lease_timeout=0.2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_set(self):
+        self.assertIsNone(self.backend.get("func", (1,)))
+
+        self.backend.set("func", (1,), {"a": 1}, 100.0)
+        self.assertEqual(self.backend.get("func", (1,)), ({"a": 1}, 100.0))
+        self.assertIsNone(self.backend.get("other", (1,)))
+
+        # expired record is not returned
+        self.backend.set("func", (2,), 2, 100.0, expire_time=101.0)
+        self.assertIsNone(self.backend.get("func", (2,)))
+
+    def test_interface(self):
+        self.assertIsInstance(self.backend, CacheBackend)
+
+        # backend has to implement whole interface
+        with self.assertRaises(TypeError):
+            type("PartialBackend", (CacheBackend,), {"get": lambda self, namespace, key: None})()
+
+    def test_lease(self):
+        first_token = self.backend.acquire("func", (1,))
+        self.assertIsNotNone(first_token)
+        self.assertIsNotNone(self.backend.acquire("func", (2,)))
+
+        # lease held by another process expires
+        second_token = self.backend.acquire("func", (1,))
+        self.assertIsNotNone(second_token)
+        self.assertNotEqual(second_token, first_token)
+
+        self.backend.release("func", (1,), second_token)
+        self.assertIsNotNone(self.backend.acquire("func", (1,)))
+
+    def test_lease_released_by_owner_only(self):
+        other = SqliteBackend(self.backend.path, lease_timeout=0.2)
+
+        # first holder runs past its lease, which is then acquired by another process
+        first_token = self.backend.acquire("func", (1,))
+        self.assertIsNotNone(other.acquire("func", (1,)))
+
+        # late release of the first holder keeps lease of the other one
+        self.backend.release("func", (1,), first_token)
+        other.lease_timeout = 0.05
+        self.assertIsNone(other.acquire("func", (1,)))
+
+    def test_shared_cache(self):
+        calls = []
+
+        # caches of the same function in different processes
+        def create_func():
+            @Cache(max_lifetime=10, backend=self.backend)
+            def func(a):
+                calls.append(a)
+                return a
+
+            return func
+
+        first, second = create_func(), create_func()
+        self.assertEqual(first(1), 1)
+        self.assertEqual(second(1), 1)
+        self.assertEqual(second(2), 2)
+        self.assertEqual(first(2), 2)
+        self.assertEqual(calls, [1, 2])
+
+    def test_shared_async_cache(self):
+        calls = []
+
+        def create_func():
+            @AsyncCache(max_lifetime=10, backend=self.backend)
+            async def func(a):
+                calls.append(a)
+                return a
+
+            return func
+
+        first, second = create_func(), create_func()
+        loop = asyncio.new_event_loop()
+
+        self.assertEqual(loop.run_until_complete(first(1)), 1)
+        self.assertEqual(loop.run_until_complete(second(1)), 1)
+        self.assertEqual(calls, [1])
+
+        loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
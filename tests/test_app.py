@@ -0,0 +1,350 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+sys.path.append("../benchmarks")
+
+import unittest
+from time import sleep
+from werkzeug.exceptions import NotFound
+from stub_api import StubApi, Dataset, serve_in_background
+from HttpClient import HttpClient
+from AsyncHttpClient import AsyncHttpClient
+import utils
+import api as cached_api
+from app import app, loop_thread
+
+
+def age_records(cached_function, seconds):
+    """Make records of cached function older.
+
+    Args:
+        cached_function (function): function decorated by cache
+        seconds (float): age added to all records
+
+    """
+    cache = cached_function.cache
+
+    for subcache in list(cache.cache.values()) if cache.grouped else [cache.cache]:
+        for record in list(subcache.values()):
+            record["fetch_time"] -= seconds
+
+
+class StubTestCase(unittest.TestCase):
+    """Application requesting local stub of the API.
+
+    Caches of the application are shared by all tests, so every test uses its own IDs.
+
+    """
+    dataset = Dataset(categories_count=30, products_per_category=10, offers_per_product=3)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api = StubApi(cls.dataset)
+        cls.api_server, api_url = serve_in_background(cls.api)
+
+        cls.clients = utils.http_client, utils.async_http_client
+        utils.http_client = HttpClient(api_url)
+        utils.async_http_client = AsyncHttpClient(api_url)
+
+    @classmethod
+    def tearDownClass(cls):
+        utils.http_client.close()
+        loop_thread.run(utils.async_http_client.close())
+        utils.http_client, utils.async_http_client = cls.clients
+        cls.api_server.shutdown()
+        cls.api_server.server_close()
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def get(self, url, **kwargs):
+        """Request page and count API requests it needed.
+
+        Args:
+            url (str): url of page
+
+        Returns:
+            tuple: response and number of API requests
+
+        """
+        requests_count = self.api.requests_count
+        response = self.client.get(url, **kwargs)
+
+        return response, self.api.requests_count - requests_count
+
+
+class TestMissingRecords(StubTestCase):
+    def test_missing_category(self):
+        self.get("/")
+
+        # missing category is found in cached categories without requesting the API
+        for _ in range(3):
+            response, requests_count = self.get("/kategorie?id=999")
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(requests_count, 0)
+
+    def test_missing_product(self):
+        response, requests_count = self.get("/kategorie/produkt?id=2999999")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(requests_count, 1)
+
+        # missing product is cached as negative result
+        response, requests_count = self.get("/kategorie/produkt?id=2999999")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(requests_count, 0)
+
+
+class TestAsyncLoading(StubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.api.latency = 0.02
+        self.api.max_active_count = 0
+
+    def tearDown(self):
+        self.api.latency = 0
+
+    def test_products_page(self):
+        self.get("/")
+        response, requests_count = self.get("/kategorie?id=9")
+        body = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+
+        # listing, count and offers of all products shown on the page
+        self.assertEqual(requests_count, 2 + 5)
+        self.assertEqual(body.count("product-tile"), 5)
+        self.assertEqual(body.count(" Kč</b>"), 5)
+
+        # offers of products are requested concurrently
+        self.assertGreaterEqual(self.api.max_active_count, 5)
+
+    def test_offers_page(self):
+        response, requests_count = self.get("/kategorie/produkt?id=1000003")
+        body = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Produkt 10 3", body)
+        self.assertIn("Kategorie 10", body)
+
+        # category and offers are requested concurrently once product is known
+        self.assertEqual(requests_count, 3)
+        self.assertEqual(self.api.max_active_count, 2)
+
+    def test_failing_summary(self):
+        self.get("/")
+        offers = self.api.offers
+        self.api.offers = lambda product_id, offset, limit: (None if product_id == 1100002 else
+                                                             offers(product_id, offset, limit))
+
+        try:
+            response, _ = self.get("/kategorie?id=11")
+        finally:
+            del self.api.offers
+
+        # product with failing offers gets placeholder, page is not stored by clients
+        body = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.count("product-tile"), 5)
+        self.assertEqual(body.count(" Kč</b>"), 4)
+        self.assertTrue(response.cache_control.no_store)
+
+
+class TestProductSummary(StubTestCase):
+    dataset = Dataset(categories_count=30, products_per_category=10, offers_per_product=250)
+
+    def summarize(self, product_id, offers_count):
+        """Summarize offers of product without cache.
+
+        Args:
+            product_id (int): id of product
+            offers_count (int): number of offers of product
+
+        Returns:
+            tuple: summary and number of API requests
+
+        """
+        self.dataset.offers_per_product = offers_count
+        requests_count = self.api.requests_count
+
+        try:
+            summary = loop_thread.run(cached_api.get_product_summary_async.__wrapped__(
+                self.dataset.product(product_id)))
+        finally:
+            self.dataset.offers_per_product = 250
+
+        return summary, self.api.requests_count - requests_count
+
+    def test_one_page(self):
+        summary, requests_count = self.summarize(1300001, 50)
+
+        # offers count is not requested when the first page is not full
+        self.assertEqual(requests_count, 1)
+        self.assertEqual(len(summary.offers), 50)
+        self.assertEqual(summary.title, "Produkt 13 1")
+
+    def test_full_page(self):
+        summary, requests_count = self.summarize(1300002, 100)
+        self.assertEqual(requests_count, 2)
+        self.assertEqual(len(summary.offers), 100)
+
+    def test_multiple_pages(self):
+        summary, requests_count = self.summarize(1300003, 250)
+
+        # first page, offers count and remaining pages
+        self.assertEqual(requests_count, 4)
+        self.assertEqual(len(summary.offers), 250)
+        self.assertEqual(len({offer.url for offer in summary.offers}), 250)
+
+        prices = [offer.price for offer in summary.offers]
+        self.assertEqual(prices, sorted(prices))
+        self.assertEqual((summary.min_price, summary.max_price), (prices[0], prices[-1]))
+
+    def test_failing_count(self):
+        self.api.offers_count = lambda product_id: None
+
+        try:
+            with self.assertRaises(NotFound):
+                self.summarize(1300004, 250)
+        finally:
+            del self.api.offers_count
+
+
+class TestConditionalResponses(StubTestCase):
+    def max_age(self, response):
+        return response.cache_control.max_age
+
+    def test_not_modified(self):
+        response, _ = self.get("/")
+        etag = response.headers["ETag"]
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cache_control.public)
+        self.assertTrue(0 < self.max_age(response) <= cached_api.get_categories.cache.max_lifetime)
+
+        # client with current page gets empty response
+        response, _ = self.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+        response, _ = self.get("/", headers={"If-None-Match": '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_max_age_of_aged_records(self):
+        self.get("/?page=1")
+
+        # page is fresh only for remaining lifetime of its records
+        age_records(cached_api.get_categories, cached_api.get_categories.cache.max_lifetime - 100)
+        response, _ = self.get("/?page=1")
+        self.assertTrue(90 < self.max_age(response) <= 100)
+
+        # page of stale records has to be revalidated
+        age_records(cached_api.get_categories, 200)
+        response, _ = self.get("/?page=1")
+        etag = response.headers["ETag"]
+        self.assertEqual(self.max_age(response), 0)
+        self.assertFalse(response.cache_control.no_store)
+
+        response, _ = self.get("/?page=1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        # stale records are refreshed in background
+        for _ in range(100):
+            if cached_api.get_categories.conditional()[2]:
+                break
+
+            sleep(0.01)
+
+        response, _ = self.get("/?page=1")
+        self.assertTrue(self.max_age(response) > 0)
+
+    def test_products_page(self):
+        response, _ = self.get("/kategorie?id=5")
+        etag = response.headers["ETag"]
+        self.assertTrue(0 < self.max_age(response) <= cached_api.get_products.cache.max_lifetime)
+
+        response, _ = self.get("/kategorie?id=5", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        # replaced listing of products changes the page, although summaries of its products are the same
+        products = self.api.products
+        self.api.products = lambda category_id, offset, limit: [
+            dict(product, title=product["title"] + " nový") for product in products(category_id, offset, limit)]
+
+        try:
+            age_records(cached_api.get_products, 1000)
+            response, _ = self.get("/kategorie?id=5", headers={"If-None-Match": etag})
+        finally:
+            del self.api.products
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_offers_page(self):
+        response, _ = self.get("/kategorie/produkt?id=600001")
+        etag = response.headers["ETag"]
+        self.assertTrue(0 < self.max_age(response) <= cached_api.get_product.cache.max_lifetime)
+
+        response, _ = self.get("/kategorie/produkt?id=600001", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        # summary without offers is negative record with short lifetime
+        self.api.offers = lambda product_id, offset, limit: []
+
+        try:
+            response, _ = self.get("/kategorie/produkt?id=600002")
+        finally:
+            del self.api.offers
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(0 < self.max_age(response) <= cached_api.get_product_summary_async.cache.negative_ttl)
+
+
+class TestSlugUrls(StubTestCase):
+    def title(self, response):
+        return response.get_data(as_text=True).split("<title>")[1].split("</title>")[0]
+
+    def test_category_slug(self):
+        response, _ = self.get("/kategorie-7")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('href="/kategorie-7/produkt-7-0?id=700000"', response.get_data(as_text=True))
+
+        # url without ID renders the same page as url with it
+        self.assertEqual(response.get_data(), self.get("/kategorie-7?id=7")[0].get_data())
+
+    def test_product_slug(self):
+        response, _ = self.get("/kategorie-7/produkt-7-2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.title(response), "Produkt 7 2")
+
+    def test_unknown_slugs(self):
+        self.assertEqual(self.get("/neznama-kategorie")[0].status_code, 404)
+        self.assertEqual(self.get("/neznama-kategorie/produkt-7-2")[0].status_code, 404)
+
+        # unknown product is found in cached index of category
+        self.get("/kategorie-7/produkt-7-2")
+        response, requests_count = self.get("/kategorie-7/neznamy-produkt")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(requests_count, 0)
+
+    def test_index_rebuilt_with_categories(self):
+        self.assertEqual(self.get("/kategorie-8")[0].status_code, 200)
+        misses = cached_api.index_categories.cache.stats["misses"]
+
+        # renamed category is found by its new slug once categories are replaced
+        categories = self.api.categories
+        self.api.categories = lambda: [dict(category, title="Nová kategorie 8") if category["categoryId"] == 8
+                                       else category for category in categories()]
+
+        try:
+            age_records(cached_api.get_categories, 1000)
+            self.assertEqual(self.get("/nova-kategorie-8")[0].status_code, 200)
+            self.assertEqual(self.get("/kategorie-8")[0].status_code, 404)
+            self.assertEqual(cached_api.index_categories.cache.stats["misses"], misses + 1)
+        finally:
+            del self.api.categories
+            age_records(cached_api.get_categories, 1000)
+
+        self.assertEqual(self.get("/kategorie-8")[0].status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
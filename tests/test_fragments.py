@@ -0,0 +1,67 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+
+import unittest
+from collections import OrderedDict
+from app import app
+from ProductSummary import ProductSummary
+from fragments import render_fragment, render_left_navigation, render_product_tile
+
+
+class TestFragments(unittest.TestCase):
+    def setUp(self):
+        self.stats = render_fragment.cache.stats
+
+    def categories(self, title):
+        return OrderedDict([(1, {"title": title, "normalized_title": "kategorie-1"}),
+                            (2, {"title": "Kategorie 2", "normalized_title": "kategorie-2"})])
+
+    def summary(self, product_id, price):
+        summary = ProductSummary(product_id, "Produkt {}".format(product_id))
+        summary.add_offers([{"title": "Nabídka", "url": "http://eshop.cz", "price": price,
+                             "description": "Popis", "img_url": "http://eshop.cz/1.png"}])
+        summary.finalize()
+        return summary
+
+    def test_keyed_by_version(self):
+        with app.test_request_context("/"):
+            misses = self.stats["misses"]
+            menu = render_left_navigation(self.categories("Auta"), "fragments-v1", 1)
+            self.assertIn("Auta", menu)
+
+            # fragment of the same version is not rendered again
+            self.assertEqual(render_left_navigation(self.categories("Kola"), "fragments-v1", 1), menu)
+            self.assertEqual(self.stats["misses"], misses + 1)
+
+            # replaced record has new version, so fragment is rendered from new data
+            menu = render_left_navigation(self.categories("Kola"), "fragments-v2", 1)
+            self.assertIn("Kola", menu)
+            self.assertNotIn("Auta", menu)
+            self.assertEqual(self.stats["misses"], misses + 2)
+
+            # active category is part of the key
+            self.assertIn("active", render_left_navigation(self.categories("Kola"), "fragments-v2", 2))
+            self.assertEqual(self.stats["misses"], misses + 3)
+
+    def test_reused_across_pages(self):
+        with app.test_request_context("/kategorie-1?id=1"):
+            tile = render_product_tile(self.summary(100001, 100), "fragments-summary-v1", "kategorie-1")
+            self.assertIn("100 - 100", tile)
+            misses = self.stats["misses"]
+
+        # tile of the same summary on another page is hit
+        with app.test_request_context("/kategorie-1?id=1&page=1"):
+            self.assertEqual(render_product_tile(self.summary(100001, 100), "fragments-summary-v1", "kategorie-1"),
+                             tile)
+            self.assertEqual(self.stats["misses"], misses)
+
+            # replaced summary is rendered again
+            tile = render_product_tile(self.summary(100001, 200), "fragments-summary-v2", "kategorie-1")
+            self.assertIn("200 - 200", tile)
+            self.assertEqual(self.stats["misses"], misses + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
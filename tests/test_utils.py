@@ -0,0 +1,80 @@
+import sys
+
+sys.path.append("..")
+sys.path.append("../heureka")
+sys.path.append("../benchmarks")
+
+import asyncio
+import unittest
+from threading import Thread
+from http.server import BaseHTTPRequestHandler
+from werkzeug.exceptions import NotFound, ServiceUnavailable
+from stub_api import ThreadingServer
+from AsyncHttpClient import AsyncHttpClient
+from AsyncCache import AsyncCache
+import utils
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disconnected = False
+
+    def do_GET(self):
+        # server closes connection without response, e.g. when it is restarted
+        if self.path == "/product/1" and self.disconnected:
+            self.close_connection = True
+            return
+
+        status = 404 if self.path == "/product/2" else 200
+        body = b'{"productId": 1}'
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestGetResponseAsync(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.server = ThreadingServer(("127.0.0.1", 0), Handler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.async_http_client = utils.async_http_client
+        utils.async_http_client = AsyncHttpClient("http://127.0.0.1:{}".format(self.server.server_address[1]))
+
+    def tearDown(self):
+        self.loop.run_until_complete(utils.async_http_client.close())
+        utils.async_http_client = self.async_http_client
+        self.server.shutdown()
+        self.server.server_close()
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_missing_record(self):
+        with self.assertRaises(NotFound):
+            self.run_async(utils.get_response_async("/product/2"))
+
+    def test_server_disconnected_is_not_missing_record(self):
+        cache = AsyncCache(negative_ttl=10, negative_exceptions=(NotFound,))
+        get_product = cache(utils.get_response_async)
+        Handler.disconnected = True
+
+        # transient disconnect is not cached as missing record
+        with self.assertRaises(ServiceUnavailable):
+            self.run_async(get_product("/product/1"))
+
+        Handler.disconnected = False
+        self.assertEqual(len(cache.negatives), 0)
+        self.assertEqual(self.run_async(get_product("/product/1")), {"productId": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()